@@ -2,7 +2,6 @@ from csv import writer
 
 from django.contrib import admin
 from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
-from django.db.models import Count
 from django.http import HttpResponse, HttpResponseRedirect
 
 from . import models
@@ -11,16 +10,12 @@ from . import models
 class BeerAdmin(admin.ModelAdmin):
     @admin.action(description="Export as CSV")
     def export_as_csv(self, request, queryset):
-        queryset = (
-            queryset.select_related(
-                "manufacturer",
-                "style",
-            )
-            .annotate(taps_count=Count("taps"))
-            .order_by(
-                "manufacturer__name",
-                "name",
-            )
+        queryset = queryset.select_related(
+            "manufacturer",
+            "style",
+        ).order_by(
+            "manufacturer__name",
+            "name",
         )
         field_names = {
             "ID": "id",
@@ -102,6 +97,12 @@ class BeerPriceAdmin(admin.ModelAdmin):
     )
 
 
+class PendingUntappdLookupAdmin(admin.ModelAdmin):
+    list_display = ("beer", "priority", "queued_at")
+    list_select_related = ("beer",)
+    ordering = ("-priority", "queued_at")
+
+
 class StyleAdmin(admin.ModelAdmin):
     actions = ["export_as_csv", "merge_styles"]
     search_fields = ("name", "alternate_names")
@@ -135,3 +136,4 @@ admin.site.register(models.BeerPrice, BeerPriceAdmin)
 admin.site.register(models.ServingSize)
 admin.site.register(models.Beer, BeerAdmin)
 admin.site.register(models.UntappdMetadata)
+admin.site.register(models.PendingUntappdLookup, PendingUntappdLookupAdmin)
@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class BeersConfig(AppConfig):
     name = "beers"
+
+    def ready(self):
+        # connects the signals that invalidate the cached reference data
+        # and API responses and keep the search index up to date
+        from hsv_dot_beer import api_cache  # noqa
+        from . import reference_data, search  # noqa
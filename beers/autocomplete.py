@@ -0,0 +1,230 @@
+"""In-memory index for BeerViewSet.autocomplete
+
+Every beer, manufacturer, and style is broken into the words of its name and
+alternate names, and those words are kept sorted so that everything starting
+with what's been typed so far is one binary search away. Popularity (taps
+occupied, number of beers) is precomputed, so a lookup never touches the
+database.
+
+Each process keeps the index in memory, tagged with the API cache versions
+it was built from. Those are the global version (API writes and merges) and
+a version of its own that's only bumped when tap lists change (ingestion
+runs and the tap forms), not on every beer the providers or the Untappd
+lookups save, so a rebuild covers a whole run's worth of changes. Once they
+move, the next lookup picks up the index for the new versions from the
+cache, or builds and shares it if no other process has yet. The
+warm_api_cache task builds it right after ingestion so requests don't have
+to.
+
+Every word typed has to start a word somewhere: in the beer's own names
+(which count the most), its manufacturer's, or its style's.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+import heapq
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+
+from hsv_dot_beer import api_cache
+from .models import Beer, Manufacturer, Style
+from .search import WORD_REGEX
+
+# the API cache versions the index depends on
+SCOPES = (api_cache.GLOBAL, api_cache.AUTOCOMPLETE)
+MAX_RESULTS = 10
+# how much a match counts for, by where it was found
+BEER_WEIGHT = 3
+MANUFACTURER_WEIGHT = 2
+STYLE_WEIGHT = 1
+
+
+def tokenize(name: str, alternate_names) -> set[str]:
+    return {
+        word
+        for value in (name, *(alternate_names or ()))
+        for word in WORD_REGEX.findall(value.lower())
+    }
+
+
+class PrefixIndex:
+    """Finds the ids of the rows that have a word starting with a prefix"""
+
+    def __init__(self, rows: list[dict]):
+        pairs = sorted(
+            (word, row["id"])
+            for row in rows
+            for word in tokenize(row["name"], row["alternate_names"])
+        )
+        self.words = [word for word, _ in pairs]
+        self.ids = [row_id for _, row_id in pairs]
+
+    def search(self, prefix: str) -> set[int]:
+        start = bisect_left(self.words, prefix)
+        end = bisect_left(self.words, prefix + chr(0x10FFFF), start)
+        return set(self.ids[start:end])
+
+
+class BeerMatches(NamedTuple):
+    own: set[int]
+    by_manufacturer: set[int]
+    by_style: set[int]
+
+    def all(self) -> set[int]:
+        return self.own | self.by_manufacturer | self.by_style
+
+    def weight(self, beer_id: int) -> int:
+        if beer_id in self.own:
+            return BEER_WEIGHT
+        if beer_id in self.by_manufacturer:
+            return MANUFACTURER_WEIGHT
+        return STYLE_WEIGHT
+
+
+class AutocompleteIndex:
+    def __init__(self, beers: list[dict], manufacturers: list, styles: list):
+        self.beers = {beer["id"]: beer for beer in beers}
+        self.manufacturers = {mfg["id"]: mfg for mfg in manufacturers}
+        self.styles = {style["id"]: style for style in styles}
+        self.beer_names = PrefixIndex(beers)
+        self.manufacturer_names = PrefixIndex(manufacturers)
+        self.style_names = PrefixIndex(styles)
+        self.beers_by_manufacturer = defaultdict(set)
+        self.beers_by_style = defaultdict(set)
+        for beer in beers:
+            self.beers_by_manufacturer[beer["manufacturer_id"]].add(beer["id"])
+            if beer["style_id"] is not None:
+                self.beers_by_style[beer["style_id"]].add(beer["id"])
+
+    @classmethod
+    def build(cls) -> "AutocompleteIndex":
+        popularity = {
+            "beers_count": Count("beers", distinct=True),
+            "taps_occupied": Coalesce(Sum("beers__taps_count"), 0),
+        }
+        fields = ("id", "name", "alternate_names")
+        beers = Beer.objects.values(
+            *fields, "taps_count", "manufacturer_id", "manufacturer__name", "style_id"
+        )
+        manufacturers = Manufacturer.objects.annotate(**popularity)
+        styles = Style.objects.annotate(**popularity)
+        return cls(
+            list(beers),
+            list(manufacturers.values(*fields, *popularity)),
+            list(styles.values(*fields, *popularity)),
+        )
+
+    def search(self, value: str) -> dict:
+        words = WORD_REGEX.findall(value.lower())
+        return {
+            "beers": [
+                {
+                    "name": beer["name"],
+                    "taps": beer["taps_count"],
+                    "alternate_names": beer["alternate_names"] or [],
+                    "manufacturer": beer["manufacturer__name"],
+                }
+                for beer in self.search_beers(words)
+            ],
+            "styles": [
+                {
+                    "name": style["name"],
+                    "beers": style["beers_count"],
+                    "taps_occupied": style["taps_occupied"],
+                    "alternate_names": style["alternate_names"] or [],
+                }
+                for style in self.search_names(words, self.style_names, self.styles)
+            ],
+            "manufacturers": [
+                {
+                    "name": mfg["name"],
+                    "beers": mfg["beers_count"],
+                    "taps_occupied": mfg["taps_occupied"],
+                    "alternate_names": mfg["alternate_names"] or [],
+                }
+                for mfg in self.search_names(
+                    words, self.manufacturer_names, self.manufacturers
+                )
+            ],
+        }
+
+    def search_beers(self, words: list[str]) -> list[dict]:
+        if not words:
+            return []
+        matches = []
+        for word in words:
+            matches.append(
+                BeerMatches(
+                    self.beer_names.search(word),
+                    self.related_beers(
+                        self.manufacturer_names.search(word),
+                        self.beers_by_manufacturer,
+                    ),
+                    self.related_beers(
+                        self.style_names.search(word), self.beers_by_style
+                    ),
+                )
+            )
+        beer_ids = set.intersection(*(match.all() for match in matches))
+
+        def key(beer_id):
+            beer = self.beers[beer_id]
+            return (
+                -sum(match.weight(beer_id) for match in matches),
+                -beer["taps_count"],
+                beer["manufacturer__name"].lower(),
+                beer["name"].lower(),
+                beer_id,
+            )
+
+        return [
+            self.beers[beer_id]
+            for beer_id in heapq.nsmallest(MAX_RESULTS, beer_ids, key=key)
+        ]
+
+    def search_names(self, words, names: PrefixIndex, rows: dict) -> list[dict]:
+        if not words:
+            return []
+        row_ids = set.intersection(*(names.search(word) for word in words))
+
+        def key(row_id):
+            row = rows[row_id]
+            return (-row["taps_occupied"], -row["beers_count"], row["name"].lower())
+
+        return [
+            rows[row_id] for row_id in heapq.nsmallest(MAX_RESULTS, row_ids, key=key)
+        ]
+
+    @staticmethod
+    def related_beers(related_ids: set[int], beers_by_related: dict) -> set[int]:
+        beer_ids = set()
+        for related_id in related_ids:
+            beer_ids |= beers_by_related.get(related_id, set())
+        return beer_ids
+
+
+class LoadedIndex(NamedTuple):
+    version: str
+    index: AutocompleteIndex
+
+
+# this process's copy
+_loaded = None
+
+
+def get_index() -> AutocompleteIndex:
+    """The index for the current data, loading or building it if needed"""
+    global _loaded  # pylint: disable=global-statement
+    version = "-".join(str(version) for version in api_cache.get_versions(list(SCOPES)))
+    if _loaded is not None and _loaded.version == version:
+        return _loaded.index
+    key = f"autocomplete-index:{version}"
+    index = cache.get(key)
+    if index is None:
+        index = AutocompleteIndex.build()
+        cache.set(key, index, settings.API_CACHE_TIMEOUT)
+    _loaded = LoadedIndex(version, index)
+    return index
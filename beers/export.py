@@ -0,0 +1,125 @@
+"""Streaming export of everything on tap
+
+One record per tap with a beer on it, with the beer, the venue, and what
+the venue charges for the beer. Taps are read with a server-side cursor and
+their prices looked up a chunk at a time, so memory use doesn't grow with
+the number of taps.
+"""
+import csv
+import datetime
+from itertools import islice
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+from taps.models import Tap
+from . import models
+
+CHUNK_SIZE = 2000
+
+TAP_COLUMNS = {
+    "venue_id": "venue_id",
+    "venue_name": "venue__name",
+    "venue_slug": "venue__slug",
+    "tap_number": "tap_number",
+    "gas_type": "gas_type",
+    "estimated_percent_remaining": "estimated_percent_remaining",
+    "time_added": "time_added",
+    "time_updated": "time_updated",
+    "beer_id": "beer_id",
+    "beer_name": "beer__name",
+    "abv": "beer__abv",
+    "ibu": "beer__ibu",
+    "style": "beer__style__name",
+    "manufacturer_id": "beer__manufacturer_id",
+    "manufacturer_name": "beer__manufacturer__name",
+    "untappd_url": "beer__untappd_url",
+}
+CSV_COLUMNS = [*TAP_COLUMNS, "prices"]
+
+
+class ExportRenderer(BaseRenderer):
+    """Only here for content negotiation, since the export streams its body
+
+    Errors still get rendered with it, though.
+    """
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder)
+
+
+class NDJSONRenderer(ExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+def iter_taps(chunk_size: int = CHUNK_SIZE):
+    """Each tap that has a beer on it, as a dict with a list of prices"""
+    rows = (
+        Tap.objects.filter(beer__isnull=False)
+        .order_by("venue__name", "tap_number", "id")
+        .values(*TAP_COLUMNS.values())
+        .iterator(chunk_size=chunk_size)
+    )
+    while chunk := list(islice(rows, chunk_size)):
+        prices = {}
+        for price in (
+            models.BeerPrice.objects.filter(
+                beer_id__in={row["beer_id"] for row in chunk},
+                venue_id__in={row["venue_id"] for row in chunk},
+            )
+            .order_by("serving_size__volume_oz", "id")
+            .values(
+                "beer_id",
+                "venue_id",
+                "serving_size__name",
+                "serving_size__volume_oz",
+                "price",
+            )
+        ):
+            prices.setdefault((price["beer_id"], price["venue_id"]), []).append(
+                {
+                    "serving_size": price["serving_size__name"],
+                    "volume_oz": price["serving_size__volume_oz"],
+                    "price": price["price"],
+                }
+            )
+        for row in chunk:
+            tap = {name: row[column] for name, column in TAP_COLUMNS.items()}
+            tap["prices"] = prices.get((row["beer_id"], row["venue_id"]), [])
+            yield tap
+
+
+def to_ndjson(taps):
+    for tap in taps:
+        yield json.dumps(tap, cls=DjangoJSONEncoder) + "\n"
+
+
+class Echo:
+    """Hands whatever csv.writer writes straight back"""
+
+    def write(self, value):
+        return value
+
+
+def to_csv(taps):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for tap in taps:
+        tap["prices"] = "; ".join(
+            f"{price['serving_size']}: {price['price']}" for price in tap["prices"]
+        )
+        yield writer.writerow(
+            [
+                value.isoformat() if isinstance(value, datetime.datetime) else value
+                for value in (tap[column] for column in CSV_COLUMNS)
+            ]
+        )
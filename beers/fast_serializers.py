@@ -0,0 +1,125 @@
+"""Fast, read-only rendering of the full BeerSerializer output
+
+See hsv_dot_beer.fast_serializers. A page of beers takes three queries, the
+same as the serializer path: the beers (with their manufacturer, style, and
+Untappd metadata joined in), their venues, and their prices.
+"""
+from collections import defaultdict
+from functools import cache
+
+from django.utils.encoding import force_str
+
+from hsv_dot_beer.fast_serializers import FastSerializer, Override
+from hsv_dot_beer.metrics import timing_serializer
+from taps.models import Tap
+from venues.models import Venue
+from venues.serializers import VenueSerializer
+from . import models
+from .serializers import BeerPriceSerializer, BeerSerializer, UntappdMetadataSerializer
+from .utils import render_srm
+
+
+class FastBeerSerializer:
+    def __init__(self):
+        self.venue = FastSerializer(
+            VenueSerializer,
+            prefix="venue__",
+            overrides={
+                "tap_list_provider_display": Override(
+                    ("venue__tap_list_provider",),
+                    self.get_tap_list_provider_display,
+                ),
+            },
+        )
+        self.tap_list_providers = {
+            value: force_str(label, strings_only=True)
+            for value, label in Venue._meta.get_field("tap_list_provider").flatchoices
+        }
+        self.price = FastSerializer(
+            BeerPriceSerializer,
+            overrides={
+                # str(venue)
+                "venue": Override(("venue__name",), lambda row: row["venue__name"]),
+            },
+        )
+        self.untappd_metadata = FastSerializer(
+            UntappdMetadataSerializer, prefix="untappd_metadata__"
+        )
+        self.beer = FastSerializer(
+            BeerSerializer,
+            overrides={
+                "color_srm_html": Override(
+                    ("color_html", "color_srm"),
+                    lambda row: row["color_html"] or render_srm(row["color_srm"]),
+                ),
+                "venues": Override((), lambda row: row["venues"]),
+                "prices": Override((), lambda row: row["prices"]),
+                "untappd_metadata": Override(
+                    tuple(self.untappd_metadata.columns),
+                    self.untappd_metadata.render_nullable,
+                ),
+            },
+        )
+
+    def get_tap_list_provider_display(self, row):
+        value = row["venue__tap_list_provider"]
+        return self.tap_list_providers.get(value, value)
+
+    def values(self, queryset):
+        """The rows render() needs from a queryset of beers"""
+        return self.beer.values(queryset)
+
+    def render(self, rows, queue_lookups: bool = True) -> list[dict]:
+        with timing_serializer():
+            results = self.render_rows(list(rows))
+        if queue_lookups:
+            queue_untappd_lookups(results)
+        return results
+
+    def render_rows(self, rows: list[dict]) -> list[dict]:
+        beer_ids = [row["id"] for row in rows]
+        venues = defaultdict(dict)
+        for tap in (
+            Tap.objects.filter(beer_id__in=beer_ids, venue__isnull=False)
+            .order_by()
+            .values("beer_id", *self.venue.columns)
+        ):
+            # one entry per venue, no matter how many taps it has the beer on
+            beer_venues = venues[tap["beer_id"]]
+            venue_id = tap[self.venue.pk_column]
+            if venue_id not in beer_venues:
+                beer_venues[venue_id] = self.venue.render(tap)
+        prices = defaultdict(list)
+        for price in (
+            models.BeerPrice.objects.filter(beer_id__in=beer_ids)
+            .order_by("id")
+            .values("beer_id", *self.price.columns)
+        ):
+            prices[price["beer_id"]].append(self.price.render(price))
+        results = []
+        for row in rows:
+            row["venues"] = sorted(
+                venues[row["id"]].values(), key=lambda venue: venue["name"]
+            )
+            row["prices"] = prices[row["id"]]
+            results.append(self.beer.render(row))
+        return results
+
+
+def queue_untappd_lookups(beers: list[dict]) -> None:
+    """Queue lookups for the rendered beers that don't have metadata yet"""
+    # someone wants to see them, so move them to the front of the line
+    models.PendingUntappdLookup.queue(
+        [
+            beer["id"]
+            for beer in beers
+            if beer["untappd_metadata"] is None and beer["untappd_url"]
+        ],
+        models.PendingUntappdLookup.PRIORITY_VIEWED,
+    )
+
+
+@cache
+def get_fast_beer_serializer() -> FastBeerSerializer:
+    # built on first use, since it inspects serializers from other apps
+    return FastBeerSerializer()
@@ -4,9 +4,9 @@ from django_filters.rest_framework import (
     CharFilter,
     BooleanFilter,
 )
-from django.db.models import Q, F
+from django.db.models import F
 
-from . import models
+from . import models, search
 
 DEFAULT_NUMERIC_FILTER_OPERATORS = [
     "exact",
@@ -63,40 +63,16 @@ class BeerFilterSet(FilterSet):
     on_tap = BooleanFilter(method="filter_on_tap")
 
     def filter_search(self, queryset, name, value):
-        base_cond = Q()
         # what I want to search for:
         # each word (split by whitespace) is included in at least
-        # one of the below six fields,
+        # one of the beer's, manufacturer's, or style's names,
         # so you can search for "straight monkey" to get monkeynaut
-        # or "belgi ipa ommeg" to get all Ommegang Belgian IPAs
-        for word in value.split():
-            base_cond &= (
-                Q(
-                    name__icontains=word,
-                )
-                | Q(
-                    alternate_names__contains=[word],
-                )
-                | Q(
-                    manufacturer__name__icontains=word,
-                )
-                | Q(
-                    # the field is case-insensitive, so no need for icontains
-                    style__name=word,
-                )
-                | Q(
-                    # the field is case-insensitive, so no need for icontains
-                    style__alternate_names__contains=[word],
-                )
-                | Q(
-                    manufacturer__alternate_names__contains=[word],
-                )
-            )
-        queryset = queryset.filter(base_cond).distinct()
-        return queryset
+        # or "belgi ipa ommeg" to get all Ommegang Belgian IPAs.
+        # Unless another ordering was asked for, the best matches come first.
+        return search.search(queryset, value, rank="o" not in self.data)
 
     def filter_on_tap(self, queryset, name, value):
-        return queryset.filter(taps__isnull=not value).distinct()
+        return queryset.filter(is_on_tap=value)
 
     class Meta:
         fields = {
@@ -0,0 +1,59 @@
+"""Time the API's hot paths at several multiples of today's data size
+
+Needs an empty database (a local Postgres, ideally). The synthetic data
+for each scale is rolled back when it's done, so the database is left as
+empty as it was found. The results are written as JSON, to compare with
+runs from other commits.
+"""
+from argparse import FileType
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hsv_dot_beer import benchmarks
+from beers.models import Beer, Manufacturer
+from venues.models import Venue
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the hot API endpoints against synthetic data"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales",
+            default="1,10,100",
+            help="Comma-separated multiples of today's data size to run at",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=5,
+            help="How many times to time each endpoint",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output",
+            type=FileType("w"),
+            default=sys.stdout,
+            help="Where to write the results (standard output by default)",
+        )
+
+    def handle(self, *args, **options):
+        if any(model.objects.exists() for model in (Venue, Manufacturer, Beer)):
+            raise CommandError("Benchmarks need an empty database")
+        try:
+            factors = [float(factor) for factor in options["scales"].split(",")]
+        except ValueError as exc:
+            raise CommandError(f"Invalid scales: {options['scales']}") from exc
+        try:
+            results = benchmarks.run(
+                factors,
+                runs=options["runs"],
+                seed=options["seed"],
+                log=self.stderr.write,
+            )
+        except benchmarks.BenchmarkError as exc:
+            raise CommandError(str(exc)) from exc
+        json.dump(results, options["output"], indent=2)
+        options["output"].write("\n")
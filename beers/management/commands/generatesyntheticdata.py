@@ -0,0 +1,41 @@
+"""Fill an empty database with realistic fake data
+
+Handy for trying things out (or timing them) at a size the test fixtures
+don't come close to. --scale multiplies the number of venues,
+manufacturers, and beers hsv.beer has today.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from hsv_dot_beer import synthetic_data
+from beers.models import Beer, Manufacturer
+from venues.models import Venue
+
+
+class Command(BaseCommand):
+    help = "Generates synthetic venues, beers, taps, prices, and events"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1,
+            help="How many times today's data size to generate",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed; the same seed always makes the same data",
+        )
+
+    def handle(self, *args, **options):
+        if any(model.objects.exists() for model in (Venue, Manufacturer, Beer)):
+            raise CommandError("Synthetic data can only be added to an empty database")
+        scale = synthetic_data.TODAY.times(options["scale"])
+        self.stdout.write(f"Generating {scale}")
+        with transaction.atomic():
+            counts = synthetic_data.generate(scale, options["seed"])
+        for name, count in counts.items():
+            self.stdout.write(f"{count} {name}")
+        self.stdout.write(self.style.SUCCESS("Done!"))
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.6 on 2026-10-17 08:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("beers", "0039_alter_manufacturer_location"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PendingUntappdLookup",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("priority", models.PositiveSmallIntegerField(default=0)),
+                ("queued_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "beer",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pending_untappd_lookup",
+                        to="beers.beer",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.6 on 2026-10-17 08:41
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("beers", "0040_pendinguntappdlookup"),
+        ("taps", "0007_auto_20200124_2059"),
+    ]
+
+    def fill_tap_summaries(apps, schema_editor):
+        beer_model = apps.get_model("beers.Beer")
+        tap_model = apps.get_model("taps.Tap")
+        taps = (
+            tap_model.objects.filter(beer=models.OuterRef("pk"))
+            .order_by()
+            .values("beer")
+        )
+        beer_model.objects.filter(
+            id__in=tap_model.objects.values("beer"),
+        ).update(
+            taps_count=Coalesce(
+                models.Subquery(
+                    taps.annotate(count=models.Count("id")).values("count")
+                ),
+                0,
+            ),
+            venues_count=Coalesce(
+                models.Subquery(
+                    taps.annotate(
+                        count=models.Count("venue", distinct=True),
+                    ).values("count")
+                ),
+                0,
+            ),
+            most_recently_added=models.Subquery(
+                taps.annotate(latest=models.Max("time_added")).values("latest")
+            ),
+            is_on_tap=True,
+        )
+
+    operations = [
+        migrations.AddField(
+            model_name="beer",
+            name="is_on_tap",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name="beer",
+            name="most_recently_added",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="beer",
+            name="taps_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="beer",
+            name="venues_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="beer",
+            index=models.Index(
+                fields=["is_on_tap", "-most_recently_added"],
+                name="beers_beer_is_on_t_71e244_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="beer",
+            index=models.Index(
+                fields=["-taps_count"], name="beers_beer_taps_co_713ac2_idx"
+            ),
+        ),
+        migrations.RunPython(
+            fill_tap_summaries,
+            migrations.RunPython.noop,
+        ),
+    ]
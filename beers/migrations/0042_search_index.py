@@ -0,0 +1,108 @@
+# Generated by Django 4.2.6 on 2026-10-17 08:48
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("beers", "0041_beer_tap_summaries"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="beer",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="beer",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+        # the same as beers.search.refresh_search_index()
+        migrations.RunSQL(
+            """
+            WITH names AS (
+                SELECT
+                    beer.id,
+                    beer.name || ' ' || array_to_string(beer.alternate_names, ' ')
+                        AS beer_names,
+                    coalesce(
+                        mfg.name || ' ' || array_to_string(mfg.alternate_names, ' '),
+                        ''
+                    ) AS mfg_names,
+                    coalesce(
+                        style.name || ' ' || array_to_string(style.alternate_names, ' '),
+                        ''
+                    ) AS style_names
+                FROM beers_beer beer
+                LEFT JOIN beers_manufacturer mfg ON mfg.id = beer.manufacturer_id
+                LEFT JOIN beers_style style ON style.id = beer.style_id
+            )
+            UPDATE beers_beer
+            SET
+                search_text = lower(
+                    names.beer_names || ' ' || names.mfg_names || ' '
+                    || names.style_names
+                ),
+                search_vector = (
+                    setweight(to_tsvector('simple', names.beer_names), 'A')
+                    || setweight(to_tsvector('simple', names.mfg_names), 'B')
+                    || setweight(to_tsvector('simple', names.style_names), 'C')
+                )
+            FROM names
+            WHERE names.id = beers_beer.id
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name="beer",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_text"],
+                name="beer_search_text_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="beer",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="beer_search_vector"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="manufacturer",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast(
+                            "name", models.TextField()
+                        )
+                    ),
+                    name="gin_trgm_ops",
+                ),
+                name="mfg_name_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="style",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast(
+                            "name", models.TextField()
+                        )
+                    ),
+                    name="gin_trgm_ops",
+                ),
+                name="style_name_trgm",
+            ),
+        ),
+    ]
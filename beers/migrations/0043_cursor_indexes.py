@@ -0,0 +1,16 @@
+# Generated by Django 4.2.6 on 2026-10-17 08:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("beers", "0042_search_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="beer",
+            index=models.Index(fields=["name", "id"], name="beer_name_id"),
+        ),
+    ]
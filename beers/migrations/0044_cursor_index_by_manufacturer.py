@@ -0,0 +1,22 @@
+# Generated by Django 4.2.6 on 2026-10-17 10:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("beers", "0043_cursor_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="beer",
+            name="beer_name_id",
+        ),
+        migrations.AddIndex(
+            model_name="beer",
+            index=models.Index(
+                fields=["manufacturer", "name", "id"], name="beer_manufacturer_name_id"
+            ),
+        ),
+    ]
@@ -2,10 +2,13 @@ import logging
 from typing import Iterable
 
 from django.contrib.postgres.fields import CITextField, ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models, transaction
 from django.db.utils import IntegrityError
 from django.utils.timezone import now
 from django.db.models import JSONField
+from django.db.models.functions import Cast, Coalesce, Upper
 
 from taps.models import Tap
 from .utils import render_srm
@@ -23,6 +26,15 @@ class Style(models.Model):
     )
     alternate_names = ArrayField(CITextField(), default=list)
 
+    class Meta:
+        indexes = [
+            # backs name__icontains, which compares UPPER(name::text)
+            GinIndex(
+                OpClass(Upper(Cast("name", models.TextField())), name="gin_trgm_ops"),
+                name="style_name_trgm",
+            ),
+        ]
+
     def merge_from(self, other_styles: Iterable["Style"]):
         with transaction.atomic():
             for style in other_styles:
@@ -66,6 +78,13 @@ class Manufacturer(models.Model):
     alternate_names = ArrayField(CITextField(), default=list)
 
     class Meta:
+        indexes = [
+            # backs name__icontains, which compares UPPER(name::text)
+            GinIndex(
+                OpClass(Upper(Cast("name", models.TextField())), name="gin_trgm_ops"),
+                name="mfg_name_trgm",
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(fields=["name"], name="unique_mfg_name"),
             models.UniqueConstraint(
@@ -206,10 +225,31 @@ class Beer(models.Model):
     tweeted_about = models.BooleanField(default=False)
     beermenus_slug = models.CharField(max_length=250, blank=True, null=True)
     alternate_names = ArrayField(CITextField(), default=list)
+    # summaries of the beer's taps, kept up to date by refresh_tap_summaries()
+    taps_count = models.PositiveIntegerField(default=0, editable=False)
+    venues_count = models.PositiveIntegerField(default=0, editable=False)
+    most_recently_added = models.DateTimeField(blank=True, null=True, editable=False)
+    is_on_tap = models.BooleanField(default=False, editable=False)
+    # maintained by beers.search
+    search_text = models.TextField(blank=True, default="", editable=False)
+    search_vector = SearchVectorField(blank=True, null=True, editable=False)
 
     class Meta:
         indexes = [
             models.Index(fields=["tweeted_about"]),
+            models.Index(fields=["is_on_tap", "-most_recently_added"]),
+            models.Index(fields=["-taps_count"]),
+            GinIndex(
+                fields=["search_text"],
+                opclasses=["gin_trgm_ops"],
+                name="beer_search_text_trgm",
+            ),
+            GinIndex(fields=["search_vector"], name="beer_search_vector"),
+            # backs BeerViewSet.cursor_ordering: manufacturer names are
+            # unique, so it's their beers in (name, id) order, one after another
+            models.Index(
+                fields=["manufacturer", "name", "id"], name="beer_manufacturer_name_id"
+            ),
         ]
         constraints = [
             models.CheckConstraint(
@@ -288,6 +328,40 @@ class Beer(models.Model):
             return self.color_html
         return render_srm(self.color_srm)
 
+    @classmethod
+    def refresh_tap_summaries(cls, beer_ids: Iterable[int]) -> int:
+        """Recompute the tap summary columns of the given beers
+
+        Anything that adds, removes, or moves a tap (or changes when it was
+        added) needs to call this for the beers on both sides of the change,
+        once it's done saving. Tap.refresh_beer_summaries() works that out
+        from the taps themselves.
+        """
+        beer_ids = set(beer_ids) - {None}
+        if not beer_ids:
+            return 0
+        taps = Tap.objects.filter(beer=models.OuterRef("pk")).order_by().values("beer")
+        return cls.objects.filter(id__in=beer_ids).update(
+            taps_count=Coalesce(
+                models.Subquery(
+                    taps.annotate(count=models.Count("id")).values("count")
+                ),
+                0,
+            ),
+            venues_count=Coalesce(
+                models.Subquery(
+                    taps.annotate(
+                        count=models.Count("venue", distinct=True),
+                    ).values("count")
+                ),
+                0,
+            ),
+            most_recently_added=models.Subquery(
+                taps.annotate(latest=models.Max("time_added")).values("latest")
+            ),
+            is_on_tap=models.Exists(taps),
+        )
+
     def merge_from(self, other: "Beer"):
         LOG.info("merging %s into %s", other, self)
         with transaction.atomic():
@@ -345,6 +419,7 @@ class Beer(models.Model):
                     self.time_first_seen = other.time_first_seen
             other.delete()
             self.save()
+            Beer.refresh_tap_summaries([self.id])
 
 
 class ServingSize(models.Model):
@@ -400,3 +475,41 @@ class UntappdMetadata(models.Model):
         models.CASCADE,
         related_name="untappd_metadata",
     )
+
+
+class PendingUntappdLookup(models.Model):
+    """A beer waiting for its Untappd metadata to be refreshed
+
+    There's only ever one row per beer, no matter how many times it's asked
+    for. drain_untappd_lookups works through them, highest priority first.
+    """
+
+    PRIORITY_POLL = 0
+    # someone's looking at the beer right now
+    PRIORITY_VIEWED = 10
+
+    beer = models.OneToOneField(
+        Beer,
+        models.CASCADE,
+        related_name="pending_untappd_lookup",
+    )
+    priority = models.PositiveSmallIntegerField(default=PRIORITY_POLL)
+    queued_at = models.DateTimeField(default=now)
+
+    def __str__(self):
+        return f"Untappd lookup for {self.beer_id} (priority {self.priority})"
+
+    @classmethod
+    def queue(cls, beer_ids: Iterable[int], priority: int = PRIORITY_POLL) -> None:
+        """Queue lookups, bumping the priority of any that are already queued"""
+        beer_ids = list(beer_ids)
+        if not beer_ids:
+            return
+        cls.objects.bulk_create(
+            [cls(beer_id=beer_id, priority=priority) for beer_id in beer_ids],
+            ignore_conflicts=True,
+        )
+        if priority > cls.PRIORITY_POLL:
+            cls.objects.filter(beer_id__in=beer_ids, priority__lt=priority).update(
+                priority=priority
+            )
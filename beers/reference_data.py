@@ -0,0 +1,112 @@
+"""Process-wide cache of the small reference tables: serving sizes and styles
+
+Tap list providers look these up for nearly every beer, but they hardly ever
+change. Each process keeps its own copy of each table, along with a version
+number that lives in the Django cache (Redis in production). Saving or
+deleting a row bumps the version, which makes every process reload the table
+the next time it's read. (Like any signal handler, this misses bulk_create()
+and QuerySet.update().)
+
+A copy loaded inside a transaction might include rows that get rolled back,
+so it's only used by that transaction until it commits.
+
+The instances handed out are shared, so treat them as read-only.
+"""
+from dataclasses import dataclass
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import post_delete, post_save
+
+from .models import ServingSize, Style
+
+LOG = logging.getLogger(__name__)
+
+
+class CommitToken:
+    """Registered with on_commit() to tell when a transaction is done"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.committed = False
+
+    def __call__(self):
+        self.committed = True
+
+    def is_valid(self):
+        if self.committed:
+            return True
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection is not self.connection:
+            # another thread can't see what this one hasn't committed
+            return False
+        # Django drops the callbacks for anything that gets rolled back
+        return any(callback[1] is self for callback in connection.run_on_commit)
+
+
+@dataclass
+class CachedTable:
+    version: int
+    rows: list
+    token: CommitToken | None = None
+
+
+class ReferenceTable:
+    def __init__(self, model):
+        self.model = model
+        self.version_key = f"reference-data:{model._meta.label_lower}:version"
+        self.lock = threading.Lock()
+        self.table = None
+
+    def get_version(self):
+        return cache.get_or_set(self.version_key, time.time_ns, timeout=None)
+
+    def invalidate(self):
+        self.table = None
+        cache.set(self.version_key, time.time_ns(), timeout=None)
+
+    def all(self) -> list:
+        """Every row in the table"""
+        version = self.get_version()
+        table = self.table
+        if table and table.version == version:
+            if table.token is None or table.token.is_valid():
+                return table.rows
+        rows = list(self.model.objects.all())
+        LOG.debug("Loaded %s %s rows", len(rows), self.model.__name__)
+        token = None
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.in_atomic_block:
+            token = CommitToken(connection)
+            transaction.on_commit(token)
+        with self.lock:
+            self.table = CachedTable(version, rows, token)
+        return rows
+
+
+serving_sizes = ReferenceTable(ServingSize)
+styles = ReferenceTable(Style)
+TABLES = {table.model: table for table in (serving_sizes, styles)}
+
+
+def serving_sizes_by_volume() -> dict:
+    """Map volume in ounces to serving size"""
+    return {
+        serving_size.volume_oz: serving_size for serving_size in serving_sizes.all()
+    }
+
+
+def invalidate_reference_data(sender, **kwargs):
+    table = TABLES[sender]
+    table.invalidate()
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        # other processes may have reloaded before this was committed
+        transaction.on_commit(table.invalidate)
+
+
+for model in TABLES:
+    post_save.connect(invalidate_reference_data, sender=model)
+    post_delete.connect(invalidate_reference_data, sender=model)
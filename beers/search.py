@@ -0,0 +1,133 @@
+"""Search index for beers
+
+Every beer carries two search columns built from its name and alternate
+names plus its manufacturer's and its style's:
+
+- search_text: all of them lowercased and run together, for substring
+  matching through a pg_trgm GIN index
+- search_vector: a weighted tsvector (the beer's names rank above its
+  manufacturer's, which rank above its style's) for ordering the matches
+
+Since they span three tables they can't be generated columns. Saving a beer,
+manufacturer or style refreshes the affected rows; like any signal handler,
+that misses bulk_create() and QuerySet.update(), so call
+refresh_search_index() after those.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import models
+from django.db.models.functions import Coalesce, Concat, Lower
+from django.db.models.signals import post_save
+
+from .models import Beer, Manufacturer, Style
+
+# no stemming or stop words; beer names aren't English prose
+SEARCH_CONFIG = "simple"
+# the fields that feed into the index
+INDEXED_FIELDS = {
+    Beer: frozenset(["name", "alternate_names", "manufacturer", "style"]),
+    Manufacturer: frozenset(["name", "alternate_names"]),
+    Style: frozenset(["name", "alternate_names"]),
+}
+WORD_REGEX = re.compile(r"[^\W_]+")
+
+
+class ArrayToString(models.Func):
+    function = "array_to_string"
+    output_field = models.TextField()
+
+
+def names() -> Concat:
+    """A row's name followed by its alternate names"""
+    return Concat(
+        "name",
+        models.Value(" "),
+        ArrayToString("alternate_names", models.Value(" ")),
+        output_field=models.TextField(),
+    )
+
+
+def related_names(model, field_name: str) -> Coalesce:
+    return Coalesce(
+        models.Subquery(
+            model.objects.filter(pk=models.OuterRef(field_name)).values(
+                text=names(),
+            )
+        ),
+        models.Value(""),
+        output_field=models.TextField(),
+    )
+
+
+def refresh_search_index(beers: models.QuerySet) -> int:
+    """Rebuild the search columns of the given beers"""
+    return beers.update(
+        search_text=Lower(
+            Concat(
+                names(),
+                models.Value(" "),
+                related_names(Manufacturer, "manufacturer_id"),
+                models.Value(" "),
+                related_names(Style, "style_id"),
+                output_field=models.TextField(),
+            )
+        ),
+        search_vector=(
+            SearchVector(names(), weight="A", config=SEARCH_CONFIG)
+            + SearchVector(
+                related_names(Manufacturer, "manufacturer_id"),
+                weight="B",
+                config=SEARCH_CONFIG,
+            )
+            + SearchVector(
+                related_names(Style, "style_id"),
+                weight="C",
+                config=SEARCH_CONFIG,
+            )
+        ),
+    )
+
+
+def search(queryset: models.QuerySet, value: str, rank: bool = True):
+    """Filter beers to those matching every word of value
+
+    Each word only has to appear somewhere in the beer's names or its
+    manufacturer's or style's, so "straight monk" finds Monkeynaut (from
+    Straight to Ale). If rank is set, the results are annotated with
+    search_rank and put in order of it.
+    """
+    words = value.lower().split()
+    for word in words:
+        queryset = queryset.filter(search_text__contains=word)
+    # match the words as prefixes for ranking, since they're often partial
+    prefixes = " & ".join(f"{word}:*" for word in WORD_REGEX.findall(value.lower()))
+    if not rank:
+        return queryset
+    if prefixes:
+        search_rank = SearchRank(
+            models.F("search_vector"),
+            SearchQuery(prefixes, search_type="raw", config=SEARCH_CONFIG),
+        )
+    else:
+        # nothing rankable, like a search for punctuation
+        search_rank = models.Value(0.0, output_field=models.FloatField())
+    return queryset.annotate(search_rank=search_rank).order_by(
+        "-search_rank", *queryset.query.order_by
+    )
+
+
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not INDEXED_FIELDS[sender] & set(update_fields):
+        return
+    if sender is Beer:
+        beers = Beer.objects.filter(id=instance.id)
+    elif sender is Manufacturer:
+        beers = Beer.objects.filter(manufacturer=instance)
+    else:
+        beers = Beer.objects.filter(style=instance)
+    refresh_search_index(beers)
+
+
+for model in INDEXED_FIELDS:
+    post_save.connect(update_search_index, sender=model)
@@ -3,8 +3,8 @@ import logging
 
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
-from kombu.exceptions import OperationalError
 
+from hsv_dot_beer.sparse_fields import SparseFieldsMixin
 from . import models
 
 
@@ -17,6 +17,12 @@ class UntappdMetadataSerializer(serializers.ModelSerializer):
         exclude = ("beer", "id")
 
 
+class CompactUntappdMetadataSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.UntappdMetadata
+        fields = ("timestamp",)
+
+
 class StyleSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Style
@@ -29,6 +35,18 @@ class ManufacturerSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class CompactStyleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.Style
+        fields = ("id", "name")
+
+
+class CompactManufacturerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.Manufacturer
+        fields = ("id", "name")
+
+
 class ServingSizeSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.ServingSize
@@ -46,7 +64,40 @@ class BeerPriceSerializer(serializers.ModelSerializer):
         exclude = ["id", "beer"]
 
 
-class BeerSerializer(serializers.ModelSerializer):
+class CompactBeerPriceSerializer(serializers.ModelSerializer):
+    venue = serializers.StringRelatedField()
+    serving_size = serializers.StringRelatedField()
+
+    class Meta:
+        model = models.BeerPrice
+        fields = ["venue", "serving_size", "price"]
+
+
+class BeerListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # queue the lookups for the whole list at once instead of per beer
+        self.child.pending_lookups = []
+        try:
+            return super().to_representation(data)
+        finally:
+            beer_ids, self.child.pending_lookups = self.child.pending_lookups, None
+            models.PendingUntappdLookup.queue(
+                beer_ids, models.PendingUntappdLookup.PRIORITY_VIEWED
+            )
+
+
+class BeerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # the beers BeerListSerializer is going to queue lookups for
+    pending_lookups = None
+    compact_fields = {
+        "manufacturer": lambda: CompactManufacturerSerializer(read_only=True),
+        "style": lambda: CompactStyleSerializer(read_only=True),
+        "venues": lambda: serializers.SerializerMethodField("get_compact_venues"),
+        "prices": lambda: CompactBeerPriceSerializer(many=True, read_only=True),
+        "untappd_metadata": lambda: serializers.SerializerMethodField(
+            "get_compact_untappd_metadata"
+        ),
+    }
     manufacturer = ManufacturerSerializer(read_only=True)
     manufacturer_id = serializers.PrimaryKeyRelatedField(
         write_only=True,
@@ -80,18 +131,23 @@ class BeerSerializer(serializers.ModelSerializer):
     def get_color_srm_html(self, obj):
         return obj.render_srm()
 
-    def get_venues(self, obj):
+    def get_venues(self, obj, serializer_class=None):
         from venues.serializers import VenueSerializer
 
         taps = list(obj.taps.all())
         if not taps:
             return []
         venues = {i.venue for i in taps}
-        return VenueSerializer(
+        return (serializer_class or VenueSerializer)(
             instance=list(sorted(venues, key=lambda v: v.name)),
             many=True,
         ).data
 
+    def get_compact_venues(self, obj):
+        from venues.serializers import CompactVenueSerializer
+
+        return self.get_venues(obj, CompactVenueSerializer)
+
     def validate(self, data):
         try:
             data["manufacturer"] = data.pop("manufacturer_id")
@@ -104,30 +160,28 @@ class BeerSerializer(serializers.ModelSerializer):
             pass
         return data
 
-    def get_untappd_metadata(self, obj):
-        from beers.tasks import look_up_beer
-
+    def get_untappd_metadata(self, obj, serializer_class=UntappdMetadataSerializer):
         try:
             untappd_metadata = obj.untappd_metadata
         except models.UntappdMetadata.DoesNotExist:
             if obj.untappd_url:
-                try:
-                    # if it has an untappd URL, queue a lookup for the next in line
-                    look_up_beer.delay(obj.id)
-                except OperationalError as exc:
-                    if (
-                        str(exc).casefold()
-                        == "max number of clients reached".casefold()
-                    ):
-                        LOG.error("Reached redis limit!")
-                    else:
-                        raise
+                # someone wants to see it, so move it to the front of the line
+                if self.pending_lookups is not None:
+                    self.pending_lookups.append(obj.id)
+                else:
+                    models.PendingUntappdLookup.queue(
+                        [obj.id], models.PendingUntappdLookup.PRIORITY_VIEWED
+                    )
             return None
-        return UntappdMetadataSerializer(instance=untappd_metadata).data
+        return serializer_class(instance=untappd_metadata).data
+
+    def get_compact_untappd_metadata(self, obj):
+        return self.get_untappd_metadata(obj, CompactUntappdMetadataSerializer)
 
     class Meta:
         model = models.Beer
-        exclude = ("api_vendor_style", "color_html")
+        list_serializer_class = BeerListSerializer
+        exclude = ("api_vendor_style", "color_html", "search_text", "search_vector")
         validators = [
             UniqueTogetherValidator(
                 fields=["name", "manufacturer_id"],
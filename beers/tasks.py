@@ -8,6 +8,7 @@ from json import JSONDecodeError
 from dateutil.parser import parse
 import requests
 from requests.exceptions import RequestException
+from django.conf import settings
 from django.db.models import F
 from django.utils.timezone import now
 from django.db import transaction
@@ -20,6 +21,7 @@ from tap_list_providers.models import APIRateLimitTimestamp
 from beers.models import (
     Beer,
     Manufacturer,
+    PendingUntappdLookup,
     UntappdMetadata,
     BeerPrice,
 )
@@ -29,55 +31,48 @@ IS_LOCAL = os.environ.get("DJANGO_CONFIGURATION", "") == "Local"
 LOG = logging.getLogger(__name__)
 
 
+# how long to go before looking a beer up again
+FRESHNESS = datetime.timedelta(minutes=360)
+
+
 class UnexpectedResponseError(Exception):
     """Received an unexpected response from Untappd"""
 
 
-@shared_task(
-    bind=True,
-    autoretry_for=(RequestException, UnexpectedResponseError, JSONDecodeError),
-    default_retry_delay=600,
-)
-def look_up_beer(self, beer_pk):
-    LOG.debug("Looking up Untappd data for %s", beer_pk)
-    try:
-        beer = (
-            Beer.objects.filter(
-                id=beer_pk,
-            )
-            .select_related("untappd_metadata")
-            .get()
-        )
-    except Beer.DoesNotExist as exc:
-        LOG.error("Beer ID %s not found!", beer_pk)
-        raise self.retry(countdown=30, exc=exc)
+class UntappdRateLimitedError(Exception):
+    """Untappd says we've used up our API calls for now"""
+
+    def __init__(self, expires):
+        super().__init__(f"Rate limited by Untappd until {expires}")
+        self.expires = expires
+
+
+def is_fresh(beer: Beer) -> bool:
+    """Was the beer's Untappd metadata updated recently enough to skip it?"""
     try:
         untappd_metadata = beer.untappd_metadata
     except UntappdMetadata.DoesNotExist:
-        # not updated recently; don't care
-        pass
-    else:
-        if now() - untappd_metadata.timestamp <= datetime.timedelta(minutes=360):
-            LOG.debug("skipping recently updated data for %s", beer)
-            return
+        return False
+    return now() - untappd_metadata.timestamp <= FRESHNESS
+
+
+def get_rate_limit_timestamp():
+    """Get the current rate limit, clearing it out if it's expired"""
     try:
         rate_limit_timestamp = APIRateLimitTimestamp.objects.get(api_type="untappd")
     except APIRateLimitTimestamp.DoesNotExist:
-        rate_limit_timestamp = None
-    else:
-        if rate_limit_timestamp.rate_limit_expires_at >= now():
-            LOG.info(
-                "Currently rate-limited! Rate limit expires at %s",
-                rate_limit_timestamp.rate_limit_expires_at,
-            )
-            jitter = random.SystemRandom().randint(0, 30)
-            countdown = rate_limit_timestamp.rate_limit_expires_at - now()
-            raise self.retry(countdown=countdown.seconds + jitter)
-        rate_limit_timestamp.delete()
-    LOG.debug("Looking up Untappd data for %s", beer)
-    if not beer.untappd_url:
-        LOG.error("Beer %s (PK %s) not linked to Untappd", beer, beer_pk)
-        return False
+        return None
+    if rate_limit_timestamp.rate_limit_expires_at >= now():
+        return rate_limit_timestamp
+    rate_limit_timestamp.delete()
+    return None
+
+
+def get_untappd_credentials():
+    """Get the query params for authenticating with Untappd
+
+    Returns None if they aren't set when running locally.
+    """
     untappd_args = {}
     try:
         untappd_args["client_id"] = os.environ["UNTAPPD_CLIENT_ID"]
@@ -88,10 +83,37 @@ def look_up_beer(self, beer_pk):
         except KeyError:
             if IS_LOCAL:
                 LOG.warning("Untappd API credentials not specified. Quitting.")
-                return
+                return None
             raise ValueError(
                 "You must specify environment variables for Untappd API Access!"
             ) from exc
+    return untappd_args
+
+
+def record_rate_limit(expires, rate_limit_timestamp=None):
+    if rate_limit_timestamp:
+        rate_limit_timestamp.rate_limit_expires_at = expires
+        rate_limit_timestamp.save()
+        return
+    # do an update or create to attempt to minimize transaction
+    # issues
+    try:
+        with transaction.atomic():
+            APIRateLimitTimestamp.objects.update_or_create(
+                api_type="untappd", defaults={"rate_limit_expires_at": expires}
+            )
+    except IntegrityError:
+        # well that didn't work. This must happen if we've got another
+        # rate limit situation going on, so assume that one passed
+        pass
+
+
+def fetch_untappd_metadata(beer: Beer, untappd_args: dict, rate_limit_timestamp=None):
+    """Fetch the beer from the Untappd API and save it
+
+    Raises UntappdRateLimitedError if we've been rate limited, after
+    recording when the limit expires.
+    """
     untappd_pk = beer.untappd_url.rsplit("/", 1)[-1]
     untappd_url = f"https://api.untappd.com/v4/beer/info/{untappd_pk}"
     result = requests.get(untappd_url, params=untappd_args)
@@ -103,31 +125,10 @@ def look_up_beer(self, beer_pk):
                 "Got 429 from Untappd without expiration! headers %s",
                 result.headers,
             )
-            return None
+            return
         LOG.warning("Hit Untappd API rate limit! Limit opens up at %s", expires)
-        # retry in 1 hour
-        if rate_limit_timestamp:
-            rate_limit_timestamp.rate_limit_expires_at = expires
-            rate_limit_timestamp.save()
-        else:
-            # do an update or create to attempt to minimize transaction
-            # issues
-            try:
-                with transaction.atomic():
-                    APIRateLimitTimestamp.objects.update_or_create(
-                        api_type="untappd", defaults={"rate_limit_expires_at": expires}
-                    )
-            except IntegrityError:
-                # well that didn't work. This must happen if we've got another
-                # rate limit situation going on, so assume that one passed
-                pass
-        jitter = random.SystemRandom().randint(0, 30)
-        countdown = expires - now()
-        try:
-            raise self.retry(countdown=countdown.seconds + jitter)
-        except MaxRetriesExceededError:
-            LOG.warning("Ran out of retries. We must be hurting.")
-            return None
+        record_rate_limit(expires, rate_limit_timestamp)
+        raise UntappdRateLimitedError(expires)
 
     # retry sooner for all other status codes
     result.raise_for_status()
@@ -163,6 +164,107 @@ def look_up_beer(self, beer_pk):
         beer.save()
 
 
+@shared_task(
+    bind=True,
+    autoretry_for=(RequestException, UnexpectedResponseError, JSONDecodeError),
+    default_retry_delay=600,
+)
+def look_up_beer(self, beer_pk):
+    LOG.debug("Looking up Untappd data for %s", beer_pk)
+    try:
+        beer = (
+            Beer.objects.filter(
+                id=beer_pk,
+            )
+            .select_related("untappd_metadata")
+            .get()
+        )
+    except Beer.DoesNotExist as exc:
+        LOG.error("Beer ID %s not found!", beer_pk)
+        raise self.retry(countdown=30, exc=exc)
+    if is_fresh(beer):
+        LOG.debug("skipping recently updated data for %s", beer)
+        return
+    rate_limit_timestamp = get_rate_limit_timestamp()
+    if rate_limit_timestamp:
+        LOG.info(
+            "Currently rate-limited! Rate limit expires at %s",
+            rate_limit_timestamp.rate_limit_expires_at,
+        )
+        jitter = random.SystemRandom().randint(0, 30)
+        countdown = rate_limit_timestamp.rate_limit_expires_at - now()
+        raise self.retry(countdown=countdown.seconds + jitter)
+    LOG.debug("Looking up Untappd data for %s", beer)
+    if not beer.untappd_url:
+        LOG.error("Beer %s (PK %s) not linked to Untappd", beer, beer_pk)
+        return False
+    untappd_args = get_untappd_credentials()
+    if untappd_args is None:
+        return
+    try:
+        fetch_untappd_metadata(beer, untappd_args)
+    except UntappdRateLimitedError as exc:
+        # retry in 1 hour
+        jitter = random.SystemRandom().randint(0, 30)
+        countdown = exc.expires - now()
+        try:
+            raise self.retry(countdown=countdown.seconds + jitter)
+        except MaxRetriesExceededError:
+            LOG.warning("Ran out of retries. We must be hurting.")
+            return None
+
+
+@shared_task
+def drain_untappd_lookups():
+    """Spend what's left of the hour's Untappd budget on the queued lookups
+
+    Beers on the most taps go first, after anything someone asked to see.
+    """
+    if get_rate_limit_timestamp():
+        LOG.info("Currently rate-limited by Untappd; not draining the queue")
+        return
+    untappd_args = get_untappd_credentials()
+    if untappd_args is None:
+        return
+    # every lookup refreshes a metadata timestamp, so use those to figure
+    # out how many calls we've made in the last hour
+    used = UntappdMetadata.objects.filter(
+        timestamp__gt=now() - datetime.timedelta(hours=1)
+    ).count()
+    budget = settings.UNTAPPD_HOURLY_BUDGET - used
+    if budget <= 0:
+        LOG.info("Untappd budget used up (%s calls in the last hour)", used)
+        return
+    pending = PendingUntappdLookup.objects.select_related(
+        "beer__untappd_metadata"
+    ).order_by("-priority", "-beer__taps_count", "queued_at")
+    looked_up = 0
+    done = []
+    for lookup in pending.iterator():
+        beer = lookup.beer
+        if not beer.untappd_url or is_fresh(beer):
+            done.append(lookup.id)
+            continue
+        if looked_up >= budget:
+            break
+        looked_up += 1
+        try:
+            fetch_untappd_metadata(beer, untappd_args)
+        except UntappdRateLimitedError:
+            break
+        except (RequestException, UnexpectedResponseError, JSONDecodeError):
+            # leave it for the next run
+            LOG.exception("Unable to look up %s on Untappd", beer)
+            continue
+        done.append(lookup.id)
+    PendingUntappdLookup.objects.filter(id__in=done).delete()
+    LOG.info(
+        "Made %s Untappd lookups, %s left in the queue",
+        looked_up,
+        PendingUntappdLookup.objects.count(),
+    )
+
+
 @shared_task
 def prune_stale_data():
     threshold = now() - datetime.timedelta(days=1)
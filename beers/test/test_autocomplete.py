@@ -0,0 +1,125 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from beers.models import Beer
+from hsv_dot_beer import api_cache
+from hsv_dot_beer.tasks import warm_api_cache
+from taps.test.factories import TapFactory
+from .factories import BeerFactory, ManufacturerFactory, StyleFactory
+
+
+class AutocompleteTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.manufacturer = ManufacturerFactory(
+            name="Straight to Ale", alternate_names=["STA"]
+        )
+        self.other_manufacturer = ManufacturerFactory(name="Straightaway Brewing")
+        self.style = StyleFactory(name="American IPA", alternate_names=["West Coast"])
+        self.beers = [
+            BeerFactory(
+                name="Monkeynaut",
+                manufacturer=self.manufacturer,
+                style=self.style,
+                alternate_names=["Monkey Naut"],
+            ),
+            BeerFactory(name="Laika", manufacturer=self.manufacturer, style=None),
+            BeerFactory(name="Straight Shot", manufacturer=self.other_manufacturer),
+        ]
+        for _ in range(2):
+            TapFactory(beer=self.beers[1])
+        TapFactory(beer=self.beers[2])
+        Beer.refresh_tap_summaries(beer.id for beer in self.beers)
+
+    def autocomplete(self, search):
+        response = self.client.get(f"/api/v1/beers/autocomplete/?search={search}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def beer_names(self, search):
+        return [beer["name"] for beer in self.autocomplete(search)["beers"]]
+
+    def test_shape(self):
+        result = self.autocomplete("monkeyn")
+        self.assertEqual(
+            result,
+            {
+                "beers": [
+                    {
+                        "name": "Monkeynaut",
+                        "taps": 0,
+                        "alternate_names": ["Monkey Naut"],
+                        "manufacturer": "Straight to Ale",
+                    }
+                ],
+                "styles": [],
+                "manufacturers": [],
+            },
+        )
+
+    def test_ranking(self):
+        result = self.autocomplete("straight")
+        # own names first, then by how many taps they're on
+        self.assertEqual(
+            [beer["name"] for beer in result["beers"]],
+            ["Straight Shot", "Laika", "Monkeynaut"],
+        )
+        self.assertEqual(
+            result["manufacturers"],
+            [
+                {
+                    "name": "Straight to Ale",
+                    "beers": 2,
+                    "taps_occupied": 2,
+                    "alternate_names": ["STA"],
+                },
+                {
+                    "name": "Straightaway Brewing",
+                    "beers": 1,
+                    "taps_occupied": 1,
+                    "alternate_names": [],
+                },
+            ],
+        )
+
+    def test_every_word_starts_a_word(self):
+        self.assertEqual(self.beer_names("west sta"), ["Monkeynaut"])
+        self.assertEqual(self.beer_names("naut"), ["Monkeynaut"])
+        self.assertEqual(self.beer_names("aut"), [])
+        self.assertEqual(
+            [style["name"] for style in self.autocomplete("coast")["styles"]],
+            ["American IPA"],
+        )
+
+    def test_in_memory(self):
+        self.autocomplete("monkey")
+        with self.assertNumQueries(0):
+            self.autocomplete("laika")
+
+    def test_rebuilt_after_changes(self):
+        self.autocomplete("monkey")
+        BeerFactory(name="Monkey Wrench")
+        self.assertEqual(len(self.autocomplete("monkey")["beers"]), 1)
+        # beer saves alone don't throw it away
+        api_cache.bump("beers")
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.autocomplete("monkey")["beers"]), 1)
+        api_cache.bump(api_cache.AUTOCOMPLETE)
+        self.assertEqual(len(self.autocomplete("monkey")["beers"]), 2)
+
+    @patch("hsv_dot_beer.tasks.warm_api_cache.delay")
+    def test_rebuilt_after_ingestion(self, warm):
+        self.autocomplete("monkey")
+        BeerFactory(name="Monkey Wrench")
+        with self.captureOnCommitCallbacks(execute=True):
+            api_cache.schedule_warming([self.beers[1].taps.first().venue_id])
+        warm.assert_called_once()
+        warm_api_cache(*warm.call_args.args)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.autocomplete("monkey")["beers"]), 2)
+
+    def test_missing_search(self):
+        response = self.client.get("/api/v1/beers/autocomplete/")
+        self.assertIn("error", response.json())
@@ -0,0 +1,89 @@
+import csv
+from decimal import Decimal
+import io
+import json
+
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from beers.export import iter_taps
+from beers.models import BeerPrice, ServingSize
+from hsv_dot_beer import api_cache
+from taps.test.factories import TapFactory
+from venues.test.factories import VenueFactory
+from .factories import BeerFactory
+
+
+class ExportTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.venues = [VenueFactory(name="a venue"), VenueFactory(name="b venue")]
+        pint = ServingSize.objects.create(name="pint", volume_oz=16)
+        taster = ServingSize.objects.create(name="taster", volume_oz=4)
+        self.beers = [BeerFactory(abv=Decimal("5.5")) for _ in range(3)]
+        for venue in self.venues:
+            for tap_number, beer in enumerate(self.beers, 1):
+                TapFactory(venue=venue, beer=beer, tap_number=tap_number)
+        # empty taps aren't exported
+        TapFactory(venue=self.venues[0], beer=None, tap_number=10)
+        BeerPrice.objects.create(
+            beer=self.beers[0],
+            venue=self.venues[1],
+            serving_size=pint,
+            price=Decimal("6"),
+        )
+        BeerPrice.objects.create(
+            beer=self.beers[0],
+            venue=self.venues[1],
+            serving_size=taster,
+            price=Decimal("2"),
+        )
+
+    def test_ndjson(self):
+        response = self.client.get("/api/v1/beers/export/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("application/x-ndjson"))
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        taps = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [(tap["venue_name"], tap["tap_number"]) for tap in taps],
+            [(venue.name, number) for venue in self.venues for number in (1, 2, 3)],
+        )
+        self.assertEqual(taps[0]["beer_id"], self.beers[0].id)
+        self.assertEqual(taps[0]["abv"], "5.50")
+        self.assertEqual(taps[0]["prices"], [])
+        self.assertEqual(
+            taps[3]["prices"],
+            [
+                {"serving_size": "taster", "volume_oz": "4.0", "price": "2.00"},
+                {"serving_size": "pint", "volume_oz": "16.0", "price": "6.00"},
+            ],
+        )
+
+    def test_csv(self):
+        response = self.client.get("/api/v1/beers/export/?format=csv")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('filename="on-tap.csv"', response["Content-Disposition"])
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[3]["prices"], "taster: 2.00; pint: 6.00")
+        self.assertEqual(rows[3]["beer_name"], self.beers[0].name)
+
+    def test_chunks(self):
+        # prices still line up when they're looked up a few taps at a time
+        taps = list(iter_taps(chunk_size=2))
+        self.assertEqual(len(taps), 6)
+        self.assertEqual(
+            [len(tap["prices"]) for tap in taps],
+            [0, 0, 0, 2, 0, 0],
+        )
+
+    def test_conditional(self):
+        response = self.client.get("/api/v1/beers/export/")
+        etag = response["ETag"]
+        not_modified = self.client.get("/api/v1/beers/export/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        api_cache.bump("beers")
+        modified = self.client.get("/api/v1/beers/export/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(modified.status_code, 200)
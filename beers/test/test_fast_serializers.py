@@ -0,0 +1,119 @@
+from decimal import Decimal
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from rest_framework.test import APITestCase
+
+from beers.fast_serializers import get_fast_beer_serializer
+from beers.models import (
+    Beer,
+    BeerPrice,
+    PendingUntappdLookup,
+    ServingSize,
+    UntappdMetadata,
+)
+from beers.serializers import BeerSerializer
+from beers.views import BeerViewSet
+from hsv_dot_beer.fast_serializers import FastSerializer
+from taps.test.factories import TapFactory
+from venues.test.factories import VenueFactory
+from .factories import BeerFactory
+
+
+def as_json(data):
+    data = json.loads(json.dumps(data, default=str))
+    for beer in data:
+        # neither path promises an order for prices
+        beer["prices"].sort(key=lambda price: json.dumps(price, sort_keys=True))
+    return data
+
+
+class FastBeerSerializerTestCase(TestCase):
+    def setUp(self):
+        venues = [
+            VenueFactory(
+                name="zzz last",
+                country="US",
+                latitude=Decimal("34.7304"),
+                longitude=Decimal("-86.5861"),
+                tap_list_provider="untappd",
+            ),
+            VenueFactory(name="aaa first"),
+        ]
+        pint = ServingSize.objects.create(name="pint", volume_oz=16)
+        growler = ServingSize.objects.create(name="growler", volume_oz=64)
+        # everything filled in
+        full = BeerFactory(
+            abv=Decimal("5.5"),
+            ibu=40,
+            color_html="#abcdef",
+            alternate_names=["other name"],
+            untappd_url="https://untappd.com/b/full/1",
+        )
+        UntappdMetadata.objects.create(beer=full, json_data={"big": "blob"})
+        for venue in venues:
+            TapFactory(beer=full, venue=venue)
+            BeerPrice.objects.create(
+                beer=full, venue=venue, serving_size=pint, price=Decimal("6")
+            )
+        # on twice at the same venue
+        TapFactory(beer=full, venue=venues[0])
+        BeerPrice.objects.create(
+            beer=full, venue=venues[0], serving_size=growler, price=Decimal("20.5")
+        )
+        # as empty as it gets
+        BeerFactory(style=None, color_srm=None)
+        # missing metadata that should get looked up
+        self.unknown = BeerFactory(untappd_url="https://untappd.com/b/unknown/2")
+        Beer.refresh_tap_summaries(Beer.objects.values_list("id", flat=True))
+
+    def test_matches_serializer(self):
+        queryset = BeerViewSet.queryset
+        expected = as_json(BeerSerializer(queryset, many=True).data)
+        fast_serializer = get_fast_beer_serializer()
+        with self.assertNumQueries(5):
+            # beers, taps, prices, and queueing the lookup (insert, update)
+            actual = as_json(fast_serializer.render(fast_serializer.values(queryset)))
+        self.assertEqual(actual, expected)
+        # key order too
+        self.assertEqual(
+            [list(beer) for beer in actual], [list(beer) for beer in expected]
+        )
+
+    def test_queues_lookups(self):
+        PendingUntappdLookup.objects.all().delete()
+        fast_serializer = get_fast_beer_serializer()
+        fast_serializer.render(fast_serializer.values(Beer.objects.all()))
+        self.assertEqual(
+            list(PendingUntappdLookup.objects.values_list("beer_id", "priority")),
+            [(self.unknown.id, PendingUntappdLookup.PRIORITY_VIEWED)],
+        )
+
+    def test_needs_overrides(self):
+        with self.assertRaises(ImproperlyConfigured):
+            FastSerializer(BeerSerializer)
+
+
+class FastBeerViewTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.venue = VenueFactory()
+        self.beer = BeerFactory(abv=Decimal("4.2"))
+        TapFactory(beer=self.beer, venue=self.venue)
+
+    def test_views(self):
+        expected = as_json(
+            BeerSerializer(BeerViewSet.queryset.filter(id=self.beer.id), many=True).data
+        )
+        for url in (
+            "/api/v1/beers/",
+            "/api/v1/beers/?cursor=",
+            f"/api/v1/venues/{self.venue.id}/beers/",
+            f"/api/v1/venues/byslug/{self.venue.slug}/beers/",
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()["results"], expected)
@@ -0,0 +1,54 @@
+from decimal import Decimal
+import threading
+
+from django.db import connection, transaction
+from django.test import TestCase
+
+from beers import reference_data
+from beers.models import ServingSize
+
+from .factories import StyleFactory
+
+
+class ReferenceDataTestCase(TestCase):
+    def setUp(self):
+        self.style = StyleFactory(name="Pilsner")
+
+    def test_repeat_reads_are_cached(self):
+        reference_data.styles.all()
+        with self.assertNumQueries(0):
+            styles = reference_data.styles.all()
+        self.assertIn(self.style, styles)
+
+    def test_saving_invalidates(self):
+        reference_data.serving_sizes.all()
+        serving_size = ServingSize.objects.create(name="Growler", volume_oz=64)
+        self.assertIn(Decimal(64), reference_data.serving_sizes_by_volume())
+        serving_size.delete()
+        self.assertNotIn(Decimal(64), reference_data.serving_sizes_by_volume())
+
+    def test_rolled_back_rows_dropped(self):
+        try:
+            with transaction.atomic():
+                StyleFactory(name="Rolled Back")
+                names = [style.name for style in reference_data.styles.all()]
+                self.assertIn("Rolled Back", names)
+                raise ValueError("roll back")
+        except ValueError:
+            pass
+        names = [style.name for style in reference_data.styles.all()]
+        self.assertNotIn("Rolled Back", names)
+
+    def test_uncommitted_rows_not_shared(self):
+        StyleFactory(name="Uncommitted")
+        reference_data.styles.all()
+        other_thread_rows = []
+
+        def load_rows():
+            other_thread_rows.extend(reference_data.styles.all())
+            connection.close()
+
+        thread = threading.Thread(target=load_rows)
+        thread.start()
+        thread.join()
+        self.assertNotIn("Uncommitted", [style.name for style in other_thread_rows])
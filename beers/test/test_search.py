@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from beers import search
+from beers.models import Beer
+from taps.test.factories import TapFactory
+from .factories import BeerFactory, ManufacturerFactory, StyleFactory
+
+
+class SearchTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.manufacturer = ManufacturerFactory(
+            name="Straight to Ale", alternate_names=["STA"]
+        )
+        self.style = StyleFactory(name="American IPA", alternate_names=["West Coast"])
+        self.beer = BeerFactory(
+            name="Monkeynaut",
+            manufacturer=self.manufacturer,
+            style=self.style,
+            alternate_names=["Monkey Naut"],
+        )
+        # matches "monkey" through its style instead of its name
+        self.other_beer = BeerFactory(
+            name="Laika",
+            style=StyleFactory(name="Monkey Business Ale"),
+        )
+
+    def names(self, value, rank=True):
+        queryset = Beer.objects.order_by("name")
+        return [beer.name for beer in search.search(queryset, value, rank=rank)]
+
+    def test_matches_every_word_anywhere(self):
+        self.assertEqual(self.names("straight monk"), ["Monkeynaut"])
+        self.assertEqual(self.names("WEST sta"), ["Monkeynaut"])
+        self.assertEqual(self.names("naut ommegang"), [])
+
+    def test_rank(self):
+        self.assertEqual(self.names("monkey"), ["Monkeynaut", "Laika"])
+        self.assertEqual(self.names("monkey", rank=False), ["Laika", "Monkeynaut"])
+
+    def test_punctuation(self):
+        self.assertEqual(self.names("-"), [])
+
+    def test_manufacturer_rename(self):
+        self.manufacturer.name = "Yellowhammer"
+        self.manufacturer.save()
+        self.assertEqual(self.names("yellowhammer"), ["Monkeynaut"])
+        self.assertEqual(self.names("straight"), [])
+
+    def test_update_fields_skipped(self):
+        self.manufacturer.name = "Yellowhammer"
+        self.manufacturer.save(update_fields=["location"])
+        self.assertEqual(self.names("straight"), ["Monkeynaut"])
+
+    def test_refresh_after_bulk_create(self):
+        beer = Beer.objects.bulk_create(
+            [
+                BeerFactory.build(
+                    name="Rocket Republic",
+                    manufacturer=self.manufacturer,
+                    style=self.style,
+                )
+            ]
+        )[0]
+        self.assertEqual(self.names("rocket"), [])
+        search.refresh_search_index(Beer.objects.filter(id=beer.id))
+        self.assertEqual(self.names("rocket"), ["Rocket Republic"])
+
+    def test_filter(self):
+        response = self.client.get("/api/v1/beers/?search=monkey")
+        self.assertEqual(
+            [beer["name"] for beer in response.data["results"]],
+            ["Monkeynaut", "Laika"],
+        )
+        response = self.client.get("/api/v1/beers/?search=monkey&o=name")
+        self.assertEqual(
+            [beer["name"] for beer in response.data["results"]],
+            ["Laika", "Monkeynaut"],
+        )
+
+    def test_autocomplete(self):
+        TapFactory(beer=self.other_beer)
+        response = self.client.get("/api/v1/beers/autocomplete/?search=monkey")
+        self.assertEqual(
+            [beer["name"] for beer in response.data["beers"]],
+            ["Monkeynaut", "Laika"],
+        )
+        self.assertEqual(
+            [mfg["name"] for mfg in response.data["manufacturers"]],
+            [],
+        )
+        self.assertEqual(
+            [style["name"] for style in response.data["styles"]],
+            ["Monkey Business Ale"],
+        )
@@ -0,0 +1,108 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from beers.models import (
+    BeerPrice,
+    PendingUntappdLookup,
+    ServingSize,
+    UntappdMetadata,
+)
+from events.test.factories import EventFactory
+from taps.test.factories import TapFactory
+from venues.test.factories import VenueFactory
+from .factories import BeerFactory
+
+
+class SparseFieldsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.venue = VenueFactory()
+        self.beer = BeerFactory(abv=Decimal("5.5"))
+        self.tap = TapFactory(beer=self.beer, venue=self.venue)
+        BeerPrice.objects.create(
+            beer=self.beer,
+            venue=self.venue,
+            serving_size=ServingSize.objects.create(name="pint", volume_oz=16),
+            price=Decimal("6.00"),
+        )
+        UntappdMetadata.objects.create(beer=self.beer, json_data={"big": "blob"})
+
+    def get_beer(self, query=""):
+        response = self.client.get(f"/api/v1/beers/{query}")
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.json()["results"][0]
+
+    def test_lookups_queued_once(self):
+        beers = [
+            BeerFactory(untappd_url=f"https://untappd.com/b/whatever/{i}")
+            for i in range(5)
+        ]
+        with self.assertNumQueries(4):
+            # count, beers, queueing the lookups, bumping their priority
+            self.client.get("/api/v1/beers/?fields=id,untappd_metadata")
+        self.assertEqual(
+            set(
+                PendingUntappdLookup.objects.filter(
+                    priority=PendingUntappdLookup.PRIORITY_VIEWED
+                ).values_list("beer_id", flat=True)
+            ),
+            {beer.id for beer in beers},
+        )
+
+    def test_default_shape(self):
+        beer = self.get_beer()
+        self.assertIn("url", beer["manufacturer"])
+        self.assertIn("time_zone", beer["venues"][0])
+        self.assertEqual(beer["untappd_metadata"]["json_data"], {"big": "blob"})
+        self.assertEqual(beer["prices"][0]["serving_size"]["name"], "pint")
+
+    def test_fields(self):
+        with self.assertNumQueries(2):
+            # count, beers
+            beer = self.get_beer("?fields=id,name,abv")
+        self.assertEqual(
+            beer, {"id": self.beer.id, "name": self.beer.name, "abv": "5.50"}
+        )
+
+    def test_compact(self):
+        beer = self.get_beer(
+            "?fields=manufacturer,style,venues,prices,untappd_metadata"
+        )
+        self.assertEqual(
+            beer["manufacturer"],
+            {"id": self.beer.manufacturer_id, "name": self.beer.manufacturer.name},
+        )
+        self.assertEqual(
+            beer["style"], {"id": self.beer.style_id, "name": self.beer.style.name}
+        )
+        self.assertEqual(
+            beer["venues"],
+            [{"id": self.venue.id, "name": self.venue.name, "slug": self.venue.slug}],
+        )
+        self.assertEqual(
+            beer["prices"],
+            [{"venue": self.venue.name, "serving_size": "pint", "price": "6.00"}],
+        )
+        self.assertEqual(list(beer["untappd_metadata"]), ["timestamp"])
+
+    def test_expand(self):
+        beer = self.get_beer("?expand=manufacturer,untappd_metadata")
+        self.assertIn("url", beer["manufacturer"])
+        self.assertEqual(beer["untappd_metadata"]["json_data"], {"big": "blob"})
+        # everything else is compact
+        self.assertNotIn("time_zone", beer["venues"][0])
+
+    def test_venue_beers(self):
+        response = self.client.get(f"/api/v1/venues/{self.venue.id}/beers/?fields=name")
+        self.assertEqual(response.json()["results"], [{"name": self.beer.name}])
+
+    def test_tap_and_event(self):
+        EventFactory(venue=self.venue)
+        for url in ("/api/v1/taps/", "/api/v1/events/"):
+            response = self.client.get(f"{url}?fields=id,venue")
+            result = response.json()["results"][0]
+            self.assertEqual(set(result), {"id", "venue"})
+            self.assertEqual(result["venue"]["slug"], self.venue.slug)
+            self.assertNotIn("time_zone", result["venue"])
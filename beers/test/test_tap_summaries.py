@@ -0,0 +1,73 @@
+import datetime
+
+from django.test import TestCase
+
+from beers.models import Beer
+from taps.models import Tap
+from taps.test.factories import TapFactory
+from venues.test.factories import VenueFactory
+
+from .factories import BeerFactory
+
+
+class TapSummaryTestCase(TestCase):
+    def setUp(self):
+        self.beer = BeerFactory()
+        self.time_added = datetime.datetime(
+            2023, 5, 4, 12, 0, tzinfo=datetime.timezone.utc
+        )
+
+    def assertSummaries(self, beer, taps_count, venues_count, most_recently_added):
+        beer.refresh_from_db()
+        self.assertEqual(beer.taps_count, taps_count)
+        self.assertEqual(beer.venues_count, venues_count)
+        self.assertEqual(beer.most_recently_added, most_recently_added)
+        self.assertEqual(beer.is_on_tap, bool(taps_count))
+
+    def test_tap_save(self):
+        venue = VenueFactory()
+        later = self.time_added + datetime.timedelta(hours=1)
+        taps = [
+            Tap.objects.create(
+                beer=self.beer, venue=venue, tap_number=1, time_added=self.time_added
+            ),
+            Tap.objects.create(
+                beer=self.beer, venue=venue, tap_number=2, time_added=later
+            ),
+        ]
+        # one update for all of them
+        with self.assertNumQueries(1):
+            Tap.refresh_beer_summaries(*taps)
+        self.assertSummaries(self.beer, 2, 1, later)
+
+    def test_tap_moved_to_other_beer(self):
+        tap = TapFactory(beer=self.beer, time_added=self.time_added)
+        other_beer = BeerFactory()
+        tap = Tap.objects.get(id=tap.id)
+        tap.beer = other_beer
+        tap.save()
+        Tap.refresh_beer_summaries(tap)
+        self.assertSummaries(self.beer, 0, 0, None)
+        self.assertSummaries(other_beer, 1, 1, self.time_added)
+
+    def test_tap_delete(self):
+        tap = TapFactory(beer=self.beer)
+        TapFactory(beer=self.beer, time_added=self.time_added)
+        tap.delete()
+        Tap.refresh_beer_summaries(tap)
+        self.assertSummaries(self.beer, 1, 1, self.time_added)
+
+    def test_venue_delete(self):
+        tap = TapFactory(beer=self.beer)
+        tap.venue.delete()
+        self.assertSummaries(self.beer, 0, 0, None)
+
+    def test_merge(self):
+        other_beer = BeerFactory(manufacturer=self.beer.manufacturer)
+        TapFactory(beer=other_beer, time_added=self.time_added)
+        self.beer.merge_from(other_beer)
+        self.assertSummaries(self.beer, 1, 1, self.time_added)
+
+    def test_refresh_nothing(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(Beer.refresh_tap_summaries([None]), 0)
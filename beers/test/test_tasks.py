@@ -3,10 +3,13 @@ from unittest.mock import patch
 
 from celery import Task
 from celery.exceptions import MaxRetriesExceededError
-from django.test import TestCase
+from django.test import TestCase, override_settings
 import responses
 
-from ..tasks import look_up_beer
+from taps.models import Tap
+from venues.test.factories import VenueFactory
+from ..models import Beer, PendingUntappdLookup, UntappdMetadata
+from ..tasks import drain_untappd_lookups, look_up_beer
 from .factories import BeerFactory
 
 
@@ -50,3 +53,78 @@ class TaskRetryTestCase(TestCase):
         result = look_up_beer(self.beer.id)
         self.assertIsNone(result)
         mock_retry.assert_called_once()
+
+
+@override_settings(UNTAPPD_HOURLY_BUDGET=2)
+class DrainUntappdLookupsTestCase(TestCase):
+    def setUp(self):
+        os.environ["UNTAPPD_CLIENT_ID"] = "1"
+        os.environ["UNTAPPD_CLIENT_SECRET"] = "3"
+        self.beers = [
+            BeerFactory(untappd_url=f"https://untappd.com/beer/{i}") for i in range(3)
+        ]
+        venue = VenueFactory()
+        # the last beer is on the most taps
+        for tap_number in range(1, 3):
+            Tap.objects.create(venue=venue, tap_number=tap_number, beer=self.beers[2])
+        Tap.objects.create(venue=venue, tap_number=3, beer=self.beers[1])
+        Beer.refresh_tap_summaries(beer.id for beer in self.beers)
+
+    def add_responses(self):
+        for beer in self.beers:
+            responses.add(
+                responses.GET,
+                f"https://api.untappd.com/v4/beer/info/{beer.untappd_url[-1]}",
+                json={"meta": {"code": 200}, "response": {"beer": {}}},
+            )
+
+    def test_queue_deduplicates(self):
+        PendingUntappdLookup.queue([self.beers[0].id])
+        PendingUntappdLookup.queue([self.beers[0].id])
+        PendingUntappdLookup.queue(
+            [self.beers[0].id], PendingUntappdLookup.PRIORITY_VIEWED
+        )
+        PendingUntappdLookup.queue([self.beers[0].id])
+        lookup = PendingUntappdLookup.objects.get()
+        self.assertEqual(lookup.priority, PendingUntappdLookup.PRIORITY_VIEWED)
+
+    @responses.activate
+    def test_most_taps_first(self):
+        self.add_responses()
+        PendingUntappdLookup.queue(beer.id for beer in self.beers)
+        drain_untappd_lookups()
+        self.assertEqual(
+            set(UntappdMetadata.objects.values_list("beer_id", flat=True)),
+            {self.beers[1].id, self.beers[2].id},
+        )
+        # budget's used up for now
+        drain_untappd_lookups()
+        self.assertEqual(UntappdMetadata.objects.count(), 2)
+        self.assertEqual(
+            list(PendingUntappdLookup.objects.values_list("beer_id", flat=True)),
+            [self.beers[0].id],
+        )
+
+    @responses.activate
+    def test_priority(self):
+        self.add_responses()
+        PendingUntappdLookup.queue(beer.id for beer in self.beers)
+        PendingUntappdLookup.queue(
+            [self.beers[0].id], PendingUntappdLookup.PRIORITY_VIEWED
+        )
+        drain_untappd_lookups()
+        self.assertEqual(
+            set(UntappdMetadata.objects.values_list("beer_id", flat=True)),
+            {self.beers[0].id, self.beers[2].id},
+        )
+
+    @responses.activate
+    def test_fresh_beers_skipped(self):
+        self.add_responses()
+        for beer in self.beers[1:]:
+            UntappdMetadata.objects.create(beer=beer, json_data={})
+        PendingUntappdLookup.queue(beer.id for beer in self.beers)
+        with override_settings(UNTAPPD_HOURLY_BUDGET=3):
+            drain_untappd_lookups()
+        self.assertEqual(len(responses.calls), 1)
+        self.assertFalse(PendingUntappdLookup.objects.exists())
@@ -2,18 +2,23 @@
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
 from django.db.utils import IntegrityError
-from django.db.models import Prefetch, Count, Max
-from django.http import HttpResponse
+from django.db.models import Prefetch
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render, get_object_or_404 as dj_get_or_404
 from django.urls import reverse
-from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
-from django.views.decorators.cache import cache_page
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.generics import get_object_or_404
 
+from hsv_dot_beer.api_cache import (
+    CacheInvalidationMixin,
+    cache_response,
+    conditional_response,
+    invalidate_on_commit,
+)
+from hsv_dot_beer.sparse_fields import get_shape
 from taps.models import Tap
 from venues.serializers import VenueSerializer
 from venues.models import Venue
@@ -23,10 +28,58 @@ from . import serializers
 from . import models
 from . import filters
 from . import forms
+from . import autocomplete
+from .export import CSVRenderer, NDJSONRenderer, iter_taps, to_csv, to_ndjson
+from .fast_serializers import get_fast_beer_serializer
+
+
+def shape_beer_queryset(queryset, shape):
+    """Only join and prefetch what the requested shape is going to show"""
+    if shape is None:
+        return queryset
+    queryset = queryset.select_related(None).prefetch_related(None)
+    related = [
+        name
+        for name in ("manufacturer", "style", "untappd_metadata")
+        if shape.wants(name)
+    ]
+    if related:
+        queryset = queryset.select_related(*related)
+    if shape.wants("untappd_metadata") and not shape.expands("untappd_metadata"):
+        queryset = queryset.defer("untappd_metadata__json_data")
+    if shape.wants("venues"):
+        taps = Tap.objects.select_related("venue")
+        if not shape.expands("venues"):
+            taps = taps.only("beer", "venue__id", "venue__name", "venue__slug")
+        queryset = queryset.prefetch_related(Prefetch("taps", queryset=taps))
+    if shape.wants("prices"):
+        queryset = queryset.prefetch_related(
+            Prefetch(
+                "prices",
+                queryset=models.BeerPrice.objects.select_related(
+                    "venue",
+                    "serving_size",
+                ),
+            ),
+        )
+    return queryset
+
+
+def fast_beer_response(view, queryset):
+    """Render the full BeerSerializer shape straight from .values() rows"""
+    fast_serializer = get_fast_beer_serializer()
+    rows = fast_serializer.values(queryset)
+    page = view.paginate_queryset(rows)
+    if page is not None:
+        return view.get_paginated_response(fast_serializer.render(page))
+    return Response(fast_serializer.render(rows))
 
 
-class CachedListMixin:
-    @method_decorator(cache_page(60 * 5))
+class CachedListMixin(CacheInvalidationMixin):
+    # the API cache versions the list depends on
+    cache_resources = ()
+
+    @cache_response()
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
@@ -49,16 +102,22 @@ class ModerationMixin:
                 }
             )
         instance.merge_from(other)
+        invalidate_on_commit()
         instance.refresh_from_db()
         return Response(self.get_serializer(instance=instance).data)
 
 
 class ManufacturerViewSet(CachedListMixin, ModerationMixin, ModelViewSet):
+    cache_resources = ("manufacturers",)
+    # names are unique
+    cursor_ordering = ("name",)
     serializer_class = serializers.ManufacturerSerializer
     queryset = models.Manufacturer.objects.order_by("name")
 
 
 class BeerViewSet(CachedListMixin, ModerationMixin, ModelViewSet):
+    cache_resources = ("beers",)
+    cursor_ordering = ("manufacturer__name", "name", "id")
     serializer_class = serializers.BeerSerializer
     queryset = (
         models.Beer.objects.select_related(
@@ -82,14 +141,44 @@ class BeerViewSet(CachedListMixin, ModerationMixin, ModelViewSet):
                 ),
             ),
         )
-        .annotate(
-            most_recently_added=Max("taps__time_added"),
-        )
         .order_by("manufacturer__name", "name")
     )
     filterset_class = filters.BeerFilterSet
 
-    @method_decorator(cache_page(60 * 5))
+    def get_queryset(self):
+        return shape_beer_queryset(super().get_queryset(), get_shape(self.request))
+
+    def list(self, request, *args, **kwargs):
+        if get_shape(request) is not None:
+            return super().list(request, *args, **kwargs)
+        return self.fast_list(request)
+
+    @cache_response()
+    def fast_list(self, request):
+        return fast_beer_response(self, self.filter_queryset(self.get_queryset()))
+
+    @conditional_response()
+    @action(
+        detail=False,
+        methods=["GET"],
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request):
+        """Stream everything on tap, as NDJSON or (with ?format=csv) CSV"""
+        renderer = request.accepted_renderer
+        if renderer.format == "csv":
+            content = to_csv(iter_taps())
+        else:
+            content = to_ndjson(iter_taps())
+        response = StreamingHttpResponse(
+            content, content_type=f"{renderer.media_type}; charset={renderer.charset}"
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="on-tap.{renderer.format}"'
+        return response
+
+    @cache_response()
     @action(detail=True, methods=["GET"])
     def placesavailable(self, request, pk):
         """Get all the venues at which the given beer is on tap"""
@@ -104,14 +193,14 @@ class BeerViewSet(CachedListMixin, ModerationMixin, ModelViewSet):
         queryset = VenueFilterSet(request.query_params, queryset=queryset).qs
 
         page = self.paginate_queryset(queryset)
+        context = self.get_serializer_context()
         if page is not None:
-            serializer = VenueSerializer(page, many=True)
+            serializer = VenueSerializer(page, many=True, context=context)
             return self.get_paginated_response(serializer.data)
 
-        serializer = VenueSerializer(queryset, many=True)
+        serializer = VenueSerializer(queryset, many=True, context=context)
         return Response(serializer.data)
 
-    @method_decorator(cache_page(60 * 5))
     @action(detail=False, methods=["GET"])
     def autocomplete(self, request):
         """Attempt to autocomplete beers"""
@@ -125,88 +214,7 @@ class BeerViewSet(CachedListMixin, ModerationMixin, ModelViewSet):
                     "error": 'You must specify "search" as a query argument',
                 }
             )
-        beer_qs = (
-            models.Beer.objects.filter(name__icontains=search_term)
-            .select_related("manufacturer")
-            .annotate(
-                taps_count=Count("taps", distinct=True),
-            )
-            .values(
-                "name",
-                "taps_count",
-                "id",
-                "manufacturer__name",
-                "alternate_names",
-            )
-            .order_by("-taps_count", "manufacturer__name", "name", "id")[:10]
-        )
-        mfg_qs = (
-            models.Manufacturer.objects.filter(
-                name__icontains=search_term,
-            )
-            .annotate(
-                beers_count=Count("beers", distinct=True),
-                taps_occupied=Count("beers__taps", distinct=True),
-            )
-            .values(
-                "name",
-                "beers_count",
-                "id",
-                "taps_occupied",
-                "alternate_names",
-            )
-            .order_by("-taps_occupied", "-beers_count", "name")[:10]
-        )
-        style_qs = (
-            models.Style.objects.filter(
-                name__contains=search_term,
-            )
-            .annotate(
-                beers_count=Count("beers", distinct=True),
-                taps_occupied=Count("beers__taps", distinct=True),
-            )
-            .values(
-                "name",
-                "beers_count",
-                "id",
-                "taps_occupied",
-                "alternate_names",
-            )
-            .order_by("-taps_occupied", "-beers_count", "name")[:10]
-        )
-        alt_beers = {i["id"]: i["alternate_names"] for i in beer_qs}
-        alt_mfgs = {i["id"]: i["alternate_names"] for i in mfg_qs}
-        alt_styles = {i["id"]: i["alternate_names"] for i in style_qs}
-        result = {
-            "beers": [
-                {
-                    "name": i["name"],
-                    "taps": i["taps_count"],
-                    "alternate_names": alt_beers.get(i["id"], []),
-                    "manufacturer": i["manufacturer__name"],
-                }
-                for i in beer_qs
-            ],
-            "styles": [
-                {
-                    "name": i["name"],
-                    "beers": i["beers_count"],
-                    "taps_occupied": i["taps_occupied"],
-                    "alternate_names": alt_styles.get(i["id"], []),
-                }
-                for i in style_qs
-            ],
-            "manufacturers": [
-                {
-                    "name": i["name"],
-                    "beers": i["beers_count"],
-                    "taps_occupied": i["taps_occupied"],
-                    "alternate_names": alt_mfgs.get(i["id"], []),
-                }
-                for i in mfg_qs
-            ],
-        }
-        return Response(result)
+        return Response(autocomplete.get_index().search(search_term))
 
 
 class StyleMergeView(TemplateView):
@@ -252,6 +260,7 @@ class StyleMergeView(TemplateView):
             )
         except ValueError as exc:
             return HttpResponse(str(exc), status=400)
+        invalidate_on_commit()
         return redirect(reverse("admin:beers_style_changelist"))
 
     template_name = "beers/merge_styles.html"
@@ -303,6 +312,7 @@ class BeerMergeView(TemplateView):
             )
         except ValueError as exc:
             return HttpResponse(str(exc), status=400)
+        invalidate_on_commit()
         return redirect(reverse("admin:beers_beer_changelist"))
 
     template_name = "beers/merge_beers.html"
@@ -354,6 +364,7 @@ class ManufacturerMergeView(TemplateView):
             )
         except ValueError as exc:
             return HttpResponse(str(exc), status=400)
+        invalidate_on_commit()
         return redirect(reverse("admin:beers_manufacturer_changelist"))
 
     template_name = "beers/merge_manufacturers.html"
@@ -0,0 +1,16 @@
+# Generated by Django 4.2.6 on 2026-10-17 08:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0002_event_host"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["start_time", "id"], name="event_start_time_id"),
+        ),
+    ]
@@ -17,4 +17,7 @@ class Event(models.Model):
         indexes = [
             models.Index(fields=["venue", "start_time"]),
             models.Index(fields=["venue", "end_time"]),
+            # backs EventViewSet.cursor_ordering; the few events sharing a
+            # start time get sorted by venue name from there
+            models.Index(fields=["start_time", "id"], name="event_start_time_id"),
         ]
@@ -1,11 +1,16 @@
 from rest_framework import serializers
 
 from venues.models import Venue
-from venues.serializers import VenueSerializer
+from hsv_dot_beer.sparse_fields import SparseFieldsMixin
+from venues.serializers import CompactVenueSerializer, VenueSerializer
 from . import models
 
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    compact_fields = {
+        "venue": lambda: CompactVenueSerializer(read_only=True),
+    }
+
     venue = VenueSerializer(read_only=True)
     venue_id = serializers.PrimaryKeyRelatedField(
         write_only=True,
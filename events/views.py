@@ -1,11 +1,22 @@
 from rest_framework.viewsets import ModelViewSet
 
+from hsv_dot_beer.sparse_fields import get_shape
+
 from . import models
 from . import serializers
 
 
 class EventViewSet(ModelViewSet):
     serializer_class = serializers.EventSerializer
+    cursor_ordering = ("start_time", "venue__name", "id")
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        shape = get_shape(self.request)
+        if shape is not None and not shape.wants("venue"):
+            queryset = queryset.select_related(None)
+        return queryset
+
     queryset = models.Event.objects.select_related("venue").order_by(
         "start_time",
         "venue__name",
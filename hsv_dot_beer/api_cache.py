@@ -0,0 +1,281 @@
+"""Versioned caching for the read-heavy API endpoints
+
+Cached responses are keyed on version numbers that live in the cache next to
+them: one for the whole API, one per resource type ("beers",
+"manufacturers", "taps", "venues") and one per venue. Changing the data bumps the
+matching versions, which orphans the old entries (they expire on their own)
+so the next request sees the change right away, while anything that hasn't
+changed stays cached for API_CACHE_TIMEOUT.
+
+Tap changes only bump the venue they happened at (plus the beer-wide lists),
+so the other venues' tap lists stay cached. Saving or deleting a beer,
+manufacturer, style, or venue API configuration anywhere else (the admin,
+the edit forms, Untappd lookups) bumps the lists showing it, and
+venues.snapshots does the same for venues, taps, and prices. Writes made
+through the API and merges bump everything, since they're rare and can
+touch anything.
+
+The versions are also when the data last changed, so the same responses get
+an ETag and Last-Modified derived from them, and conditional GETs that still
+match are answered with a 304 before touching the database or the cached
+body. Cache-Control lets shared caches hold on to the anonymous responses for
+a short while; anything fetched with credentials is marked private.
+"""
+from functools import partial, wraps
+from hashlib import md5
+import logging
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+LOG = logging.getLogger(__name__)
+
+GLOBAL = "all"
+# bumped once per ingestion run rather than on every change, since the
+# autocomplete index is rebuilt from scratch
+AUTOCOMPLETE = "autocomplete"
+# only cache formats that look the same for everyone; the browsable API
+# includes the user's name and CSRF token
+CACHEABLE_FORMATS = {"json"}
+# the resources whose responses show each model's rows
+MODEL_RESOURCES = {
+    "beers.Beer": ("beers",),
+    "beers.Manufacturer": ("beers", "manufacturers"),
+    "beers.Style": ("beers",),
+    "beers.UntappdMetadata": ("beers",),
+    "venues.VenueAPIConfiguration": ("venues",),
+}
+# warmed after every change
+WARM_PATHS = ("/api/v1/venues/",)
+# warmed after the venue changes
+VENUE_WARM_PATHS = (
+    "/api/v1/venues/{venue.id}/beers/",
+    "/api/v1/venues/byslug/{venue.slug}/beers/",
+)
+
+
+def version_key(scope: str) -> str:
+    return f"api-cache:version:{scope}"
+
+
+def venue_scopes(venue) -> list[str]:
+    return [f"venue:pk:{venue.id}", f"venue:slug:{venue.slug}"]
+
+
+def get_versions(scopes: list[str]) -> list:
+    """Look up the current versions of scopes, starting any that are missing"""
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes: str) -> None:
+    """Invalidate every cached response that depends on any of scopes"""
+    version = time.time_ns()
+    cache.set_many({version_key(scope): version for scope in scopes}, timeout=None)
+    LOG.debug("Bumped API cache versions for %s", ", ".join(scopes))
+
+
+def bump_all() -> None:
+    bump(GLOBAL)
+
+
+def venue_changed(venue) -> None:
+    """Invalidate the responses showing venue's taps once the change commits"""
+    transaction.on_commit(
+        partial(bump, "beers", "taps", "venues", *venue_scopes(venue))
+    )
+
+
+def invalidate_on_commit() -> None:
+    transaction.on_commit(bump_all)
+
+
+def model_changed(sender, **kwargs) -> None:
+    """Invalidate the responses showing sender's rows once the change commits"""
+    transaction.on_commit(partial(bump, *MODEL_RESOURCES[sender._meta.label]))
+
+
+for label in MODEL_RESOURCES:
+    post_save.connect(model_changed, sender=label)
+    post_delete.connect(model_changed, sender=label)
+
+
+def schedule_warming(venue_ids) -> None:
+    """Re-warm the hot endpoints and the autocomplete index in the background
+    once the change commits"""
+    from .tasks import warm_api_cache
+
+    venue_ids = sorted(venue_ids)
+    if venue_ids:
+        transaction.on_commit(partial(bump, AUTOCOMPLETE))
+        transaction.on_commit(partial(warm_api_cache.delay, venue_ids))
+
+
+def get_scopes(view, resources, venue_lookup, kwargs) -> list[str]:
+    if resources is None:
+        scopes = [GLOBAL, *view.cache_resources]
+    else:
+        scopes = [GLOBAL, *resources]
+    if venue_lookup:
+        if "pk" in kwargs:
+            scopes.append(f"venue:pk:{kwargs['pk']}")
+        else:
+            scopes.append(f"venue:slug:{kwargs['slug']}")
+    return scopes
+
+
+def get_validators(view, method, request, scopes) -> tuple[str, str, int]:
+    """The cache key, ETag, and Last-Modified timestamp for a response"""
+    versions = get_versions(scopes)
+    request_hash = md5(
+        f"{request.accepted_media_type}:{request.get_full_path()}".encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    view_name = f"{type(view).__name__}.{method.__name__}"
+    version_string = "-".join(str(version) for version in versions)
+    key = f"api-cache:{view_name}:{version_string}:{request_hash}"
+    etag = quote_etag(md5(key.encode(), usedforsecurity=False).hexdigest())
+    return key, etag, max(versions) // 10**9
+
+
+def cache_response(resources: tuple[str, ...] = None, venue_lookup: bool = False):
+    """Cache a viewset method's rendered response
+
+    The response is dropped once any of the resources (by default, the
+    view's cache_resources) is bumped, or if venue_lookup is set, once the
+    venue given by the URL (by pk or slug) is. Conditional GETs are answered
+    from the versions alone.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if request.accepted_renderer.format not in CACHEABLE_FORMATS:
+                return method(view, request, *args, **kwargs)
+            scopes = get_scopes(view, resources, venue_lookup, kwargs)
+            key, etag, last_modified = get_validators(view, method, request, scopes)
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if not_modified is not None:
+                return add_validators(request, not_modified, etag, last_modified)
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return add_validators(
+                    request,
+                    HttpResponse(content, content_type=content_type),
+                    etag,
+                    last_modified,
+                )
+            response = method(view, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            add_validators(request, response, etag, last_modified)
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = view.get_renderer_context()
+            response.render()
+            cache.set(
+                key,
+                (response.content, response["Content-Type"]),
+                settings.API_CACHE_TIMEOUT,
+            )
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def conditional_response(resources: tuple[str, ...] = None):
+    """Like cache_response, for responses too big to keep in the cache
+
+    Only the validators and Cache-Control are added, so clients and shared
+    caches can still skip downloading a response that hasn't changed.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            scopes = get_scopes(view, resources, False, kwargs)
+            _, etag, last_modified = get_validators(view, method, request, scopes)
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if not_modified is not None:
+                return add_validators(request, not_modified, etag, last_modified)
+            response = method(view, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            return add_validators(request, response, etag, last_modified)
+
+        return wrapper
+
+    return decorator
+
+
+def add_validators(request, response, etag: str, last_modified: int):
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = http_date(last_modified)
+    patch_vary_headers(response, ("Authorization", "Cookie"))
+    if request.user.is_authenticated:
+        # it may be something only this user is allowed to see, like the
+        # venues' API configuration, so keep it out of shared caches
+        patch_cache_control(response, private=True, no_store=True)
+    else:
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.API_MAX_AGE,
+            s_maxage=settings.API_SHARED_MAX_AGE,
+        )
+    return response
+
+
+class CacheInvalidationMixin:
+    """Bump every API cache version after a write through the viewset"""
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        invalidate_on_commit()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidate_on_commit()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        invalidate_on_commit()
+
+
+def warm(paths) -> None:
+    """Request each path so its response is cached before anyone asks"""
+    factory = RequestFactory()
+    for path in paths:
+        request = factory.get(path, HTTP_ACCEPT="application/json")
+        request.user = AnonymousUser()
+        match = resolve(urlsplit(path).path)
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, "render"):
+            response.render()
+        LOG.debug("Warmed %s (%s)", path, response.status_code)
@@ -0,0 +1,154 @@
+"""Timing the API's hot paths against synthetic data
+
+For each scale (a multiple of synthetic_data.TODAY), the data is generated
+inside a transaction that's rolled back afterwards, and every endpoint in
+ENDPOINTS is requested through the test client, so the middleware and
+everything else a real request goes through are included. Each endpoint is
+timed uncached (its API cache versions bumped before every request, so the
+database is hit every time) and cached (repeating a request that's already
+been cached). Responses are cached in a local memory cache for the duration,
+whatever CACHES says.
+
+The results are plain dicts ready for JSON, so runs from different commits
+can be compared.
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import median
+import subprocess
+import time
+from typing import NamedTuple
+
+from django.db import transaction
+from django.test import Client, override_settings
+
+from beers.models import Beer
+from venues.models import Venue
+from . import api_cache, synthetic_data
+
+LOCAL_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+# bumped before each uncached request, along with the sample venue's
+UNCACHED_SCOPES = ("beers", "manufacturers", "taps", "venues")
+
+
+class Endpoint(NamedTuple):
+    name: str
+    # formatted with the sample beer and venue, plus search terms from them
+    path: str
+
+
+ENDPOINTS = (
+    Endpoint("BeerViewSet.list", "/api/v1/beers/"),
+    Endpoint("BeerViewSet.list (filtered)", "/api/v1/beers/?on_tap=true&abv__gte=6"),
+    Endpoint("BeerViewSet.list (search)", "/api/v1/beers/?search={search}"),
+    Endpoint("BeerViewSet.autocomplete", "/api/v1/beers/autocomplete/?search={prefix}"),
+    Endpoint("BeerViewSet.placesavailable", "/api/v1/beers/{beer.id}/placesavailable/"),
+    Endpoint("VenueViewSet.beers", "/api/v1/venues/{venue.id}/beers/"),
+    Endpoint("EventViewSet.list", "/api/v1/events/"),
+)
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def get_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def get_paths() -> tuple[dict[str, str], list[str]]:
+    """The path for each endpoint, and the API cache versions to bump to get
+    them uncached"""
+    # the beer on the most taps, so every endpoint has something to show
+    beer = Beer.objects.select_related("manufacturer").order_by("-taps_count").first()
+    venue = Venue.objects.order_by("id").first()
+    words = beer.name.lower().split()
+    paths = {
+        endpoint.name: endpoint.path.format(
+            beer=beer,
+            venue=venue,
+            search="+".join(words[:2]),
+            prefix=words[0][:3],
+        )
+        for endpoint in ENDPOINTS
+    }
+    return paths, [*UNCACHED_SCOPES, *api_cache.venue_scopes(venue)]
+
+
+def request(client: Client, path: str) -> tuple[float, int, int]:
+    """How long the request took, how many queries it ran, and how big it was"""
+    started = time.perf_counter()
+    response = client.get(path)
+    elapsed = time.perf_counter() - started
+    if response.status_code != 200:
+        raise BenchmarkError(f"{path} returned {response.status_code}")
+    recording = response.wsgi_request.metrics_recording
+    return elapsed, recording.queries, len(response.content)
+
+
+def time_endpoint(client: Client, path: str, runs: int, scopes=None) -> dict:
+    """Time path, bumping scopes before each request unless they're None"""
+    # the first request builds whatever's built on demand (snapshots, the
+    # autocomplete index), and caches the response
+    request(client, path)
+    timings = []
+    for _ in range(runs):
+        if scopes is not None:
+            api_cache.bump(*scopes)
+        elapsed, queries, size = request(client, path)
+        timings.append(elapsed * 1000)
+    return {
+        "path": path,
+        "cached": scopes is None,
+        "runs": runs,
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(median(timings), 3),
+        "max_ms": round(max(timings), 3),
+        # from the last run
+        "queries": queries,
+        "response_bytes": size,
+    }
+
+
+def benchmark_scale(factor: float, runs: int, seed: int, log=None) -> dict:
+    client = Client()
+    with transaction.atomic():
+        scale = synthetic_data.TODAY.times(factor)
+        counts = synthetic_data.generate(scale, seed)
+        results = {}
+        paths, scopes = get_paths()
+        for name, path in paths.items():
+            if log is not None:
+                log(f"{factor}x: {name}")
+            results[name] = [
+                time_endpoint(client, path, runs, scopes),
+                time_endpoint(client, path, runs),
+            ]
+        transaction.set_rollback(True)
+    return {"factor": factor, "counts": counts, "endpoints": results}
+
+
+def run(factors, runs: int = 5, seed: int = 0, log=None) -> dict:
+    """Benchmark every endpoint at each of factors times today's data size"""
+    started = datetime.now(timezone.utc)
+    with override_settings(CACHES=LOCAL_CACHES):
+        scales = [benchmark_scale(factor, runs, seed, log) for factor in factors]
+    return {
+        "commit": get_commit(),
+        "started": started.isoformat(),
+        "runs": runs,
+        "seed": seed,
+        "scales": scales,
+    }
@@ -22,6 +22,9 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
 
+# record what every task costs
+from . import metrics  # noqa: E402,F401 isort:skip
+
 
 @app.task(bind=True)
 def debug_task(self):
@@ -74,6 +74,7 @@ class Common(Configuration):  # pylint: disable=no-init
 
     # https://docs.djangoproject.com/en/2.0/topics/http/middleware/
     MIDDLEWARE = (
+        "hsv_dot_beer.metrics.MetricsMiddleware",
         "django.middleware.security.SecurityMiddleware",
         "django.contrib.sessions.middleware.SessionMiddleware",
         "corsheaders.middleware.CorsMiddleware",
@@ -232,7 +233,9 @@ class Common(Configuration):  # pylint: disable=no-init
 
     # Django Rest Framework
     REST_FRAMEWORK = {
-        "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+        "DEFAULT_PAGINATION_CLASS": (
+            "hsv_dot_beer.pagination.OptionalCursorPagination"
+        ),
         "PAGE_SIZE": int(os.getenv("DJANGO_PAGINATION_LIMIT", "10")),
         "DATETIME_FORMAT": "%Y-%m-%dT%H:%M:%S%z",
         "DEFAULT_RENDERER_CLASSES": (
@@ -263,7 +266,39 @@ class Common(Configuration):  # pylint: disable=no-init
     CELERY_IMPORTS = (
         "tap_list_providers.tasks",
         "beers.tasks",
+        "hsv_dot_beer.tasks",
+    )
+
+    # How many venues' tap lists to fetch at once when parsing a provider
+    TAP_LIST_FETCH_WORKERS = int(os.getenv("TAP_LIST_FETCH_WORKERS", "4"))
+
+    # HTTP client used by the tap list providers
+    TAP_LIST_HTTP_CONNECT_TIMEOUT = float(
+        os.getenv("TAP_LIST_HTTP_CONNECT_TIMEOUT", "5")
+    )
+    TAP_LIST_HTTP_READ_TIMEOUT = float(os.getenv("TAP_LIST_HTTP_READ_TIMEOUT", "30"))
+    TAP_LIST_HTTP_RETRIES = int(os.getenv("TAP_LIST_HTTP_RETRIES", "3"))
+    # seconds; doubled on each retry, plus up to this much random jitter
+    TAP_LIST_HTTP_BACKOFF = float(os.getenv("TAP_LIST_HTTP_BACKOFF", "0.5"))
+
+    # How long (in seconds) to keep API responses that haven't been
+    # invalidated by a change
+    API_CACHE_TIMEOUT = int(os.getenv("API_CACHE_TIMEOUT", str(60 * 60)))
+    # Cache-Control for those responses: browsers revalidate every time (and
+    # usually get a 304), shared caches like the edge can keep them this long
+    API_MAX_AGE = int(os.getenv("API_MAX_AGE", "0"))
+    API_SHARED_MAX_AGE = int(os.getenv("API_SHARED_MAX_AGE", "60"))
+    # How long (in seconds) a venue's tap list snapshot can be served before
+    # it's rebuilt to pick up changes made elsewhere (like Untappd metadata)
+    TAP_LIST_SNAPSHOT_MAX_AGE = int(
+        os.getenv("TAP_LIST_SNAPSHOT_MAX_AGE", str(60 * 60))
     )
+    # How often (in seconds) each process adds what it's recorded about views
+    # and tasks to the shared metrics
+    METRICS_FLUSH_INTERVAL = int(os.getenv("METRICS_FLUSH_INTERVAL", "60"))
+
+    # How many Untappd API calls we can make in an hour
+    UNTAPPD_HOURLY_BUDGET = int(os.getenv("UNTAPPD_HOURLY_BUDGET", "100"))
 
     TWITTER_CONSUMER_KEY = os.environ.get("TWITTER_CONSUMER_KEY")
     TWITTER_CONSUMER_SECRET = os.environ.get("TWITTER_CONSUMER_SECRET")
@@ -0,0 +1,244 @@
+"""What each view and task costs
+
+Every request (via MetricsMiddleware) and every Celery task (via the signal
+handlers below) is recorded under its name, e.g. "BeerViewSet.list",
+"venue_table", or "tap_list_providers.tasks.parse_tap_list". A recording
+counts the SQL queries run on the default connection and the time spent in
+them, the time spent serializing (see timing_serializer()), the wall time,
+and the size of the response.
+
+Recordings are added up in memory and flushed to the cache every
+METRICS_FLUSH_INTERVAL seconds with atomic increments, so the web processes
+and the Celery workers all feed the same totals. get_metrics() reads them
+back for /api/v1/metrics/.
+
+Queries run from other threads (the tap list fetchers, for one) go through
+their own connections and aren't counted.
+"""
+from contextlib import contextmanager, ExitStack
+from contextvars import ContextVar
+import logging
+import threading
+import time
+
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+LOG = logging.getLogger(__name__)
+
+# totals kept for every name, in the order they're reported
+FIELDS = ("count", "queries", "db_us", "serializer_us", "duration_us", "bytes")
+NAMES_KEY = "metrics:names"
+
+
+def metric_key(name: str, field: str) -> str:
+    return f"metrics:{name}:{field}"
+
+
+class Recording:
+    """What one request or task has cost so far"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.response_bytes = 0
+        self.started = time.perf_counter()
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # a database execute wrapper
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+    def totals(self) -> tuple[int, ...]:
+        return (
+            1,
+            self.queries,
+            round(self.db_time * 1e6),
+            round(self.serializer_time * 1e6),
+            round(self.duration * 1e6),
+            self.response_bytes,
+        )
+
+
+_current: ContextVar[Recording | None] = ContextVar("metrics_recording", default=None)
+
+
+class Totals:
+    """Recordings not yet flushed to the cache"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.flushed_at = time.monotonic()
+
+    def add(self, recording: Recording) -> None:
+        with self.lock:
+            totals = self.pending.get(recording.name, (0,) * len(FIELDS))
+            self.pending[recording.name] = tuple(
+                total + value for total, value in zip(totals, recording.totals())
+            )
+            if time.monotonic() - self.flushed_at < settings.METRICS_FLUSH_INTERVAL:
+                return
+            pending = self.pending
+            self.pending = {}
+            self.flushed_at = time.monotonic()
+        self.flush(pending)
+
+    def flush(self, pending: dict) -> None:
+        try:
+            names = cache.get(NAMES_KEY, set())
+            if not names.issuperset(pending):
+                # not atomic, but a name that goes missing comes back with
+                # the next flush that has it
+                cache.set(NAMES_KEY, names | set(pending), None)
+            for name, totals in pending.items():
+                for field, value in zip(FIELDS, totals):
+                    if value:
+                        increment(metric_key(name, field), value)
+        except Exception:  # pylint: disable=broad-except
+            # metrics are never worth failing a request over
+            LOG.exception("Unable to flush metrics")
+
+    def clear(self) -> None:
+        with self.lock:
+            self.pending = {}
+
+
+_totals = Totals()
+
+
+def increment(key: str, value: int) -> None:
+    try:
+        cache.incr(key, value)
+    except ValueError:
+        # doesn't exist yet
+        if not cache.add(key, value, None):
+            cache.incr(key, value)
+
+
+@contextmanager
+def record(name: str):
+    """Record what the block costs under name"""
+    recording = Recording(name)
+    token = _current.set(recording)
+    try:
+        with connection.execute_wrapper(recording):
+            yield recording
+    finally:
+        _current.reset(token)
+        recording.duration = time.perf_counter() - recording.started
+        _totals.add(recording)
+
+
+@contextmanager
+def timing_serializer():
+    """Count the block as serializer time for whatever's being recorded
+
+    Nested blocks only count once.
+    """
+    recording = _current.get()
+    if recording is None or recording.serializing:
+        yield
+        return
+    recording.serializing = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recording.serializing = False
+        recording.serializer_time += time.perf_counter() - started
+
+
+def get_metrics() -> dict[str, dict]:
+    """The totals (and per-call averages) for everything recorded so far"""
+    names = sorted(cache.get(NAMES_KEY, set()))
+    keys = [metric_key(name, field) for name in names for field in FIELDS]
+    values = cache.get_many(keys)
+    metrics = {}
+    for name in names:
+        totals = {field: values.get(metric_key(name, field), 0) for field in FIELDS}
+        count = totals["count"]
+        if not count:
+            continue
+        metrics[name] = {
+            "count": count,
+            "queries": totals["queries"],
+            "db_ms": totals["db_us"] / 1000,
+            "serializer_ms": totals["serializer_us"] / 1000,
+            "duration_ms": totals["duration_us"] / 1000,
+            "response_bytes": totals["bytes"],
+            "avg_queries": totals["queries"] / count,
+            "avg_db_ms": totals["db_us"] / count / 1000,
+            "avg_serializer_ms": totals["serializer_us"] / count / 1000,
+            "avg_duration_ms": totals["duration_us"] / count / 1000,
+            "avg_response_bytes": totals["bytes"] / count,
+        }
+    return metrics
+
+
+def reset() -> None:
+    """Start counting from zero"""
+    names = cache.get(NAMES_KEY, set())
+    cache.delete_many(
+        [NAMES_KEY, *(metric_key(name, field) for name in names for field in FIELDS)]
+    )
+    _totals.clear()
+
+
+def view_name(view_func, request) -> str:
+    view_class = getattr(view_func, "cls", None)
+    actions = getattr(view_func, "actions", None)
+    if view_class is not None and actions:
+        # a viewset
+        action = actions.get(request.method.lower(), request.method.lower())
+        return f"{view_class.__name__}.{action}"
+    if view_class is not None:
+        return view_class.__name__
+    return getattr(view_func, "__name__", type(view_func).__name__)
+
+
+class MetricsMiddleware:
+    """Records every request under the name of the view that handled it"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record("unresolved") as recording:
+            request.metrics_recording = recording
+            response = self.get_response(request)
+            if not response.streaming:
+                recording.response_bytes = len(response.content)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_recording.name = view_name(view_func, request)
+
+
+# Celery tasks; a task can only run once at a time per worker thread, but keep
+# them by ID anyway in case one is run eagerly from inside another
+_tasks = {}
+
+
+@task_prerun.connect
+def start_task(task_id=None, task=None, **kwargs):
+    stack = ExitStack()
+    stack.enter_context(record(task.name))
+    _tasks[task_id] = stack
+
+
+@task_postrun.connect
+def finish_task(task_id=None, **kwargs):
+    stack = _tasks.pop(task_id, None)
+    if stack is not None:
+        stack.close()
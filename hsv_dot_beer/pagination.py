@@ -0,0 +1,171 @@
+"""Page number pagination with an opt-in keyset (cursor) mode
+
+Passing ?cursor= (empty for the first page) to a view that defines
+cursor_ordering switches it from page numbers to keyset pagination. Rows are
+put in cursor_ordering order, which has to end in a unique field and should
+be the view's usual ordering (so switching modes doesn't reorder anything)
+with the tiebreaker added, and each page picks up after the last row of the one before
+it with a WHERE clause instead of an OFFSET. That means no COUNT(*), and deep
+pages cost the same as the first one. Any other ordering asked for is
+ignored in that mode.
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+import binascii
+from collections import OrderedDict
+import datetime
+from functools import reduce
+import json
+import operator
+
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+from django.template import loader
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorJSONEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, (datetime.date, datetime.datetime)):
+            return o.isoformat()
+        # decimals, UUIDs, and the like
+        return str(o)
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    cursor_query_param = "cursor"
+    cursor_template = "rest_framework/pagination/previous_and_next.html"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, "cursor_ordering", None)
+        if not ordering or self.cursor_query_param not in request.query_params:
+            self.cursor_mode = False
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_mode = True
+        self.request = request
+        self.ordering = ordering
+        page_size = self.get_page_size(request)
+        values, reverse = self.decode_cursor(
+            request.query_params[self.cursor_query_param]
+        )
+        if reverse:
+            queryset = queryset.order_by(*(flip(field) for field in ordering))
+        else:
+            queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.after(values, reverse))
+        rows = list(queryset[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next = values is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = values is not None
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        if not rows:
+            # there's no row to anchor either link to
+            self.has_next = self.has_previous = False
+        return rows
+
+    def after(self, values, reverse) -> Q:
+        """Rows that come after values in the (possibly flipped) ordering
+
+        For an ordering of (a, b) that's a > x OR (a = x AND b > y), with an
+        extra a >= x so Postgres can scan the index for the range.
+        """
+        conditions = []
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            descending = field.startswith("-") != reverse
+            lookup = "lt" if descending else "gt"
+            conditions.append(Q(**equal, **{f"{name}__{lookup}": value}))
+            equal[name] = value
+        first = self.ordering[0]
+        descending = first.startswith("-") != reverse
+        bound = Q(
+            **{f"{first.lstrip('-')}__{'lte' if descending else 'gte'}": values[0]}
+        )
+        return bound & reduce(operator.or_, conditions)
+
+    def encode_cursor(self, row, reverse: bool) -> str:
+        names = [field.lstrip("-") for field in self.ordering]
+        if isinstance(row, dict):
+            # a .values() row
+            values = [row[name] for name in names]
+        else:
+            values = [reduce(getattr, name.split(LOOKUP_SEP), row) for name in names]
+        payload = json.dumps({"v": values, "r": reverse}, cls=CursorJSONEncoder)
+        return urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor: str):
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(cursor.encode()))
+            values = payload["v"]
+            reverse = bool(payload["r"])
+        except (binascii.Error, ValueError, TypeError, KeyError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def get_cursor_link(self, row, reverse: bool):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(row, reverse)
+        )
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return self.get_cursor_link(self.last_row, False)
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        if not self.has_previous:
+            return None
+        return self.get_cursor_link(self.first_row, True)
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_html_context(self):
+        if not self.cursor_mode:
+            return super().get_html_context()
+        return {
+            "previous_url": self.get_previous_link(),
+            "next_url": self.get_next_link(),
+        }
+
+    def to_html(self):
+        if not self.cursor_mode:
+            return super().to_html()
+        template = loader.get_template(self.cursor_template)
+        return template.render(self.get_html_context())
+
+
+def flip(field: str) -> str:
+    return field[1:] if field.startswith("-") else f"-{field}"
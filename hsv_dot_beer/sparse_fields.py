@@ -0,0 +1,83 @@
+"""?fields= and ?expand= support for the read-only API
+
+Without either parameter, responses keep their full shape. With them, a
+response only has the fields listed in ?fields= (or all of them if it's not
+given), and the related objects a serializer lists in compact_fields are
+trimmed down to their compact form unless they're named in ?expand=:
+
+    /api/v1/beers/?fields=id,name,abv,manufacturer
+    /api/v1/beers/?fields=name,venues&expand=venues
+
+Views should use get_shape() to skip joins and prefetches for anything that
+won't be shown.
+"""
+from typing import NamedTuple
+
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .metrics import timing_serializer
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+class Shape(NamedTuple):
+    # None means every field
+    fields: frozenset | None
+    expand: frozenset
+
+    def wants(self, field_name: str) -> bool:
+        return self.fields is None or field_name in self.fields
+
+    def expands(self, field_name: str) -> bool:
+        return field_name in self.expand
+
+
+def split_param(value: str) -> frozenset:
+    return frozenset(name.strip() for name in value.split(",") if name.strip())
+
+
+def get_shape(request) -> Shape | None:
+    """What the request asked for, or None for the full response"""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    params = request.query_params
+    if FIELDS_PARAM not in params and EXPAND_PARAM not in params:
+        return None
+    fields = None
+    if FIELDS_PARAM in params:
+        fields = split_param(params[FIELDS_PARAM])
+    return Shape(fields, split_param(params.get(EXPAND_PARAM, "")))
+
+
+class SparseFieldsMixin:
+    """Trim a top-level serializer to the shape the request asked for"""
+
+    # field name -> callable making the compact version of the field
+    compact_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        root = self.root
+        if self is not root and not (
+            self.parent is root and isinstance(root, serializers.ListSerializer)
+        ):
+            # nested serializers are shaped by their parents' compact_fields
+            return fields
+        shape = get_shape(self.context.get("request"))
+        if shape is None:
+            return fields
+        fields = {
+            name: field
+            for name, field in fields.items()
+            if field.write_only or shape.wants(name)
+        }
+        for name, make_compact in self.compact_fields.items():
+            if name in fields and not shape.expands(name):
+                fields[name] = make_compact()
+        return fields
+
+    def to_representation(self, instance):
+        with timing_serializer():
+            return super().to_representation(instance)
@@ -0,0 +1,270 @@
+"""Realistic fake data, for benchmarking against something our size
+
+generate() fills an empty database with venues, manufacturers (some with
+alternate names), beers (likewise, most with Untappd metadata), taps,
+prices, and events, in the proportions the live site has. Scale multiplies
+every count; TODAY is roughly what hsv.beer has now. The same seed always
+makes the same data.
+
+Everything is bulk-created, so the summaries and search columns that signals
+would normally keep up are refreshed at the end.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+import random
+from typing import Iterable, NamedTuple
+
+from django.db import connection
+from django.utils.timezone import now
+
+from beers.models import (
+    Beer,
+    BeerPrice,
+    Manufacturer,
+    ServingSize,
+    Style,
+    UntappdMetadata,
+)
+from beers.search import refresh_search_index
+from events.models import Event
+from taps.models import Tap
+from venues.models import Venue
+
+BATCH_SIZE = 2000
+
+ADJECTIVES = (
+    "Hazy Golden Dark Imperial Wild Lazy Rocket Lunar Crooked Salty Velvet Iron "
+    "Copper Southern Sticky Bitter Rusty Double Little Big Red Black White Old "
+    "Hoppy Tart Smoked Frosty Electric Humble Grumpy Happy Barrel Midnight"
+).split()
+NOUNS = (
+    "Monkey Rocket River Mule Goat Owl Fox Porch Tractor Comet Moon Trail Kettle "
+    "Anvil Canyon Harvest Orbit Bear Hound Lantern Engine Mill Bridge Sunrise "
+    "Ghost Pilot Crow Spruce Thunder Badger Peach Haze Quarry Depot Hollow"
+).split()
+STYLES = (
+    "American IPA",
+    "Hazy IPA",
+    "Double IPA",
+    "Pale Ale",
+    "Pilsner",
+    "Helles",
+    "Kolsch",
+    "Amber Ale",
+    "Brown Ale",
+    "Porter",
+    "Stout",
+    "Imperial Stout",
+    "Saison",
+    "Gose",
+    "Berliner Weisse",
+    "Hefeweizen",
+    "Witbier",
+    "Belgian Tripel",
+    "Sour Ale",
+    "Cider",
+)
+MANUFACTURER_SUFFIXES = ("Brewing", "Brewing Company", "Brewery", "Beer Co.", "Ales")
+SERVING_SIZES = (
+    ("taster", Decimal(4)),
+    ("half pint", Decimal(8)),
+    ("pint", Decimal(16)),
+)
+
+
+class Scale(NamedTuple):
+    venues: int
+    manufacturers: int
+    beers: int
+    taps_per_venue: int
+    events_per_venue: int
+
+    def times(self, factor: float) -> "Scale":
+        """More (or fewer) of everything, with venues just as full as now"""
+        return self._replace(
+            venues=max(1, round(self.venues * factor)),
+            manufacturers=max(1, round(self.manufacturers * factor)),
+            beers=max(1, round(self.beers * factor)),
+        )
+
+
+TODAY = Scale(
+    venues=60,
+    manufacturers=1500,
+    beers=9000,
+    taps_per_venue=30,
+    events_per_venue=2,
+)
+
+
+def batches(objs: Iterable, size: int = BATCH_SIZE):
+    objs = iter(objs)
+    while batch := list(islice(objs, size)):
+        yield batch
+
+
+def bulk_create(model, objs: Iterable) -> list:
+    created = []
+    for batch in batches(objs):
+        created.extend(model.objects.bulk_create(batch))
+    return created
+
+
+def name(rng: random.Random) -> str:
+    return f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"
+
+
+def unique_names(rng: random.Random, count: int, suffixes=("",)):
+    seen = set()
+    while len(seen) < count:
+        value = f"{name(rng)} {rng.choice(suffixes)}".strip()
+        if value in seen:
+            value = f"{value} {len(seen)}"
+        seen.add(value)
+        yield value
+
+
+def generate(scale: Scale, seed: int = 0) -> dict[str, int]:
+    """Fill the database with data of the given size; returns the counts"""
+    rng = random.Random(seed)
+    started = now()
+    # some styles come with the migrations
+    styles = list(Style.objects.filter(name__in=STYLES))
+    existing = {style.name.lower() for style in styles}
+    styles += bulk_create(
+        Style,
+        (
+            Style(
+                name=style,
+                alternate_names=[style.replace(" ", "-")] if " " in style else [],
+            )
+            for style in STYLES
+            if style.lower() not in existing
+        ),
+    )
+    serving_sizes = [
+        ServingSize.objects.get_or_create(name=size, defaults={"volume_oz": volume})[0]
+        for size, volume in SERVING_SIZES
+    ]
+    manufacturers = bulk_create(
+        Manufacturer,
+        (
+            Manufacturer(
+                name=manufacturer_name,
+                location=f"{rng.choice(NOUNS)}ville, AL",
+                # about one in five goes by something else too
+                alternate_names=(
+                    [manufacturer_name.split()[0]] if rng.random() < 0.2 else []
+                ),
+            )
+            for manufacturer_name in unique_names(
+                rng, scale.manufacturers, MANUFACTURER_SUFFIXES
+            )
+        ),
+    )
+    manufacturer_ids = [manufacturer.id for manufacturer in manufacturers]
+    style_ids = [style.id for style in styles]
+    # only keep the IDs around, since there can be a lot of beers
+    beer_ids = []
+    beer_names = unique_names(rng, scale.beers, ("", "IPA", "Lager", "Stout"))
+    for batch in batches(beer_names):
+        first = len(beer_ids)
+        beers = Beer.objects.bulk_create(
+            Beer(
+                name=beer_name,
+                manufacturer_id=rng.choice(manufacturer_ids),
+                style_id=rng.choice(style_ids),
+                abv=Decimal(rng.randint(35, 120)) / 10,
+                ibu=rng.randint(5, 100),
+                color_srm=Decimal(rng.randint(2, 40)),
+                untappd_url=f"https://untappd.com/b/synthetic/{first + index}",
+                alternate_names=[beer_name.upper()] if rng.random() < 0.1 else [],
+            )
+            for index, beer_name in enumerate(batch)
+        )
+        UntappdMetadata.objects.bulk_create(
+            UntappdMetadata(
+                beer=beer,
+                json_data={
+                    "bid": beer.id,
+                    "beer_name": beer.name,
+                    "rating_score": round(rng.uniform(2.5, 4.7), 2),
+                    "rating_count": rng.randint(10, 50000),
+                },
+            )
+            for beer in beers
+            # most beers have been looked up
+            if rng.random() < 0.7
+        )
+        beer_ids.extend(beer.id for beer in beers)
+    venues = bulk_create(
+        Venue,
+        (
+            Venue(
+                name=f"Synthetic Venue {index}",
+                slug=f"synthetic-venue-{index}",
+                city="Huntsville",
+                state="AL",
+                tap_list_provider="untappd",
+            )
+            for index in range(scale.venues)
+        ),
+    )
+    on_tap = set()
+
+    def taps():
+        for venue in venues:
+            for tap_number, beer_id in enumerate(
+                rng.sample(beer_ids, min(scale.taps_per_venue, len(beer_ids))), 1
+            ):
+                on_tap.add(beer_id)
+                yield Tap(
+                    venue=venue,
+                    beer_id=beer_id,
+                    tap_number=tap_number,
+                    time_added=started - timedelta(hours=rng.randint(0, 24 * 60)),
+                    estimated_percent_remaining=rng.uniform(0, 100),
+                )
+
+    created_taps = bulk_create(Tap, taps())
+    prices = bulk_create(
+        BeerPrice,
+        (
+            BeerPrice(
+                beer_id=tap.beer_id,
+                venue_id=tap.venue_id,
+                serving_size=serving_size,
+                price=Decimal(rng.randint(300, 1200)) / 100,
+            )
+            for tap in created_taps
+            for serving_size in rng.sample(serving_sizes, rng.randint(1, 2))
+        ),
+    )
+    events = bulk_create(
+        Event,
+        (
+            Event(
+                venue=venue,
+                title=f"{name(rng)} Night",
+                start_time=started + timedelta(days=day),
+                end_time=started + timedelta(days=day, hours=3),
+            )
+            for venue in venues
+            for day in range(scale.events_per_venue)
+        ),
+    )
+    for batch in batches(on_tap):
+        Beer.refresh_tap_summaries(batch)
+    refresh_search_index(Beer.objects.all())
+    with connection.cursor() as cursor:
+        # so the planner knows how big everything is
+        cursor.execute("ANALYZE")
+    return {
+        "venues": len(venues),
+        "manufacturers": len(manufacturers),
+        "beers": len(beer_ids),
+        "taps": len(created_taps),
+        "prices": len(prices),
+        "events": len(events),
+    }
@@ -0,0 +1,21 @@
+"""Tasks for the API as a whole"""
+import logging
+
+from celery import shared_task
+
+from beers import autocomplete
+from venues.models import Venue
+from . import api_cache
+
+LOG = logging.getLogger(__name__)
+
+
+@shared_task
+def warm_api_cache(venue_ids):
+    """Cache the hot endpoints for the given venues ahead of the next visitor"""
+    paths = list(api_cache.WARM_PATHS)
+    for venue in Venue.objects.filter(id__in=venue_ids).order_by("id"):
+        paths.extend(path.format(venue=venue) for path in api_cache.VENUE_WARM_PATHS)
+    LOG.info("Warming %s API paths", len(paths))
+    api_cache.warm(paths)
+    autocomplete.get_index()
@@ -0,0 +1,210 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from beers.models import UntappdMetadata
+from beers.test.factories import BeerFactory
+from hsv_dot_beer import api_cache
+from hsv_dot_beer.tasks import warm_api_cache
+from hsv_dot_beer.users.test.factories import UserFactory
+from taps.test.factories import TapFactory
+from venues import snapshots
+from venues.test.factories import VenueFactory
+
+
+class APICacheTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.venue = VenueFactory()
+        self.other_venue = VenueFactory()
+        self.tap = TapFactory(venue=self.venue, beer=BeerFactory())
+        TapFactory(venue=self.other_venue, beer=BeerFactory())
+        self.url = f"/api/v1/venues/{self.venue.id}/beers/"
+        self.other_url = f"/api/v1/venues/{self.other_venue.id}/beers/"
+
+    def get_names(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [beer["name"] for beer in response.json()["results"]]
+
+    def test_cached(self):
+        names = self.get_names(self.url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_names(self.url), names)
+
+    def test_venue_changed(self):
+        self.get_names(self.url)
+        self.get_names(self.other_url)
+        new_beer = BeerFactory()
+        TapFactory(venue=self.venue, beer=new_beer)
+        with self.captureOnCommitCallbacks(execute=True):
+            snapshots.venue_changed(self.venue)
+        self.assertIn(new_beer.name, self.get_names(self.url))
+        # the other venue's tap list is still cached
+        with self.assertNumQueries(0):
+            self.get_names(self.other_url)
+
+    def test_api_write_invalidates_everything(self):
+        self.get_names(self.url)
+        user = UserFactory(is_staff=True)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {user.auth_token}")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f"/api/v1/beers/{self.tap.beer_id}/", {"name": "Renamed"}
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.client.credentials()
+        self.assertEqual(self.get_names(self.url), ["Renamed"])
+
+    def test_browsable_api_not_cached(self):
+        with patch("hsv_dot_beer.api_cache.cache.set") as mock_set:
+            response = self.client.get(self.url, HTTP_ACCEPT="text/html")
+        self.assertEqual(response.status_code, 200)
+        # only the versions are stored
+        for call in mock_set.call_args_list:
+            self.assertIn(":version:", call.args[0])
+
+    def test_warm(self):
+        warm_api_cache([self.venue.id])
+        with self.assertNumQueries(0):
+            self.get_names(self.url)
+            self.get_names(f"/api/v1/venues/byslug/{self.venue.slug}/beers/")
+            self.client.get("/api/v1/venues/")
+
+    @patch("hsv_dot_beer.tasks.warm_api_cache.delay")
+    def test_clear_tap(self, mock_warm):
+        self.get_names(self.url)
+        self.client.force_login(UserFactory(is_superuser=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/taps/{self.tap.id}/clear/")
+        self.client.logout()
+        self.assertEqual(self.get_names(self.url), [])
+        mock_warm.assert_called_once_with([self.venue.id])
+
+    def test_validators(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", response)
+        self.assertIn("s-maxage=60", response["Cache-Control"])
+        self.assertIn("public", response["Cache-Control"])
+        # cached responses get the same ones
+        cached = self.client.get(self.url)
+        self.assertEqual(cached["ETag"], response["ETag"])
+        self.assertEqual(cached["Last-Modified"], response["Last-Modified"])
+
+    def test_not_modified(self):
+        response = self.client.get(self.url)
+        for headers in (
+            {"HTTP_IF_NONE_MATCH": response["ETag"]},
+            {"HTTP_IF_MODIFIED_SINCE": response["Last-Modified"]},
+        ):
+            with self.subTest(headers=headers), self.assertNumQueries(0), patch(
+                "hsv_dot_beer.api_cache.cache.get", wraps=cache.get
+            ) as mock_get:
+                not_modified = self.client.get(self.url, **headers)
+                self.assertEqual(not_modified.status_code, 304)
+                self.assertEqual(not_modified["ETag"], response["ETag"])
+                # not even the cached body is needed
+                for call in mock_get.call_args_list:
+                    self.assertIn(":version:", call.args[0])
+
+    def test_modified(self):
+        response = self.client.get(self.url)
+        other_response = self.client.get(self.other_url)
+        taps_response = self.client.get("/api/v1/taps/")
+        with self.captureOnCommitCallbacks(execute=True):
+            api_cache.venue_changed(self.venue)
+        for url, old in (
+            (self.url, response),
+            ("/api/v1/taps/", taps_response),
+        ):
+            modified = self.client.get(url, HTTP_IF_NONE_MATCH=old["ETag"])
+            self.assertEqual(modified.status_code, 200)
+            self.assertNotEqual(modified["ETag"], old["ETag"])
+        # the other venue didn't change
+        not_modified = self.client.get(
+            self.other_url, HTTP_IF_NONE_MATCH=other_response["ETag"]
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_authenticated_not_shared(self):
+        self.client.force_authenticate(UserFactory(is_staff=True))
+        for url in (self.url, reverse("venueapiconfiguration-list")):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("private", response["Cache-Control"])
+                self.assertNotIn("public", response["Cache-Control"])
+                self.assertNotIn("s-maxage", response["Cache-Control"])
+                self.assertIn("Authorization", response["Vary"])
+
+    def test_venue_detail(self):
+        url = f"/api/v1/venues/{self.venue.id}/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            api_cache.venue_changed(self.venue)
+        modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(modified.status_code, 200)
+
+    def test_model_changes_invalidate(self):
+        beer = self.tap.beer
+        response = self.client.get("/api/v1/beers/")
+        self.assertEqual(response.status_code, 200)
+        # edits made outside the API, like in the admin or by Untappd lookups
+        beer.name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            beer.save()
+        modified = self.client.get(
+            "/api/v1/beers/", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(modified.status_code, 200)
+        self.assertIn("Renamed", [row["name"] for row in modified.json()["results"]])
+        manufacturers = self.client.get("/api/v1/beers/manufacturers/")
+        with self.captureOnCommitCallbacks(execute=True):
+            beer.manufacturer.save()
+        modified = self.client.get(
+            "/api/v1/beers/manufacturers/",
+            HTTP_IF_NONE_MATCH=manufacturers["ETag"],
+        )
+        self.assertEqual(modified.status_code, 200)
+
+    def test_merge_view_invalidates_everything(self):
+        response = self.client.get(self.url)
+        other = BeerFactory(manufacturer=self.tap.beer.manufacturer)
+        self.client.force_login(UserFactory(is_staff=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                "/beers/mergebeers/",
+                {"all-beers": f"{self.tap.beer_id},{other.id}", "beers": other.id},
+            )
+        self.client.logout()
+        modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(modified.status_code, 200)
+        self.assertEqual([row["id"] for row in modified.json()["results"]], [other.id])
+
+    def test_untappd_metadata_invalidates(self):
+        response = self.client.get("/api/v1/beers/")
+        with self.captureOnCommitCallbacks(execute=True):
+            UntappdMetadata.objects.create(beer=self.tap.beer, json_data={})
+        modified = self.client.get(
+            "/api/v1/beers/", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(modified.status_code, 200)
+
+    def test_beer_edit_invalidates_venues_with_it(self):
+        self.get_names(self.url)
+        self.get_names(self.other_url)
+        beer = self.tap.beer
+        beer.name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            beer.save()
+        self.assertEqual(self.get_names(self.url), ["Renamed"])
+        # the other venue doesn't have it
+        with self.assertNumQueries(0):
+            self.get_names(self.other_url)
@@ -0,0 +1,61 @@
+from io import StringIO
+import json
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from beers.models import Beer, BeerPrice, Manufacturer
+from taps.models import Tap
+from venues.models import Venue
+from . import synthetic_data
+from .benchmarks import ENDPOINTS
+
+
+class SyntheticDataTestCase(TestCase):
+    def test_generate(self):
+        scale = synthetic_data.TODAY.times(0.02)
+        counts = synthetic_data.generate(scale)
+        self.assertEqual(counts["venues"], Venue.objects.count())
+        self.assertEqual(counts["beers"], scale.beers)
+        self.assertEqual(Tap.objects.count(), scale.venues * scale.taps_per_venue)
+        self.assertGreaterEqual(BeerPrice.objects.count(), Tap.objects.count())
+        # the summaries and search columns are filled in
+        self.assertEqual(
+            Beer.objects.filter(is_on_tap=True).count(),
+            Tap.objects.values("beer").distinct().count(),
+        )
+        self.assertFalse(Beer.objects.filter(search_text="").exists())
+
+    def test_same_seed_same_data(self):
+        scale = synthetic_data.TODAY.times(0.01)
+        synthetic_data.generate(scale, seed=5)
+        names = list(Beer.objects.order_by("id").values_list("name", flat=True))
+        Tap.objects.all().delete()
+        for model in (BeerPrice, Beer, Manufacturer, Venue):
+            model.objects.all().delete()
+        call_command("generatesyntheticdata", scale=0.01, seed=5, stdout=StringIO())
+        self.assertEqual(
+            list(Beer.objects.order_by("id").values_list("name", flat=True)), names
+        )
+        with self.assertRaises(CommandError):
+            call_command("generatesyntheticdata", stdout=StringIO())
+
+
+class BenchmarkTestCase(TestCase):
+    def test_benchmark(self):
+        output = StringIO()
+        call_command(
+            "benchmarkapi", scales="0.01", runs=2, output=output, stderr=StringIO()
+        )
+        results = json.loads(output.getvalue())
+        self.assertEqual(results["runs"], 2)
+        [scale] = results["scales"]
+        self.assertEqual(scale["factor"], 0.01)
+        self.assertEqual(set(scale["endpoints"]), {name for name, _ in ENDPOINTS})
+        for uncached, cached in scale["endpoints"].values():
+            self.assertFalse(uncached["cached"])
+            self.assertTrue(cached["cached"])
+            self.assertLessEqual(uncached["min_ms"], uncached["median_ms"])
+        # the data's rolled back afterwards
+        self.assertFalse(Venue.objects.exists())
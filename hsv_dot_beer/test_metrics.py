@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from beers.test.factories import BeerFactory
+from hsv_dot_beer import api_cache
+from hsv_dot_beer.users.test.factories import UserFactory
+from . import metrics
+from .tasks import warm_api_cache
+
+
+@override_settings(METRICS_FLUSH_INTERVAL=0)
+class MetricsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        BeerFactory()
+        self.admin = UserFactory(is_staff=True)
+
+    def get_metrics(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get("/api/v1/metrics/")
+        self.client.force_authenticate(None)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_views(self):
+        for _ in range(2):
+            # skip the response cache
+            api_cache.bump("beers")
+            response = self.client.get("/api/v1/beers/")
+            self.assertEqual(response.status_code, 200)
+        beer_list = self.get_metrics()["BeerViewSet.list"]
+        self.assertEqual(beer_list["count"], 2)
+        self.assertEqual(beer_list["queries"], 8)
+        self.assertEqual(beer_list["avg_queries"], 4)
+        self.assertEqual(beer_list["response_bytes"], 2 * len(response.content))
+        self.assertGreater(beer_list["serializer_ms"], 0)
+        self.assertGreaterEqual(beer_list["duration_ms"], beer_list["db_ms"])
+
+    def test_tasks(self):
+        warm_api_cache.apply(args=([],))
+        task = self.get_metrics()["hsv_dot_beer.tasks.warm_api_cache"]
+        self.assertEqual(task["count"], 1)
+        self.assertGreater(task["queries"], 0)
+
+    def test_nested_serializers_count_once(self):
+        with metrics.record("test") as recording:
+            with metrics.timing_serializer():
+                with metrics.timing_serializer():
+                    pass
+                self.assertEqual(recording.serializer_time, 0)
+            self.assertGreater(recording.serializer_time, 0)
+
+    def test_reset(self):
+        self.client.get("/api/v1/beers/")
+        self.client.force_authenticate(self.admin)
+        response = self.client.delete("/api/v1/metrics/")
+        self.assertEqual(response.status_code, 204)
+        self.assertNotIn("BeerViewSet.list", self.get_metrics())
+
+    def test_admins_only(self):
+        response = self.client.get("/api/v1/metrics/")
+        self.assertEqual(response.status_code, 403)
+        self.client.force_authenticate(UserFactory())
+        response = self.client.get("/api/v1/metrics/")
+        self.assertEqual(response.status_code, 403)
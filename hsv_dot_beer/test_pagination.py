@@ -0,0 +1,115 @@
+import datetime
+
+from django.core.cache import cache
+from django.utils.timezone import now
+from rest_framework.test import APITestCase
+
+from beers.models import Beer
+from beers.test.factories import BeerFactory, ManufacturerFactory, StyleFactory
+from events.models import Event
+from events.test.factories import EventFactory
+from taps.test.factories import TapFactory
+from venues.test.factories import VenueFactory
+
+
+class CursorPaginationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        manufacturer = ManufacturerFactory()
+        style = StyleFactory()
+        # duplicate names so the id tiebreaker matters
+        self.beers = [
+            BeerFactory(
+                name=f"beer {i // 2:02}", manufacturer=manufacturer, style=style
+            )
+            if i % 2 == 0
+            else BeerFactory(name=f"beer {i // 2:02}", style=style)
+            for i in range(25)
+        ]
+        # sorted by the database, since its collation isn't Python's
+        self.expected = list(
+            Beer.objects.order_by("manufacturer__name", "name", "id").values_list(
+                "id", flat=True
+            )
+        )
+
+    def walk(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertNotIn("count", response.data)
+            pages.append(response.data)
+            url = response.data["next"]
+        return pages
+
+    def test_forward_and_back(self):
+        pages = self.walk("/api/v1/beers/?cursor=")
+        self.assertEqual([len(page["results"]) for page in pages], [10, 10, 5])
+        self.assertEqual(
+            [beer["id"] for page in pages for beer in page["results"]], self.expected
+        )
+        self.assertIsNone(pages[0]["previous"])
+        response = self.client.get(pages[2]["previous"])
+        self.assertEqual(response.data["results"], pages[1]["results"])
+        response = self.client.get(response.data["previous"])
+        self.assertEqual(response.data["results"], pages[0]["results"])
+        self.assertIsNone(response.data["previous"])
+        self.assertIsNotNone(response.data["next"])
+
+    def test_no_count_query(self):
+        pages = self.walk("/api/v1/beers/?cursor=")
+        cache.clear()
+        with self.assertNumQueries(3):
+            # beers, taps, prices
+            self.client.get(pages[1]["next"])
+
+    def test_page_numbers_by_default(self):
+        response = self.client.get("/api/v1/beers/?page=2")
+        self.assertEqual(response.data["count"], 25)
+        self.assertIsNotNone(response.data["previous"])
+
+    def test_same_order_as_pages(self):
+        # events that can only be told apart by venue
+        EventFactory.create_batch(12, start_time=now())
+        for url in ("/api/v1/beers/", "/api/v1/events/"):
+            by_page = []
+            page_url = url
+            while page_url:
+                response = self.client.get(page_url)
+                by_page.extend(row["id"] for row in response.data["results"])
+                page_url = response.data["next"]
+            by_cursor = [
+                row["id"]
+                for page in self.walk(f"{url}?cursor=")
+                for row in page["results"]
+            ]
+            self.assertEqual(by_cursor, by_page)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/v1/beers/?cursor=garbage")
+        self.assertEqual(response.status_code, 404)
+
+    def test_venue_beers(self):
+        venue = VenueFactory()
+        on_tap = {beer.id for beer in self.beers[:12]}
+        for beer in self.beers[:12]:
+            TapFactory(venue=venue, beer=beer)
+        pages = self.walk(f"/api/v1/venues/{venue.id}/beers/?cursor=")
+        self.assertEqual(
+            [beer["id"] for page in pages for beer in page["results"]],
+            [beer_id for beer_id in self.expected if beer_id in on_tap],
+        )
+
+    def test_events(self):
+        start_time = now() - datetime.timedelta(days=1)
+        events = [EventFactory(start_time=start_time) for _ in range(12)]
+        pages = self.walk("/api/v1/events/?cursor=")
+        self.assertEqual(
+            [event["id"] for page in pages for event in page["results"]],
+            list(
+                Event.objects.filter(id__in=[event.id for event in events])
+                .order_by("venue__name", "id")
+                .values_list("id", flat=True)
+            ),
+        )
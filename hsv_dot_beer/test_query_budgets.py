@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from beers.models import Beer, BeerPrice, ServingSize
+from beers.test.factories import BeerFactory, ManufacturerFactory
+from hsv_dot_beer import api_cache
+from hsv_dot_beer.users.test.factories import UserFactory
+from taps.test.factories import TapFactory
+from venues.models import VenueTapManager
+from venues.test.factories import VenueFactory
+from .testing import QueryBudgetMixin
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """Enough of everything that a lookup per row would blow the budgets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = UserFactory()
+        cls.venues = [VenueFactory() for _ in range(3)]
+        cls.manufacturer = ManufacturerFactory()
+        pint = ServingSize.objects.create(name="pint", volume_oz=16)
+        cls.beers = [BeerFactory(manufacturer=cls.manufacturer) for _ in range(8)]
+        for venue in cls.venues:
+            for tap_number, beer in enumerate(cls.beers, 1):
+                TapFactory(venue=venue, beer=beer, tap_number=tap_number)
+                BeerPrice.objects.create(
+                    beer=beer, venue=venue, serving_size=pint, price=Decimal(5)
+                )
+        Beer.refresh_tap_summaries(beer.id for beer in cls.beers)
+        VenueTapManager.objects.create(user=cls.user, venue=cls.venues[0])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_beer_list(self):
+        response = self.client.get("/api/v1/beers/")
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_venue_beers(self):
+        url = f"/api/v1/venues/{self.venues[0].id}/beers/"
+        # the first request builds the snapshot; the second misses the
+        # response cache but can still use the snapshot
+        self.client.get(url)
+        api_cache.bump(f"venue:pk:{self.venues[0].id}")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_autocomplete(self):
+        response = self.client.get("/api/v1/beers/autocomplete/?search=a")
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_venue_table(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("venue_table", args=[self.venues[0].id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_tap_form(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("edit_tap", args=[self.venues[0].id, 1]),
+            data={"manufacturer": self.manufacturer.id},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_over_budget(self):
+        self.query_budgets = {"BeerViewSet.list": 1}
+        response = self.client.get("/api/v1/beers/")
+        with self.assertRaisesMessage(AssertionError, "over its budget of 1"):
+            self.assertWithinQueryBudget(response)
@@ -0,0 +1,36 @@
+"""Shared test helpers"""
+
+# The most queries a request to each view may run (as recorded by
+# hsv_dot_beer.metrics), no matter how much data there is. If one of these
+# has to go up, make sure it's not because something is now being looked up
+# row by row.
+QUERY_BUDGETS = {
+    # count, beers, their venues, their prices
+    "BeerViewSet.list": 4,
+    # the snapshot, queueing Untappd lookups
+    "VenueViewSet.beers": 2,
+    # the three queries building the index
+    "BeerViewSet.autocomplete": 3,
+    # session, user, venue and its managers, taps
+    "venue_table": 4,
+    # session, user, venue, managers, manufacturer, tap, the form's choices
+    "tap_form": 9,
+}
+
+
+class QueryBudgetMixin:
+    """For test cases checking views against QUERY_BUDGETS"""
+
+    query_budgets = QUERY_BUDGETS
+
+    def assertWithinQueryBudget(self, response):  # pylint: disable=invalid-name
+        """Fail if the view that made response ran more queries than it may"""
+        recording = response.wsgi_request.metrics_recording
+        budget = self.query_budgets.get(recording.name)
+        if budget is None:
+            self.fail(f"{recording.name} has no query budget")
+        if recording.queries > budget:
+            self.fail(
+                f"{recording.name} ran {recording.queries} queries, "
+                f"over its budget of {budget}"
+            )
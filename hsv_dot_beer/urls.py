@@ -21,7 +21,7 @@ from taps.views import (
 )
 from venues.views import venue_table
 from .users.views import UserViewSet, UserCreateViewSet
-from .views import home
+from .views import home, metrics
 
 
 router = DefaultRouter()
@@ -36,6 +36,7 @@ urlpatterns = [
     path("api/v1/events/", include("events.urls")),
     path("api/v1/beers/", include("beers.urls")),
     path("api/v1/taps/", include("taps.urls")),
+    path("api/v1/metrics/", metrics, name="metrics"),
     path("api-token-auth/", views.obtain_auth_token),
     path("api-auth/", include("rest_framework.urls", namespace="rest_framework")),
     path("beers/mergestyles/", StyleMergeView.as_view()),
@@ -1,6 +1,11 @@
 from django.conf import settings
 from django.shortcuts import redirect, render
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
 from venues.models import Venue
+from . import metrics as view_metrics
 
 
 def home(request):
@@ -19,3 +24,13 @@ def home(request):
                 return render(request, "hsv_dot_beer/alabama_dot_beer.html")
             return render(request, "hsv_dot_beer/home.html")
     return render(request, "venues/venue-list.html", {"venues": venues_managed})
+
+
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    """What each view and task has cost since the metrics were last reset"""
+    if request.method == "DELETE":
+        view_metrics.reset()
+        return Response(status=204)
+    return Response(view_metrics.get_metrics())
@@ -1,26 +1,52 @@
 """Base tap list provider
 
-Children should subclass this and implement handle_venue()
-which takes a single argument: a Venue object.
+Children should subclass this and implement either parse_venue_data(), which
+turns a venue's raw tap list into a TapListSnapshot without touching the
+database, or handle_venue(), which takes a single argument (a Venue object)
+and does everything itself.
 
-It'll have API configuration, taps, and existing beers prefetched.
+The venue will have API configuration, taps, and existing beers prefetched.
 """
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
 import re
 from decimal import Decimal, InvalidOperation
 from urllib.parse import urlparse, unquote
 import logging
 import datetime
+import threading
 
+from django.conf import settings
 from django.db.models import Prefetch, Q
-from django.db.models.functions import Length
 from django.db import transaction
-from django.utils.timezone import now
-from kombu.exceptions import OperationalError
+from django.utils.timezone import get_default_timezone, is_naive, make_aware, now
+import requests
 
-from venues.models import Venue
-from beers.models import Beer, Manufacturer, BeerPrice, ServingSize, Style
-from beers.tasks import look_up_beer
+from venues import snapshots
+from venues.models import Venue, VenueAPIConfiguration
+from beers import reference_data
+from hsv_dot_beer import api_cache
+from beers.models import (
+    Beer,
+    Manufacturer,
+    BeerPrice,
+    PendingUntappdLookup,
+    ServingSize,
+    Style,
+)
 from taps.models import Tap
+from .http import build_adapter, build_session, response_host
+from .snapshot import TapListSnapshot
+from .resolver import (
+    BEER_UNIQUE_FIELDS,
+    MANUFACTURER_UNIQUE_FIELDS,
+    EntityResolver,
+    StyleMatcher,
+    normalize_name,
+    strip_style_name,
+)
 
 LOG = logging.getLogger(__name__)
 
@@ -50,17 +76,234 @@ ENDINGS_REGEX = re.compile(
     re.IGNORECASE,
 )
 
+PRICE_QUANTUM = Decimal("0.01")
+
+# fields that record the state of the last parse rather than configure it
+PAYLOAD_STATE_FIELDS = (
+    "payload_fingerprint",
+    "payload_etag",
+    "payload_last_modified",
+)
+
+# the tap fields that Beer's tap summaries are computed from
+TAP_SUMMARY_FIELDS = frozenset(("beer_id", "venue_id", "time_added"))
+
+
+class PayloadNotModified(Exception):
+    """The upstream told us the tap list hasn't changed since the last fetch"""
+
 
 class BaseTapListProvider:
     def __init__(self):
         self.check_timestamp = now()
         self.styles = {}
+        self.style_matcher = None
+        self.prefetched_data = {}
+        # venue ID -> beer ID -> serving size ID -> price
+        self.staged_prices = defaultdict(dict)
+        # beers to queue Untappd lookups for
+        self.untappd_lookups = set()
+        self.payload_validators = {}
+        self.skip_unchanged = False
+        # seconds each request took, by host
+        self.request_latencies = defaultdict(list)
+        # the connection pools every thread's session uses (see http)
+        self.http_adapter = build_adapter()
+        self.local = threading.local()
+        self.resolver = EntityResolver()
         if not hasattr(self, "provider_name"):
             # Don't define this attribute if the child does for us
             self.provider_name = None
 
     def handle_venue(self, venue: Venue) -> datetime.datetime:
-        raise NotImplementedError("You need to implement this yourself")
+        snapshot = self.parse_venue(venue)
+        if snapshot is None:
+            raise NotImplementedError("You need to implement this yourself")
+        return self.apply_snapshot(venue, snapshot)
+
+    def parse_venue_data(self, venue: Venue, data) -> TapListSnapshot:
+        """Parse the raw tap list from get_venue_data()
+
+        This must not touch the database; apply_snapshot() does all of the
+        resolving and writing afterwards. Providers that implement this don't
+        need to implement handle_venue().
+        """
+        raise NotImplementedError("Snapshots are not supported")
+
+    def parse_venue(self, venue: Venue) -> TapListSnapshot | None:
+        """Get and parse the venue's tap list, or None if that's up to
+        handle_venue()"""
+        if type(self).parse_venue_data is BaseTapListProvider.parse_venue_data:
+            return None
+        return self.parse_venue_data(venue, self.get_venue_data(venue))
+
+    def fetch_venue_data(self, venue: Venue):
+        """Fetch the raw tap list for a venue
+
+        Providers that implement this get their upstream requests made in
+        parallel by handle_venues(). It runs in a worker thread, so it must
+        not touch the database or store anything on self (besides what
+        conditional_get() records for the venue).
+
+        Implementing this also lets handle_venues() skip venues whose tap
+        lists haven't changed since the last run.
+        """
+        raise NotImplementedError("Concurrent fetching is not supported")
+
+    def conditional_get(self, venue: Venue, url: str, **kwargs):
+        """GET url, asking the upstream to tell us if nothing has changed
+
+        The ETag and Last-Modified from the last parse are only sent when
+        handle_venues() is skipping unchanged venues. In that case, a 304
+        raises PayloadNotModified. Any validators in the response are held
+        onto until the venue has been handled, and only saved along with its
+        fingerprint.
+        """
+        headers = dict(kwargs.pop("headers", None) or {})
+        config = venue.api_configuration
+        if self.skip_unchanged and config.payload_fingerprint:
+            if config.payload_etag:
+                headers["If-None-Match"] = config.payload_etag
+            if config.payload_last_modified:
+                headers["If-Modified-Since"] = config.payload_last_modified
+        response = self.http.get(url, headers=headers, **kwargs)
+        if response.status_code == 304:
+            raise PayloadNotModified(url)
+        self.payload_validators[venue.id] = {
+            "payload_etag": response.headers.get("ETag", "")[:250],
+            "payload_last_modified": response.headers.get("Last-Modified", "")[:50],
+        }
+        return response
+
+    def __getstate__(self):
+        # the sessions belong to the threads that made them
+        state = self.__dict__.copy()
+        del state["local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.local = threading.local()
+
+    @property
+    def http(self) -> requests.Session:
+        """The calling thread's session"""
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = build_session(
+                self.record_latency, adapter=self.http_adapter
+            )
+        return session
+
+    def record_latency(self, response, *args, **kwargs):
+        """Response hook for self.http
+
+        Fetch workers keep their own, for fetch_venues_concurrently() to add
+        in from the calling thread.
+        """
+        latencies = getattr(self.local, "latencies", self.request_latencies)
+        latencies[response_host(response)].append(response.elapsed.total_seconds())
+
+    def log_latencies(self):
+        for host, latencies in sorted(self.request_latencies.items()):
+            LOG.info(
+                "%s: %s requests to %s, %.0f ms average, %.0f ms max",
+                self.provider_name,
+                len(latencies),
+                host,
+                sum(latencies) / len(latencies) * 1000,
+                max(latencies) * 1000,
+            )
+
+    def normalize_payload(self, data):
+        """Strip anything from the raw tap list that changes on every fetch
+
+        Override this if the upstream includes things like request timestamps
+        or CSRF tokens, otherwise the fingerprint will never match.
+        """
+        return data
+
+    def fingerprint_payload(self, venue: Venue, data) -> str:
+        """Hash the tap list along with everything that affects parsing it"""
+        config = venue.api_configuration
+        settings_used = {
+            field.attname: getattr(config, field.attname)
+            for field in config._meta.concrete_fields
+            if field.name not in PAYLOAD_STATE_FIELDS
+        }
+        payload = self.normalize_payload(data)
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8", "replace")
+        serialized = json.dumps(
+            [self.provider_name, settings_used, payload],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def save_payload_state(
+        self, venue: Venue, fingerprint: str, validators: dict
+    ) -> None:
+        """Record what we parsed so the next run can tell if it changed"""
+        config = venue.api_configuration
+        state = {"payload_fingerprint": fingerprint, **validators}
+        changed = {
+            field: value
+            for field, value in state.items()
+            if getattr(config, field) != value
+        }
+        if not changed:
+            return
+        for field, value in changed.items():
+            setattr(config, field, value)
+        VenueAPIConfiguration.objects.filter(id=config.id).update(**changed)
+
+    def get_venue_data(self, venue: Venue):
+        """Get the raw tap list for a venue, fetching it if we haven't yet"""
+        try:
+            return self.prefetched_data.pop(venue.id)
+        except KeyError:
+            return self.fetch_venue_data(venue)
+
+    def fetch_venues_concurrently(self, venues):
+        """Fetch tap lists with a thread pool, yielding (venue, error) in order
+
+        The data itself is stashed for get_venue_data() to pick up, which
+        keeps all of the database work on the calling thread.
+        """
+        workers = max(1, min(settings.TAP_LIST_FETCH_WORKERS, len(venues)))
+        with ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix=f"{self.provider_name}-fetch",
+        ) as executor:
+            futures = [
+                (venue, executor.submit(self.fetch_in_worker, venue))
+                for venue in venues
+            ]
+            for venue, future in futures:
+                result, latencies = future.result()
+                for host, seconds in latencies.items():
+                    self.request_latencies[host].extend(seconds)
+                if isinstance(result, PayloadNotModified):
+                    self.prefetched_data[venue.id] = PayloadNotModified
+                    yield venue, None
+                elif isinstance(result, Exception):
+                    yield venue, result
+                else:
+                    self.prefetched_data[venue.id] = result
+                    yield venue, None
+
+    def fetch_in_worker(self, venue: Venue) -> tuple:
+        """Call fetch_venue_data() from a fetch worker thread
+
+        Returns what it returned (or raised), along with how long each of its
+        requests took by host.
+        """
+        self.local.latencies = latencies = defaultdict(list)
+        try:
+            return self.fetch_venue_data(venue), latencies
+        except Exception as exc:  # pylint: disable=broad-except
+            return exc, latencies
 
     @classmethod
     def get_provider(cls, provider_name):
@@ -92,11 +335,295 @@ class BaseTapListProvider:
         )
         return queryset
 
-    def handle_venues(self, venues):
-        for venue in venues:
+    def handle_venues(self, venues, skip_unchanged=True):
+        """Handle each venue, isolating failures from one another
+
+        If the provider implements fetch_venue_data() and skip_unchanged is
+        set, venues whose tap lists are the same as the last time they were
+        parsed only get their check times updated. The API cache is
+        invalidated (and then re-warmed) for the rest.
+        """
+        venues = list(venues)
+        if type(self).fetch_venue_data is BaseTapListProvider.fetch_venue_data:
+            skip_unchanged = False
+            fetched = ((venue, None) for venue in venues)
+        else:
+            self.skip_unchanged = skip_unchanged
+            fetched = self.fetch_venues_concurrently(venues)
+        errors = []
+        changed_venue_ids = []
+        for venue, fetch_error in fetched:
+            # useless without a fingerprint, so don't let them pile up for
+            # venues that fail or don't get one
+            validators = self.payload_validators.pop(venue.id, {})
+            if fetch_error is not None:
+                LOG.error("Unable to fetch tap list for %s: %s", venue, fetch_error)
+                errors.append(fetch_error)
+                continue
+            fingerprint = None
+            if skip_unchanged and hasattr(venue, "api_configuration"):
+                data = self.prefetched_data[venue.id]
+                if data is PayloadNotModified:
+                    fingerprint = venue.api_configuration.payload_fingerprint
+                else:
+                    fingerprint = self.fingerprint_payload(venue, data)
+            unchanged = (
+                fingerprint
+                and fingerprint == venue.api_configuration.payload_fingerprint
+            )
             LOG.debug("Fetching beers at %s", venue)
-            update_time = self.handle_venue(venue)
-            self.update_venue_timestamps(venue, update_time)
+            try:
+                snapshot = None
+                if not unchanged:
+                    # parsing doesn't need the database, so keep it (and any
+                    # requests it makes) out of the transaction
+                    snapshot = self.parse_venue(venue)
+                # one bad venue shouldn't leave its tap list half-written
+                # or keep the others from being updated
+                with transaction.atomic():
+                    if unchanged:
+                        LOG.info("Tap list for %s is unchanged", venue)
+                        del self.prefetched_data[venue.id]
+                        self.update_venue_timestamps(venue)
+                    else:
+                        if snapshot is None:
+                            update_time = self.handle_venue(venue)
+                        else:
+                            update_time = self.apply_snapshot(venue, snapshot)
+                        self.update_venue_timestamps(venue, update_time)
+                        snapshots.venue_changed(venue)
+                        changed_venue_ids.append(venue.id)
+                    if fingerprint:
+                        self.save_payload_state(venue, fingerprint, validators)
+            except Exception as exc:  # pylint: disable=broad-except
+                LOG.exception("Unable to handle venue %s", venue)
+                self.staged_prices.pop(venue.id, None)
+                errors.append(exc)
+        self.skip_unchanged = False
+        self.log_latencies()
+        api_cache.schedule_warming(changed_venue_ids)
+        if errors:
+            # re-raise so the task can retry
+            raise errors[0]
+
+    def apply_snapshot(
+        self, venue: Venue, snapshot: TapListSnapshot
+    ) -> datetime.datetime | None:
+        """Resolve everything in the snapshot and write the venue's tap list
+
+        Manufacturers and beers are looked up (or created) with
+        get_manufacturer() and get_beer(), in the order the beers were
+        parsed, then the taps and prices are reconciled in bulk. Returns when
+        the venue last updated its tap list, if the snapshot knows.
+        """
+        pricing = defaultdict(list)
+        for price in snapshot.prices:
+            pricing[price.beer].append(
+                {
+                    "volume_oz": price.volume_oz,
+                    "price": price.price,
+                    "name": price.serving_size_name,
+                }
+            )
+        manufacturers = {}
+        beers = []
+        for index, parsed in enumerate(snapshot.beers):
+            try:
+                manufacturer = manufacturers[parsed.manufacturer]
+            except KeyError:
+                parsed_manufacturer = snapshot.manufacturers[parsed.manufacturer]
+                manufacturer = manufacturers[
+                    parsed.manufacturer
+                ] = self.get_manufacturer(
+                    parsed_manufacturer.name, **parsed_manufacturer.fields
+                )
+            beers.append(
+                self.get_beer(
+                    parsed.name,
+                    manufacturer,
+                    pricing=pricing.get(index),
+                    venue=venue,
+                    **parsed.fields,
+                )
+            )
+        taps = {
+            tap.tap_number: {
+                **tap.fields,
+                "beer": None if tap.beer is None else beers[tap.beer],
+            }
+            for tap in snapshot.taps
+        }
+        self.reconcile_taps(venue, taps, delete_stale=snapshot.delete_stale)
+        return snapshot.updated
+
+    def reconcile_taps(
+        self,
+        venue: Venue,
+        taps: dict[int, dict],
+        delete_stale: bool = True,
+    ) -> None:
+        """Make the venue's taps match `taps` with as few writes as possible
+
+        `taps` maps tap numbers to {field name: value}. Fields that aren't
+        given are left alone on existing taps. Only taps with changed values
+        are updated (and then only the changed fields), missing taps are
+        created, and unless delete_stale is False, taps that aren't in `taps`
+        are deleted.
+
+        The tap summaries of every beer that gained or lost a tap are
+        refreshed, any prices staged by get_beer() for the venue get written
+        too, and Untappd lookups for its beers get queued.
+        """
+        existing_taps = {tap.tap_number: tap for tap in venue.taps.all()}
+        new_taps = []
+        changed_taps = []
+        changed_fields = set()
+        # beers whose tap summaries need to be refreshed
+        summary_beer_ids = set()
+        for tap_number, values in taps.items():
+            values = {
+                field: clean_tap_value(field, value) for field, value in values.items()
+            }
+            try:
+                tap = existing_taps[tap_number]
+            except KeyError:
+                tap = Tap(venue=venue, tap_number=tap_number, **values)
+                new_taps.append(tap)
+                summary_beer_ids.add(tap.beer_id)
+                continue
+            original_beer_id = tap.beer_id
+            tap_changed = False
+            summary_changed = False
+            for field, value in values.items():
+                attname = Tap._meta.get_field(field).attname
+                if isinstance(value, Beer):
+                    value = value.id
+                if getattr(tap, attname) != value:
+                    setattr(tap, attname, value)
+                    changed_fields.add(attname)
+                    tap_changed = True
+                    summary_changed |= attname in TAP_SUMMARY_FIELDS
+            if tap_changed:
+                changed_taps.append(tap)
+            if summary_changed:
+                summary_beer_ids.update((original_beer_id, tap.beer_id))
+        stale_taps = []
+        if delete_stale:
+            stale_taps = [
+                tap
+                for tap_number, tap in existing_taps.items()
+                if tap_number not in taps
+            ]
+        if stale_taps:
+            # a plain DELETE: nothing refers to taps, and the signals would
+            # only queue the snapshot rebuild handle_venues() makes anyway
+            Tap.objects.filter(id__in=[tap.id for tap in stale_taps])._raw_delete(
+                Tap.objects.db
+            )
+            summary_beer_ids.update(tap.beer_id for tap in stale_taps)
+        if changed_taps:
+            Tap.objects.bulk_update(changed_taps, sorted(changed_fields))
+        if new_taps:
+            Tap.objects.bulk_create(new_taps)
+        Beer.refresh_tap_summaries(summary_beer_ids)
+        LOG.debug(
+            "Reconciled taps for %s: %s created, %s updated (%s), %s deleted",
+            venue,
+            len(new_taps),
+            len(changed_taps),
+            ", ".join(sorted(changed_fields)),
+            len(stale_taps),
+        )
+        staged = self.staged_prices.pop(venue.id, None)
+        if staged:
+            self.reconcile_prices(
+                venue,
+                {
+                    (beer_id, serving_size_id): price
+                    for beer_id, beer_prices in staged.items()
+                    for serving_size_id, price in beer_prices.items()
+                },
+                beer_ids=staged.keys(),
+            )
+        if self.untappd_lookups:
+            PendingUntappdLookup.queue(self.untappd_lookups)
+            self.untappd_lookups.clear()
+
+    def stage_prices(self, venue: Venue, beer: Beer, prices: dict) -> None:
+        """Replace the prices of beer at venue once the taps are reconciled
+
+        prices maps serving sizes to prices. If a serving size shows up more
+        than once, the first price wins.
+        """
+        beer_prices = self.staged_prices[venue.id][beer.id] = {}
+        for serving_size, price in prices.items():
+            beer_prices.setdefault(serving_size.id, price)
+
+    def reconcile_prices(
+        self,
+        venue: Venue,
+        prices: dict[tuple[int, int], Decimal],
+        beer_ids=None,
+    ) -> None:
+        """Make the venue's prices match `prices` with as few writes as possible
+
+        `prices` maps (beer ID, serving size ID) to price. Only prices for
+        beer_ids are touched if it's given, otherwise every price at the venue
+        is.
+        """
+        existing_prices = BeerPrice.objects.filter(venue=venue)
+        if beer_ids is not None:
+            existing_prices = existing_prices.filter(beer_id__in=list(beer_ids))
+        existing_prices = {
+            (price.beer_id, price.serving_size_id): price for price in existing_prices
+        }
+        stale_prices = [
+            price.id for key, price in existing_prices.items() if key not in prices
+        ]
+        changed_prices = []
+        new_prices = []
+        for (beer_id, serving_size_id), price in prices.items():
+            try:
+                price = Decimal(price).quantize(PRICE_QUANTUM)
+            except InvalidOperation:
+                LOG.error(
+                    "Unable to handle price %s for beer %s capacity %s",
+                    price,
+                    beer_id,
+                    serving_size_id,
+                )
+                raise
+            try:
+                beer_price = existing_prices[(beer_id, serving_size_id)]
+            except KeyError:
+                new_prices.append(
+                    BeerPrice(
+                        venue=venue,
+                        beer_id=beer_id,
+                        serving_size_id=serving_size_id,
+                        price=price,
+                    )
+                )
+                continue
+            if beer_price.price != price:
+                beer_price.price = price
+                changed_prices.append(beer_price)
+        if stale_prices:
+            # a plain DELETE, like the stale taps get
+            BeerPrice.objects.filter(id__in=stale_prices)._raw_delete(
+                BeerPrice.objects.db
+            )
+        if changed_prices:
+            BeerPrice.objects.bulk_update(changed_prices, ["price"])
+        if new_prices:
+            BeerPrice.objects.bulk_create(new_prices)
+        LOG.debug(
+            "Reconciled prices for %s: %s created, %s updated, %s deleted",
+            venue,
+            len(new_prices),
+            len(changed_prices),
+            len(stale_prices),
+        )
 
     def update_venue_timestamps(
         self, venue: Venue, update_time: datetime.datetime = None
@@ -109,9 +636,11 @@ class BaseTapListProvider:
             update_time,
         )
         venue.tap_list_last_check_time = self.check_timestamp
+        update_fields = ["tap_list_last_check_time"]
         if update_time:
             venue.tap_list_last_update_time = update_time
-        venue.save()
+            update_fields.append("tap_list_last_update_time")
+        venue.save(update_fields=update_fields)
 
     def get_style(self, name):
         name = name.strip()
@@ -126,15 +655,32 @@ class BaseTapListProvider:
         except KeyError:
             # do it the old fashioned way
             pass
-        with transaction.atomic():
-            try:
-                style = Style.objects.get(name=name)
-            except Style.DoesNotExist:
-                try:
-                    style = Style.objects.get(alternate_names__contains=[name])
-                except Style.DoesNotExist:
-                    style = Style.objects.create(name=name, default_color="")
+        style = self.lookup_style(name)
         self.styles[name.casefold()] = style
+        # the style set changed, so guess_style() has to recompile
+        self.style_matcher = None
+        return style
+
+    def lookup_style(self, name):
+        """Find or create the style for a name that isn't cached yet"""
+        ci_name = name.casefold()
+        all_styles = reference_data.styles.all()
+        style = next(
+            (style for style in all_styles if style.name.casefold() == ci_name),
+            None,
+        ) or next(
+            (
+                style
+                for style in all_styles
+                if ci_name in {alt.casefold() for alt in style.alternate_names}
+            ),
+            None,
+        )
+        if not style:
+            with transaction.atomic():
+                style = Style.objects.get_or_create(
+                    name=name, defaults={"default_color": ""}
+                )[0]
         return style
 
     def reformat_beer_name(self, name: str, mfg_name: str) -> str:
@@ -154,35 +700,29 @@ class BaseTapListProvider:
 
     def guess_style(self, beer_name):
         """Try to guess the style from the beer name"""
-        ci_name = beer_name.casefold()
-        for name, style in sorted(
-            self.styles.items(),
-            key=lambda k: len(k[0]),
-            reverse=True,
-        ):
-            if name in ci_name:
-                LOG.debug("Guessed style %s for beer %s", style, beer_name)
-                return style
-        alt_names = []
-        for style in self.styles.values():
-            alt_names += list((i.casefold(), style) for i in style.alternate_names)
-        for alt_name, style in sorted(
-            alt_names,
-            key=lambda k: len(k[0]),
-            reverse=True,
-        ):
-            if alt_name in ci_name:
-                LOG.debug("Guessed alternate style %s for beer %s", style, beer_name)
-                return style
+        if self.style_matcher is None:
+            self.style_matcher = StyleMatcher(self.styles)
+        style, alternate = self.style_matcher.match(beer_name)
+        if style:
+            LOG.debug(
+                "Guessed %sstyle %s for beer %s",
+                "alternate " if alternate else "",
+                style,
+                beer_name,
+            )
+            return style
         LOG.info("Could not find a style for beer %s", beer_name)
 
     def fetch_styles(self):
         self.styles = {
             style.name.casefold(): style
-            for style in Style.objects.annotate(name_chars=Length("name")).order_by(
-                "-name_chars"
+            for style in sorted(
+                reference_data.styles.all(),
+                key=lambda style: len(style.name),
+                reverse=True,
             )
         }
+        self.style_matcher = StyleMatcher(self.styles)
 
     def get_beer(self, name, manufacturer, pricing=None, venue=None, **defaults):
         if not self.styles:
@@ -199,15 +739,6 @@ class BaseTapListProvider:
             if mfg_name.endswith(ending):
                 mfg_name = mfg_name.replace(ending, "").strip()
         name = self.reformat_beer_name(name, mfg_name)
-        unique_fields = (
-            "manufacturer_url",
-            "untappd_url",
-            "beer_advocate_url",
-            "taphunter_url",
-            "taplist_io_pk",
-            "beermenus_slug",
-            "rate_beer_url",
-        )
         field_names = {i.name for i in Beer._meta.fields}
         bogus_defaults = set(defaults).difference(field_names)
         if bogus_defaults:
@@ -227,34 +758,13 @@ class BaseTapListProvider:
         unique_fields_present = {
             field: value
             for field, value in defaults.items()
-            if field in set(unique_fields) and value
+            if field in BEER_UNIQUE_FIELDS and value
         }
-        serving_sizes = {i.volume_oz: i for i in ServingSize.objects.all()}
+        serving_sizes = reference_data.serving_sizes_by_volume()
         if "style" in defaults and not isinstance(defaults["style"], Style):
             defaults["style"] = self.get_style(defaults["style"])
         elif not defaults.get("style"):
             defaults["style"] = self.guess_style(name)
-        beer = None
-        if unique_fields_present:
-            filter_expr = Q()
-            for field, value in unique_fields_present.items():
-                if value:
-                    filter_expr |= Q(**{field: value})
-            # get all possible matches
-            # after moderation, this should only be one
-            queryset = Beer.objects.filter(filter_expr)
-            options = list(queryset)
-            if len(options) > 1:
-                # pick the one which has the preferred field set based on order
-                for field in unique_fields_present:
-                    for option in options:
-                        if getattr(option, field):
-                            beer = option
-                            break
-            elif options:
-                beer = options[0]
-            else:
-                LOG.debug("No match found based on URL")
         try:
             abv = defaults.pop("abv")
         except KeyError:
@@ -265,65 +775,27 @@ class BaseTapListProvider:
                     abv = abv[:-1]
                 abv = Decimal(abv)
             defaults["abv"] = abv
+        beer = self.resolver.find_beer(
+            name, manufacturer, unique_fields_present, defaults.get("style")
+        )
         if not beer:
-            try:
-                beer = (
-                    Beer.objects.filter(
-                        Q(name=name) | Q(alternate_names__contains=[name]),
-                        manufacturer=manufacturer,
-                    )
-                    .distinct()
-                    .get()
-                )
-                LOG.debug("looked up %s for %s", beer, name)
-            except Beer.DoesNotExist:
-                LOG.debug("beer %s not found", name)
-                beer = None
-                if (
-                    defaults.get("style")
-                    and defaults["style"].name.casefold() in name.casefold()
-                ):
-                    subbed_name = re.sub(
-                        rf'\s{defaults["style"].name}$',
-                        "",
-                        name,
-                        flags=re.IGNORECASE,
-                    ).strip()
-                    try:
-                        beer = (
-                            Beer.objects.filter(
-                                Q(name=subbed_name)
-                                | Q(alternate_names__contains=[subbed_name]),
-                                manufacturer=manufacturer,
-                            )
-                            .distinct()
-                            .get()
-                        )
-                    except Beer.DoesNotExist:
-                        LOG.debug("Substituted name %s does not exist", subbed_name)
-                    else:
-                        LOG.debug("Successfully replaced %s with %s", name, beer)
-                if not beer:
-                    beer = Beer.objects.create(
-                        name=name,
-                        manufacturer=manufacturer,
-                        **defaults,
-                    )
-            except Beer.MultipleObjectsReturned:
-                LOG.error(
-                    "Found duplicate results for name %s from mfg %s!",
-                    name,
-                    manufacturer,
-                )
-                # just take the first one
-                beer = Beer.objects.filter(
-                    Q(name=name) | Q(alternate_names__contains=[name]),
-                    manufacturer=manufacturer,
-                )[0]
-        needs_update = False
+            # not seen yet this run, so make sure it really doesn't exist
+            beer = self.query_beer(
+                name, manufacturer, unique_fields_present, defaults.get("style")
+            )
+        if not beer:
+            beer = Beer.objects.create(
+                name=name,
+                manufacturer=manufacturer,
+                **defaults,
+            )
+            self.resolver.beers.add(beer)
+        # only save what changed: beer came from the run's index, so its tap
+        # summary columns may be older than what's in the database
+        changed_fields = set()
         if beer.logo_url and beer.logo_url == manufacturer.logo_url:
             beer.logo_url = None
-            needs_update = True
+            changed_fields.add("logo_url")
         if not beer.automatic_updates_blocked:
             for field, value in defaults.items():
                 # instead of using update_or_create(), only update fields *if*
@@ -357,11 +829,7 @@ class BaseTapListProvider:
                         if found:
                             continue
                 elif field.endswith("_url"):
-                    if (
-                        Beer.objects.exclude(id=beer.id)
-                        .filter(**{field: value})
-                        .exists()
-                    ):
+                    if self.resolver.beers.conflicts(beer, field, value):
                         LOG.warning(
                             "skipping updating %s (%s) for %s (PK %s)"
                             " because it would conflict",
@@ -375,16 +843,17 @@ class BaseTapListProvider:
                 if value != saved_value:
                     # TODO mark as unmoderated
                     setattr(beer, field, value)
-                    needs_update = True
+                    changed_fields.add(field)
         if manufacturer.logo_url and not beer.logo_url:
             beer.logo_url = manufacturer.logo_url
-            needs_update = True
-        if needs_update:
-            beer.save()
+            changed_fields.add("logo_url")
+        if changed_fields:
+            beer.save(update_fields=sorted(changed_fields))
+            self.resolver.beers.add(beer)
         if pricing:
             if not venue:
                 raise ValueError("You must specify a venue with a price")
-            beer.prices.filter(venue=venue).delete()
+            prices = {}
             for price_info in pricing:
                 if price_info["price"] > 500:
                     LOG.warning(
@@ -403,33 +872,81 @@ class BaseTapListProvider:
                         defaults={"name": price_info["name"]},
                     )[0]
                     serving_sizes[price_info["volume_oz"]] = serving_size
+                prices.setdefault(serving_size, price_info["price"])
+            self.stage_prices(venue, beer, prices)
+        if beer.untappd_url:
+            # drain_untappd_lookups will get to it
+            self.untappd_lookups.add(beer.id)
+        return beer
+
+    def query_beer(self, name, manufacturer, unique_fields_present, style=None):
+        """Look up a beer in the database. Returns None if it doesn't exist."""
+        beer = None
+        if unique_fields_present:
+            filter_expr = Q()
+            for field, value in unique_fields_present.items():
+                if value:
+                    filter_expr |= Q(**{field: value})
+            # get all possible matches
+            # after moderation, this should only be one
+            queryset = Beer.objects.filter(filter_expr)
+            options = list(queryset)
+            if len(options) > 1:
+                # pick the one which has the preferred field set based on order
+                for field in unique_fields_present:
+                    for option in options:
+                        if getattr(option, field):
+                            beer = option
+                            break
+            elif options:
+                beer = options[0]
+            else:
+                LOG.debug("No match found based on URL")
+        if beer:
+            self.resolver.beers.add(beer)
+            return beer
+        try:
+            beer = (
+                Beer.objects.filter(
+                    Q(name=name) | Q(alternate_names__contains=[name]),
+                    manufacturer=manufacturer,
+                )
+                .distinct()
+                .get()
+            )
+            LOG.debug("looked up %s for %s", beer, name)
+        except Beer.DoesNotExist:
+            LOG.debug("beer %s not found", name)
+            beer = None
+            if style and style.name.casefold() in name.casefold():
+                subbed_name = strip_style_name(name, style)
                 try:
-                    BeerPrice.objects.get_or_create(
-                        serving_size=serving_size,
-                        beer=beer,
-                        venue=venue,
-                        defaults={"price": price_info["price"]},
-                    )
-                except InvalidOperation:
-                    LOG.error(
-                        "Unable to handle price %s for beer %s capacity %s",
-                        price_info["price"],
-                        beer,
-                        serving_size,
+                    beer = (
+                        Beer.objects.filter(
+                            Q(name=subbed_name)
+                            | Q(alternate_names__contains=[subbed_name]),
+                            manufacturer=manufacturer,
+                        )
+                        .distinct()
+                        .get()
                     )
-                    raise
-        if beer.untappd_url:
-            # queue up an async fetch
-            try:
-                # if it has an untappd URL, queue a lookup for the next in line
-                look_up_beer.delay(beer.id)
-            except OperationalError as exc:
-                if str(exc).casefold() == "max number of clients reached".casefold():
-                    LOG.error("Reached redis limit!")
-                    # fall back to doing it synchronously
-                    look_up_beer(beer.id)  # pylint: disable=no-value-for-parameter
+                except Beer.DoesNotExist:
+                    LOG.debug("Substituted name %s does not exist", subbed_name)
                 else:
-                    raise
+                    LOG.debug("Successfully replaced %s with %s", name, beer)
+        except Beer.MultipleObjectsReturned:
+            LOG.error(
+                "Found duplicate results for name %s from mfg %s!",
+                name,
+                manufacturer,
+            )
+            # just take the first one
+            beer = Beer.objects.filter(
+                Q(name=name) | Q(alternate_names__contains=[name]),
+                manufacturer=manufacturer,
+            )[0]
+        if beer:
+            self.resolver.beers.add(beer)
         return beer
 
     def get_manufacturer(self, name: str, **defaults) -> Manufacturer:
@@ -441,21 +958,58 @@ class BaseTapListProvider:
         if bogus_defaults:
             raise ValueError(f'Unknown fields f{",".join(sorted(defaults))}')
         kwargs = defaults.copy()
+        memo_key = (
+            normalize_name(name),
+            tuple(
+                (field, kwargs[field])
+                for field in MANUFACTURER_UNIQUE_FIELDS
+                if kwargs.get(field)
+            ),
+        )
+        manufacturer = self.resolver.manufacturers.get(
+            self.resolver.manufacturer_memo.get(memo_key)
+        )
+        if not manufacturer:
+            manufacturer = self.find_manufacturer(name, kwargs)
+            self.resolver.manufacturer_memo[memo_key] = manufacturer.pk
+
+        changed_fields = []
+        LOG.debug("Found manufacturer %s", manufacturer)
+        if not manufacturer.automatic_updates_blocked:
+            for field, value in defaults.items():
+                if field == "name":
+                    # don't touch name
+                    continue
+                saved_value = getattr(manufacturer, field)
+                if field == "twitter_handle":
+                    if value and "/" in value:
+                        if value.endswith("/"):
+                            value = value.split("/")[-2]
+                        else:
+                            value = value.split("/")[-1]
+                if not saved_value and not value:
+                    # blank and null are the same thing as far as we're concerned
+                    continue
+                if saved_value != value:
+                    setattr(manufacturer, field, value)
+                    changed_fields.append(field)
+            if changed_fields:
+                LOG.debug("updating %s: %s", manufacturer.name, changed_fields)
+                manufacturer.save(update_fields=changed_fields)
+                self.resolver.manufacturers.add(manufacturer)
+        return manufacturer
+
+    def find_manufacturer(self, name: str, kwargs: dict) -> Manufacturer:
+        """Find the manufacturer by unique field or name, creating it if needed"""
         manufacturer = None
         filter_expr = Q()
-        unique_fields = {
-            "untappd_url",
-            "taphunter_url",
-            "taplist_io_pk",
-            "beermenus_slug",
-        }
-        for field in unique_fields:
+        for field in MANUFACTURER_UNIQUE_FIELDS:
             value = kwargs.get(field)
             if not value:
                 continue
             if not manufacturer:
-                options = list(
-                    Manufacturer.objects.filter(Q(**{field: value}) | Q(name=name))
+                options = self.resolver.manufacturers.filter_by_fields(
+                    {field: value}, name=name
                 )
                 if len(options) > 1:
                     LOG.info(
@@ -470,6 +1024,10 @@ class BaseTapListProvider:
                     manufacturer = options[0]
         else:
             filter_expr = Q(name=name) | Q(alternate_names__contains=[name])
+        if not manufacturer:
+            options = self.resolver.manufacturers.filter_by_name(name)
+            if len(options) == 1:
+                manufacturer = options[0]
         if not manufacturer:
             LOG.debug(
                 "looking up manufacturer with filter %s, args %s",
@@ -480,30 +1038,22 @@ class BaseTapListProvider:
                 manufacturer = Manufacturer.objects.filter(filter_expr).distinct().get()
             except Manufacturer.DoesNotExist:
                 manufacturer = Manufacturer.objects.create(name=name, **kwargs)
-
-        needs_update = False
-        LOG.debug("Found manufacturer %s", manufacturer)
-        if not manufacturer.automatic_updates_blocked:
-            for field, value in defaults.items():
-                if field == "name":
-                    # don't touch name
-                    continue
-                saved_value = getattr(manufacturer, field)
-                if field == "twitter_handle":
-                    if value and "/" in value:
-                        if value.endswith("/"):
-                            value = value.split("/")[-2]
-                        else:
-                            value = value.split("/")[-1]
-                if saved_value != value:
-                    setattr(manufacturer, field, value)
-                    needs_update = True
-            if needs_update:
-                LOG.debug("updating %s", manufacturer.name)
-                manufacturer.save()
+            self.resolver.manufacturers.add(manufacturer)
         return manufacturer
 
 
+def clean_tap_value(field, value):
+    """Coerce a tap field value to what it'll look like coming back out of the DB"""
+    model_field = Tap._meta.get_field(field)
+    if model_field.is_relation or value is None:
+        return value
+    value = model_field.to_python(value)
+    if isinstance(value, datetime.datetime) and is_naive(value):
+        # same as what Django does when saving a naive datetime
+        value = make_aware(value, get_default_timezone())
+    return value
+
+
 def fix_urls(defaults):
     """Make the URLs point to the right domains"""
     domain_map = {
@@ -1,8 +1,6 @@
 import json
 import logging
 
-from beers.models import Manufacturer
-from taps.models import Tap
 
 from .base import BaseTapListProvider
 
@@ -25,32 +23,12 @@ class ExampleTapListProvider(BaseTapListProvider):
 
     def handle_venue(self, venue):
         LOG.info("Handling venue %s", venue)
-        taps = {tap.tap_number: tap for tap in venue.taps.all()}
-        names = {i["brewery"] for i in self.json_dict["taps"].values()}
-        LOG.debug("Breweries: %s", names)
-        manufacturers_qs = Manufacturer.objects.filter(
-            name__in=list(names),
-        )
-        manufacturers = {i.name: i for i in manufacturers_qs.all()}
-        LOG.debug("manufacturers: %s", list(manufacturers))
+        taps: dict[int, dict] = {}
         for tap_number, beer_info in self.json_dict["taps"].items():
-            try:
-                tap = taps[int(tap_number)]
-            except KeyError:
-                tap = Tap.objects.create(
-                    venue=venue,
-                    tap_number=int(tap_number),
-                )
-                taps[tap.tap_number] = tap
-            try:
-                manufacturer = manufacturers[beer_info["brewery"]]
-            except KeyError:
-                manufacturer = self.get_manufacturer(name=beer_info["brewery"])
-                # cache it for next time
-                manufacturers[manufacturer.name] = manufacturer
+            manufacturer = self.get_manufacturer(name=beer_info["brewery"])
             name = beer_info.pop("beer")
             del beer_info["brewery"]
             beer_info["style"] = self.get_style(beer_info["style"])
             beer = self.get_beer(name, manufacturer, **beer_info)
-            tap.beer = beer
-            tap.save()
+            taps[int(tap_number)] = {"beer": beer}
+        self.reconcile_taps(venue, taps, delete_stale=False)
@@ -0,0 +1,110 @@
+"""HTTP client shared by the tap list providers
+
+Each provider keeps one adapter for its whole run, so requests to the same
+host reuse connections instead of doing a TLS handshake every time. Sessions
+aren't thread-safe, so every thread that makes requests gets its own, but
+they all share that adapter's connection pools (which are). Every
+request gets connect and read timeouts so a hung upstream can't tie up a
+worker forever. Connection errors and overloaded upstreams are retried with
+exponential backoff plus jitter.
+"""
+import logging
+import random
+from urllib.parse import urlparse
+
+from django.conf import settings
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import brotli  # noqa
+except ImportError:
+    try:
+        import brotlicffi  # noqa
+    except ImportError:
+        brotli = None
+
+LOG = logging.getLogger(__name__)
+
+# urllib3 only knows how to decode brotli if one of these is installed
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli else "gzip, deflate"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class JitteredRetry(Retry):
+    """Retry with a random amount added to each backoff
+
+    Spreads out the retries when a bunch of workers hit a struggling
+    upstream at the same time.
+    """
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        if not backoff:
+            return backoff
+        return backoff + random.uniform(0, self.backoff_factor)
+
+
+class TimeoutSession(requests.Session):
+    """Session that uses a default timeout for requests that don't set one"""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def log_latency(response, *args, **kwargs):
+    LOG.debug(
+        "%s %s: %s in %.0f ms",
+        response.request.method,
+        response.url,
+        response.status_code,
+        response.elapsed.total_seconds() * 1000,
+    )
+
+
+def build_adapter() -> HTTPAdapter:
+    """Create a pooled adapter with retries that sessions can share"""
+    retry = JitteredRetry(
+        total=settings.TAP_LIST_HTTP_RETRIES,
+        backoff_factor=settings.TAP_LIST_HTTP_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        # let the caller decide what to do with the final response
+        raise_on_status=False,
+    )
+    # one pool per host, big enough for every fetch worker to hold a connection
+    return HTTPAdapter(
+        pool_maxsize=max(settings.TAP_LIST_FETCH_WORKERS, 1),
+        max_retries=retry,
+    )
+
+
+def build_session(on_response=None, adapter=None) -> requests.Session:
+    """Create a pooled session with timeouts and retries
+
+    on_response, if given, is called with each response (after redirects
+    and retries) and can be used to record how long requests take. adapter
+    (by default, a new one from build_adapter()) can be shared with the
+    sessions of other threads.
+    """
+    session = TimeoutSession(
+        (settings.TAP_LIST_HTTP_CONNECT_TIMEOUT, settings.TAP_LIST_HTTP_READ_TIMEOUT)
+    )
+    if adapter is None:
+        adapter = build_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    session.hooks["response"].append(log_latency)
+    if on_response:
+        session.hooks["response"].append(on_response)
+    return session
+
+
+def response_host(response) -> str:
+    return urlparse(response.url).netloc
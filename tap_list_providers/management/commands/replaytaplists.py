@@ -0,0 +1,58 @@
+"""Replay the captured tap lists in example_data through every parser
+
+Reports what ingesting each one costs (time, queries, rows written, and peak
+memory), both cold and on an identical second poll, as JSON. Needs a
+database without any venues or beers in it; everything the replays write
+is rolled back.
+"""
+from argparse import FileType
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from beers.models import Beer
+from tap_list_providers import replay
+from venues.models import Venue
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the tap list parsers against the example data"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=[scenario.name for scenario in replay.SCENARIOS],
+            help="Only replay this provider's data (can be given more than once)",
+        )
+        parser.add_argument(
+            "--no-memory",
+            action="store_true",
+            help="Skip the (slow) pass that measures peak memory",
+        )
+        parser.add_argument(
+            "--output",
+            type=FileType("w"),
+            default=sys.stdout,
+            help="Where to write the results (standard output by default)",
+        )
+
+    def handle(self, *args, **options):
+        if Venue.objects.exists() or Beer.objects.exists():
+            raise CommandError("Replays need a database without venues or beers")
+        scenarios = [
+            scenario
+            for scenario in replay.SCENARIOS
+            if not options["scenario"] or scenario.name in options["scenario"]
+        ]
+        try:
+            results = replay.run(
+                scenarios,
+                trace_memory=not options["no_memory"],
+                log=self.stderr.write,
+            )
+        except replay.BenchmarkError as exc:
+            raise CommandError(str(exc)) from exc
+        json.dump(results, options["output"], indent=2)
+        options["output"].write("\n")
@@ -0,0 +1,37 @@
+"""Helpers for scraping HTML with lxml and XPath
+
+Much lighter than building a BeautifulSoup tree: lxml's tree lives in C and
+the XPath expressions are compiled once, so only the elements we ask for
+ever become Python objects.
+"""
+from lxml import etree, html
+
+HtmlElement = html.HtmlElement
+
+
+def has_class(name: str) -> str:
+    """XPath predicate for elements with name among their classes"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def xpath(path: str) -> etree.XPath:
+    return etree.XPath(path, smart_strings=False)
+
+
+def parse_html(data: str) -> HtmlElement | None:
+    """Parse a page or fragment, returning None if there's nothing to parse"""
+    if not data.strip():
+        return None
+    return html.document_fromstring(data)
+
+
+def first(element: HtmlElement, path: etree.XPath) -> HtmlElement | None:
+    """The first match for path, or None, like BeautifulSoup's find()"""
+    matches = path(element)
+    return matches[0] if matches else None
+
+
+def text(element: HtmlElement) -> str:
+    """All of the text inside element, like BeautifulSoup's .text"""
+    # a plain str, so it doesn't keep the whole tree alive
+    return str(element.text_content())
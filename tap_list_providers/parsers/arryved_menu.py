@@ -6,7 +6,6 @@ import logging
 import os
 from typing import Any
 
-import requests
 import configurations
 from django.core.exceptions import ImproperlyConfigured, AppRegistryNotReady
 
@@ -19,8 +18,8 @@ except (ImproperlyConfigured, AppRegistryNotReady):
     configurations.setup()
     from ..base import BaseTapListProvider
 
+from beers import reference_data
 from beers.models import Manufacturer, Beer, BeerPrice, ServingSize
-from taps.models import Tap
 from venues.models import Venue
 
 
@@ -46,12 +45,18 @@ class ArryvedMenuParser(BaseTapListProvider):
         self.menu_id = menu_id
         self.manufacturer = manufacturer
         self.serving_sizes = set(serving_sizes) if serving_sizes else set()
+        super().__init__()
+
+    def fetch_venue_data(self, venue: Venue):
+        return self.fetch(
+            venue.api_configuration.arryved_location_id,
+            venue.api_configuration.arryved_menu_id,
+        )
 
     def handle_venue(self, venue: Venue) -> datetime.datetime:
         self.location_id = venue.api_configuration.arryved_location_id
         self.menu_id = venue.api_configuration.arryved_menu_id
         self.serving_sizes = set(venue.api_configuration.arryved_serving_sizes)
-        BeerPrice.objects.filter(venue=venue).delete()
         try:
             self.manufacturer = Manufacturer.objects.get(
                 name=venue.api_configuration.arryved_manufacturer_name
@@ -62,25 +67,25 @@ class ArryvedMenuParser(BaseTapListProvider):
                 f"{venue.api_configuration.arryved_manufacturer_name or venue} before"
                 " parsing!"
             ) from exc
-        json_data = self.parse_json(self.fetch())
-        taps = {i.tap_number: i for i in venue.taps.all()}
+        json_data = self.parse_json(self.get_venue_data(venue))
+        existing_beers = {i.tap_number: i.beer_id for i in venue.taps.all()}
+        taps: dict[int, dict] = {}
         manufacturer_beers = {
             beer.name: beer
             for beer in Beer.objects.filter(manufacturer=self.manufacturer)
         }
         last_updated = datetime.datetime(1970, 1, 1, 0, tzinfo=UTC)
         prices = []
-        serving_sizes = {i.volume_oz: i for i in ServingSize.objects.all()}
+        serving_sizes = reference_data.serving_sizes_by_volume()
         tap_number = 1
         for beer in json_data["beers"]:
-            tap = taps.get(tap_number, Tap(tap_number=tap_number, venue=venue))
-            existing_beer_pk = tap.beer_id
+            tap = {}
             beer_created = False
             try:
-                tap.beer = manufacturer_beers[beer["name"]]
+                tap["beer"] = manufacturer_beers[beer["name"]]
             except KeyError:
                 try:
-                    tap.beer = Beer.objects.get(
+                    tap["beer"] = Beer.objects.get(
                         manufacturer=self.manufacturer,
                         alternate_names__contains=[beer["name"]],
                     )
@@ -92,35 +97,35 @@ class ArryvedMenuParser(BaseTapListProvider):
                         abv=beer["abv"],
                         name=beer["name"],
                     )
-                    tap.beer = new_beer
+                    tap["beer"] = new_beer
                     beer_created = True
             tap_prices = self.process_serving_sizes(
-                tap.beer, venue, beer["serving_sizes"], serving_sizes
+                tap["beer"], venue, beer["serving_sizes"], serving_sizes
             )
             if not tap_prices:
-                LOG.debug("Skipping beer %s because it is not on tap", tap.beer)
+                LOG.debug("Skipping beer %s because it is not on tap", tap["beer"])
                 if beer_created:
-                    tap.beer.delete()
+                    tap["beer"].delete()
                 continue
             prices += tap_prices
-            if tap.beer.id != existing_beer_pk:
-                tap.time_added = beer["last_updated"]
+            if tap["beer"].id != existing_beers.get(tap_number):
+                tap["time_added"] = beer["last_updated"]
             if beer["ibu"]:
-                tap.beer.ibu = beer["ibu"]
+                tap["beer"].ibu = beer["ibu"]
             if beer["abv"]:
-                tap.beer.abv = beer["abv"]
-            tap.time_updated = beer["last_updated"]
-            LOG.debug("Saving tap %s: %s", tap.tap_number, tap.beer)
-            tap.save()
+                tap["beer"].abv = beer["abv"]
+            tap["time_updated"] = beer["last_updated"]
+            taps[tap_number] = tap
             if beer["last_updated"] > last_updated:
                 last_updated = beer["last_updated"]
             tap_number += 1
-        delete_result = Tap.objects.filter(
-            venue=venue,
-            tap_number__gte=tap_number,
-        ).delete()
-        LOG.debug("Deleted %s extra taps", delete_result[0])
-        BeerPrice.objects.bulk_create(prices)
+        # this also deletes the extra taps
+        self.reconcile_taps(venue, taps)
+        # every price at the venue comes from the menu
+        self.reconcile_prices(
+            venue,
+            {(price.beer.id, price.serving_size.id): price.price for price in prices},
+        )
         self.check_timestamp = last_updated
         return last_updated
 
@@ -165,19 +170,21 @@ class ArryvedMenuParser(BaseTapListProvider):
             )
         return result
 
-    def fetch(self):
-        response = requests.post(
+    def fetch(self, location_id=None, menu_id=None):
+        location_id = location_id or self.location_id
+        menu_id = menu_id or self.menu_id
+        response = self.http.post(
             self.URL,
             json={
-                "locationId": self.location_id,
+                "locationId": location_id,
                 "venueIds": [],
                 "itemTypes": [],
                 "publicConfigType": "WEBSITE_EMBED",
-                "menuId": self.menu_id,
+                "menuId": menu_id,
             },
             headers={
                 "X-Requested-With": "XMLHttpRequest",
-                "referer": self.BASE_URL.format(self.location_id, self.menu_id),
+                "referer": self.BASE_URL.format(location_id, menu_id),
             },
         )
         response.raise_for_status()
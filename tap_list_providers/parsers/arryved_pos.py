@@ -7,7 +7,6 @@ import os
 from uuid import uuid4
 from typing import Any
 
-import requests
 import configurations
 from django.core.exceptions import ImproperlyConfigured, AppRegistryNotReady
 from django.utils.timezone import now
@@ -21,9 +20,10 @@ except (ImproperlyConfigured, AppRegistryNotReady):
     configurations.setup()
     from ..base import BaseTapListProvider
 
+from beers import reference_data
 from beers.models import Manufacturer, Beer, BeerPrice, ServingSize
-from taps.models import Tap
 from venues.models import Venue
+from ..http import build_session
 
 
 LOG = logging.getLogger(__name__)
@@ -48,13 +48,16 @@ class ArryvedPOSParser(BaseTapListProvider):
         self.menu_names = set(menu_names or [])
         self.manufacturer = manufacturer
         self.serving_sizes = set(serving_sizes) if serving_sizes else set()
+        super().__init__()
+
+    def fetch_venue_data(self, venue: Venue):
+        return self.fetch(venue.api_configuration.arryved_location_id)
 
     def handle_venue(self, venue: Venue) -> datetime.datetime:
         timestamp = now()
         self.location_id = venue.api_configuration.arryved_location_id
         self.menu_names = set(venue.api_configuration.arryved_pos_menu_names)
         self.serving_sizes = set(venue.api_configuration.arryved_serving_sizes)
-        BeerPrice.objects.filter(venue=venue).delete()
         try:
             self.manufacturer = Manufacturer.objects.get(
                 name=venue.api_configuration.arryved_manufacturer_name
@@ -65,23 +68,23 @@ class ArryvedPOSParser(BaseTapListProvider):
                 f"{venue.api_configuration.arryved_manufacturer_name or venue} before"
                 " parsing!"
             ) from exc
-        json_data = self.parse_json(self.fetch())
-        taps = {i.tap_number: i for i in venue.taps.all()}
+        json_data = self.parse_json(self.get_venue_data(venue))
+        taps: dict[int, dict] = {}
         manufacturer_beers = {
             beer.name: beer
             for beer in Beer.objects.filter(manufacturer=self.manufacturer)
         }
         prices = []
-        serving_sizes = {i.volume_oz: i for i in ServingSize.objects.all()}
+        serving_sizes = reference_data.serving_sizes_by_volume()
         tap_number = 1
         for beer in json_data["beers"]:
-            tap = taps.get(tap_number, Tap(tap_number=tap_number, venue=venue))
+            tap = {}
             beer_created = False
             try:
-                tap.beer = manufacturer_beers[beer["name"]]
+                tap["beer"] = manufacturer_beers[beer["name"]]
             except KeyError:
                 try:
-                    tap.beer = Beer.objects.get(
+                    tap["beer"] = Beer.objects.get(
                         manufacturer=self.manufacturer,
                         alternate_names__contains=[beer["name"]],
                     )
@@ -93,26 +96,30 @@ class ArryvedPOSParser(BaseTapListProvider):
                         abv=beer["abv"],
                         name=beer["name"],
                     )
-                    tap.beer = new_beer
+                    tap["beer"] = new_beer
                     beer_created = True
             tap_prices = self.process_serving_sizes(
-                tap.beer, venue, beer["serving_sizes"], serving_sizes
+                tap["beer"], venue, beer["serving_sizes"], serving_sizes
             )
             if not tap_prices:
-                LOG.debug("Skipping beer %s because it is not on tap", tap.beer)
+                LOG.debug("Skipping beer %s because it is not on tap", tap["beer"])
                 if beer_created:
-                    tap.beer.delete()
+                    tap["beer"].delete()
                 continue
             prices += tap_prices
             if beer["ibu"]:
-                tap.beer.ibu = beer["ibu"]
+                tap["beer"].ibu = beer["ibu"]
             if beer["abv"]:
-                tap.beer.abv = beer["abv"]
-            tap.time_updated = timestamp
-            LOG.debug("Saving tap %s: %s", tap.tap_number, tap.beer)
-            tap.save()
+                tap["beer"].abv = beer["abv"]
+            tap["time_updated"] = timestamp
+            taps[tap_number] = tap
             tap_number += 1
-        BeerPrice.objects.bulk_create(prices)
+        self.reconcile_taps(venue, taps, delete_stale=False)
+        # every price at the venue comes from the menu
+        self.reconcile_prices(
+            venue,
+            {(price.beer.id, price.serving_size.id): price.price for price in prices},
+        )
         self.check_timestamp = None
 
     def process_serving_sizes(
@@ -156,9 +163,11 @@ class ArryvedPOSParser(BaseTapListProvider):
     def generate_request_id(self):
         return str(uuid4()).replace("-", "")
 
-    def fetch(self):
+    def fetch(self, location_id=None):
+        location_id = location_id or self.location_id
         # first, we have to auth
-        session = requests.session()
+        # a fresh session, since this one carries the auth for this location
+        session = build_session(self.record_latency, adapter=self.http_adapter)
         network_id = str(uuid4())
         response = session.post(
             self.PREAUTH_URL,
@@ -204,7 +213,7 @@ class ArryvedPOSParser(BaseTapListProvider):
                     "clientVersion": "1.1.0",
                 },
                 "menuSelector": {
-                    "locationId": self.location_id,
+                    "locationId": location_id,
                     "orderModality": "PICKUP",
                 },
             },
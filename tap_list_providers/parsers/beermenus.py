@@ -5,12 +5,11 @@ import datetime
 from dataclasses import dataclass
 import logging
 import os
+import re
 
 from dateutil.parser import parse
-import requests
-from bs4 import BeautifulSoup
-from bs4.element import Tag
 import configurations
+from lxml.html import tostring
 from django.core.exceptions import ImproperlyConfigured, AppRegistryNotReady
 
 # boilerplate code necessary for launching outside manage.py
@@ -24,12 +23,26 @@ except (ImproperlyConfigured, AppRegistryNotReady):
 
 
 from venues.models import Venue
-from taps.models import Tap
+from ..markup import HtmlElement, first, has_class, parse_html, text, xpath
+from ..snapshot import TapListSnapshot
 
 
 UTC = datetime.timezone.utc
 LOG = logging.getLogger(__name__)
 MIDDOT = chr(183)
+# Rails puts a fresh one of these in every page
+CSRF_META_REGEX = re.compile(r'<meta name="csrf-token" content="[^"]*" />')
+
+UPDATED = xpath("//span[not(@*)][starts-with(., 'Updated:')]")
+BEER_LISTS = xpath("//ul[@id]")
+ITEMS = xpath(".//li")
+LOAD_MORE = xpath(f".//a[{has_class('on_tap')}]")
+LINKS = xpath(".//a")
+NAME = xpath(".//h3")
+PRICE = xpath(".//p[normalize-space(@class)='caption text-right mb-0']")
+SPLASH = xpath(f"//div[{has_class('splash-small')}]")
+BEER_INFO = xpath(f".//p[{has_class('mb-tiny')}]")
+BREWERY = xpath(f".//p[{has_class('mb-0')}]")
 
 
 @dataclass
@@ -80,7 +93,7 @@ class BeerMenusParser(BaseTapListProvider):
     def fetch_data(self) -> str:
         if not self.location_url:
             raise ValueError("You must configure the location URL")
-        response = requests.get(self.location_url, headers=self.REQUEST_HEADERS)
+        response = self.http.get(self.location_url, headers=self.REQUEST_HEADERS)
         response.raise_for_status()
         if self.save_fetched_data:
             with open(
@@ -93,19 +106,27 @@ class BeerMenusParser(BaseTapListProvider):
                 outfile.write(response.text)
         return response.text
 
+    def fetch_venue_data(self, venue: Venue) -> str:
+        response = self.conditional_get(
+            venue,
+            self.URL.format(venue.api_configuration.beermenus_slug),
+            headers=self.REQUEST_HEADERS,
+        )
+        response.raise_for_status()
+        return response.text
+
+    def normalize_payload(self, data: str) -> str:
+        return CSRF_META_REGEX.sub("", data)
+
     def parse_html(self, data: str) -> list[BeerData]:
-        self.soup = BeautifulSoup(data, "lxml")
+        self.soup = parse_html(data)
         # the last updated time is only a date
         # it's in a <span> in the form "Updated: M/D/YYYY"
-        updated_span = self.soup.find_all(
-            lambda tag: (
-                tag.name == "span" and not tag.attrs and tag.text.startswith("Updated:")
-            )
-        )[0]
+        updated_span = UPDATED(self.soup)[0]
         # they just give us a date. I'm going to arbitrarily declare that to be
         # midnight UTC because who cares if we're off by a day
         self.updated_date = parse(
-            updated_span.text.split()[1],
+            text(updated_span).split()[1],
             dayfirst=False,
         ).replace(tzinfo=UTC)
 
@@ -114,9 +135,8 @@ class BeerMenusParser(BaseTapListProvider):
 
         # the beer lists are in <ul>s
         beers = []
-        uls = self.soup.find_all("ul")
-        for tag in uls:
-            tag_id = tag.attrs.get("id")
+        for tag in BEER_LISTS(self.soup):
+            tag_id = tag.get("id")
             if not tag_id:
                 continue
             if self.categories and tag_id not in self.categories:
@@ -124,12 +144,12 @@ class BeerMenusParser(BaseTapListProvider):
                 continue
             # yay we got a list
             LOG.debug("Processing list %s", tag_id)
-            for li in tag.find_all("li"):
-                load_more = li.find_all("a", class_="on_tap")
+            for li in ITEMS(tag):
+                load_more = LOAD_MORE(li)
                 if load_more:
                     LOG.debug("found view more link")
                     # we have a view all on tap link
-                    load_more_url = load_more[0].attrs["href"]
+                    load_more_url = load_more[0].attrib["href"]
                     # this load more link fetches a jQuery call to modify
                     # the DOM and insert the extra <li> tags with the beer
                     # data
@@ -138,7 +158,7 @@ class BeerMenusParser(BaseTapListProvider):
                     # it.
                     # TODO if we ever get a venue with >40 taps in one category:
                     # check whether we have to load more *again* (I know..)
-                    resp = requests.get(
+                    resp = self.http.get(
                         f"https://www.beermenus.com{load_more_url}",
                         headers=self.XHR_HEADERS,
                     )
@@ -171,9 +191,9 @@ class BeerMenusParser(BaseTapListProvider):
                         .replace("\\/", "/")
                         .replace('\\"', '"')
                     )
-                    parser = BeautifulSoup(html, "lxml")
                     beers += [
-                        parse_beer_tag(extra_tag) for extra_tag in parser.find_all("li")
+                        parse_beer_tag(extra_tag)
+                        for extra_tag in ITEMS(parse_html(html))
                     ]
                     continue
                 beer = parse_beer_tag(li)
@@ -186,7 +206,7 @@ class BeerMenusParser(BaseTapListProvider):
         # we have a list of BeerData instances
         # modify them in place to get the other data
         for beer in beers:
-            resp = requests.get(
+            resp = self.http.get(
                 beer.url,
                 headers=self.REQUEST_HEADERS,
             )
@@ -200,51 +220,46 @@ class BeerMenusParser(BaseTapListProvider):
                     "w",
                 ) as outfile:
                     outfile.write(resp.text)
-            parser = BeautifulSoup(resp.text, "lxml")
-            target_div = parser.find_all("div", class_="splash-small")[0]
-            beer_info = target_div.find_all("p", class_="mb-tiny")[0]
+            target_div = SPLASH(parse_html(resp.text))[0]
+            beer_info = text(BEER_INFO(target_div)[0])
             try:
-                style, abv_raw, *_ = (i.strip() for i in beer_info.text.split(MIDDOT))
+                style, abv_raw, *_ = (i.strip() for i in beer_info.split(MIDDOT))
             except ValueError:
                 LOG.error(
                     "Unable to parse info for %s: %r (%s)",
                     beer.name,
-                    beer_info.text,
-                    [ord(i) for i in beer_info.text],
+                    beer_info,
+                    [ord(i) for i in beer_info],
                 )
                 raise
             abv = Decimal(abv_raw.split("%")[0])
             beer.abv = abv
             beer.style = style
-            brewery_p = target_div.find_all("p", class_="mb-0")[0]
-            brewery_a = brewery_p.find_all("a")[0]
-            beer.brewery_slug = brewery_a.attrs["href"].split("/")[-1]
-            beer.brewery_name = brewery_a.text
-            beer.brewery_location = brewery_p.text.split(MIDDOT)[1].strip()
+            brewery_p = BREWERY(target_div)[0]
+            brewery_a = LINKS(brewery_p)[0]
+            beer.brewery_slug = brewery_a.attrib["href"].split("/")[-1]
+            beer.brewery_name = text(brewery_a)
+            beer.brewery_location = text(brewery_p).split(MIDDOT)[1].strip()
 
-    def handle_venue(self, venue: Venue) -> datetime.datetime:
+    def parse_venue_data(self, venue: Venue, data: str) -> TapListSnapshot:
         self.categories = venue.api_configuration.beermenus_categories
         self.location_url = self.URL.format(venue.api_configuration.beermenus_slug)
-        data = self.fetch_data()
         beers = self.parse_html(data)
         self.parse_beers(beers)
         LOG.info("Found %s taps from %s", len(beers), venue)
-        existing_taps = {tap.tap_number: tap for tap in venue.taps.all()}
-        # delete unused taps
-        Tap.objects.filter(venue=venue, tap_number__gt=len(beers)).delete()
-
+        # this also deletes unused taps
+        snapshot = TapListSnapshot(updated=self.updated_date)
         for index, beer in enumerate(beers):
             tap_number = index + 1
-            tap = existing_taps.get(tap_number, Tap(venue=venue, tap_number=tap_number))
-            manufacturer = self.get_manufacturer(
-                name=beer.brewery_name,
+            manufacturer = snapshot.add_manufacturer(
+                beer.brewery_name,
                 location=beer.brewery_location,
                 beermenus_slug=beer.brewery_slug.split("/")[-1],
             )
-            beer = self.get_beer(
-                name=beer.name,
+            beer = snapshot.add_beer(
+                beer.name,
+                manufacturer,
                 style=beer.style,
-                venue=venue,
                 pricing=[
                     {
                         "volume_oz": beer.serving_size,
@@ -253,27 +268,17 @@ class BeerMenusParser(BaseTapListProvider):
                 ],
                 abv=beer.abv,
                 beermenus_slug=beer.url.split("/")[-1],
-                manufacturer=manufacturer,
             )
-            if not tap.id or tap.beer_id != beer.id:
-                tap.beer = beer
-                LOG.debug("Saving %s to tap number %s", beer, tap_number)
-                tap.save()
-            else:
-                LOG.debug(
-                    "Not updating tap %s because it is already assigned to %s",
-                    tap_number,
-                    beer,
-                )
-        return self.updated_date
+            snapshot.add_tap(tap_number, beer)
+        return snapshot
 
 
-def parse_beer_tag(tag: Tag) -> BeerData:
+def parse_beer_tag(tag: HtmlElement) -> BeerData:
     try:
-        price_p = tag.find_all("p", class_="caption text-right mb-0")[0]
-        capacity, price = (i.strip() for i in price_p.text.split("$"))
+        price_p = PRICE(tag)[0]
+        capacity, price = (i.strip() for i in text(price_p).split("$"))
     except IndexError:
-        LOG.warning("Missing price info for %s", tag)
+        LOG.warning("Missing price info for %s", tostring(tag, encoding="unicode"))
         price = None
         serving_size = None
     else:
@@ -284,15 +289,15 @@ def parse_beer_tag(tag: Tag) -> BeerData:
             LOG.warning(
                 "Ignoring invalid serving size %r for %s",
                 capacity,
-                tag.find("h3").text.strip(),
+                text(first(tag, NAME)).strip(),
             )
             serving_size = None
     try:
-        beer_a = tag.find_all("a")[0]
+        beer_a = LINKS(tag)[0]
     except IndexError:
-        LOG.warning("No beer links found for %s", tag.find("h3").text.strip())
+        LOG.warning("No beer links found for %s", text(first(tag, NAME)).strip())
         return None
-    beer_url = f"https://www.beermenus.com{beer_a.attrs['href']}"
+    beer_url = f"https://www.beermenus.com{beer_a.attrib['href']}"
     return BeerData(
         url=beer_url,
         price=price,
@@ -302,7 +307,7 @@ def parse_beer_tag(tag: Tag) -> BeerData:
         brewery_name=None,
         abv=None,
         brewery_slug=None,
-        name=beer_a.text.strip(),
+        name=text(beer_a).strip(),
     )
 
 
@@ -7,7 +7,6 @@ import os
 import json
 
 import dateutil.parser
-import requests
 import configurations
 from django.utils.timezone import now
 from django.core.exceptions import ImproperlyConfigured, AppRegistryNotReady
@@ -23,6 +22,7 @@ except (ImproperlyConfigured, AppRegistryNotReady):
 
 from taps.models import Tap
 from venues.models import Venue
+from ..snapshot import TapListSnapshot
 
 
 UTC = datetime.timezone.utc
@@ -39,65 +39,46 @@ class DigitalPourParser(BaseTapListProvider):
     def __init__(self, location=None):
         """Constructor."""
         self.url = None
-        self.update_date = None
         if location:
             self.url = self.URL.format(location[0], location[1], self.APIKEY)
         super().__init__()
 
-    def handle_venue(self, venue: Venue) -> datetime.datetime:
+    def fetch_venue_data(self, venue: Venue):
         venue_id = venue.api_configuration.digital_pour_venue_id
         location_number = venue.api_configuration.digital_pour_location_number
-        self.url = self.URL.format(venue_id, location_number, self.APIKEY)
-        data = self.fetch()
-        taps: dict[int, Tap] = {tap.tap_number: tap for tap in venue.taps.all()}
-        self.update_date = datetime.datetime(1970, 1, 1, 0, 0, 0).replace(tzinfo=UTC)
-        manufacturers = {}
-        tap_numbers_seen: set[int] = set()
+        response = self.conditional_get(
+            venue, self.URL.format(venue_id, location_number, self.APIKEY)
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def parse_venue_data(self, venue: Venue, data) -> TapListSnapshot:
+        snapshot = TapListSnapshot(
+            updated=datetime.datetime(1970, 1, 1, 0, 0, 0).replace(tzinfo=UTC)
+        )
+        tap_numbers = set()
         for entry in data:
             if not entry["Active"]:
                 # in the cooler, not on tap
                 continue
             # 1. parse the tap
             tap_info = self.parse_tap(entry)
-            while tap_info["tap_number"] in tap_numbers_seen:
+            while tap_info["tap_number"] in tap_numbers:
                 # work around duplicates by adding one
                 tap_info["tap_number"] += 1
-            tap_numbers_seen.add(tap_info["tap_number"])
-            try:
-                tap = taps[tap_info["tap_number"]]
-            except KeyError:
-                tap = Tap(venue=venue, tap_number=tap_info["tap_number"])
-            tap.time_added = tap_info["added"]
-            tap.time_updated = tap_info["updated"]
-            if tap.time_updated and tap.time_updated > self.update_date:
-                LOG.debug("Updating venue timestamp to %s", tap.time_updated)
-                self.update_date = tap.time_updated
-            tap.estimated_percent_remaining = tap_info["percent_full"]
+            tap_numbers.add(tap_info["tap_number"])
+            tap = {
+                "time_added": tap_info["added"],
+                "time_updated": tap_info["updated"],
+                "estimated_percent_remaining": tap_info["percent_full"],
+                "gas_type": "",
+            }
+            if tap["time_updated"] and tap["time_updated"] > snapshot.updated:
+                LOG.debug("Updating venue timestamp to %s", tap["time_updated"])
+                snapshot.updated = tap["time_updated"]
             if tap_info["gas_type"] in [i[0] for i in Tap.GAS_CHOICES]:
-                tap.gas_type = tap_info["gas_type"]
-            else:
-                tap.gas_type = ""
-            # 2. parse the manufacturer, creating if needed
-            parsed_manufacturer = self.parse_manufacturer(entry)
-            try:
-                manufacturer = manufacturers[parsed_manufacturer["name"]]
-            except KeyError:
-                defaults = {
-                    field: parsed_manufacturer[field]
-                    for field in [
-                        "location",
-                        "logo_url",
-                        "twitter_handle",
-                        "url",
-                    ]
-                    if parsed_manufacturer[field]
-                }
-                manufacturer = self.get_manufacturer(
-                    name=parsed_manufacturer["name"],
-                    **defaults,
-                )
-                manufacturers[manufacturer.name] = manufacturer
-            # 3. get the beer, creating if necessary
+                tap["gas_type"] = tap_info["gas_type"]
+            # 2. parse the beer
             parsed_beer = self.parse_beer(entry)
             name = parsed_beer.pop("name")
             color_html = parsed_beer.pop("color", "")
@@ -108,33 +89,36 @@ class DigitalPourParser(BaseTapListProvider):
             else:
                 # clear the color if unknown
                 parsed_beer["color_html"] = ""
-            LOG.debug(
-                "looking up beer: name %s, mfg %s, other data %s",
-                name,
-                manufacturer,
-                parsed_beer,
-            )
             if name.casefold().strip() == "N/A".casefold():
                 if not parsed_beer.get("abv"):
                     # it's an empty tap
-                    LOG.info("Tap %s is unused", tap.tap_number)
-                    tap.beer = None
-                    tap.save()
+                    LOG.info("Tap %s is unused", tap_info["tap_number"])
+                    snapshot.add_tap(tap_info["tap_number"], None, **tap)
                     continue
-            beer = self.get_beer(
+            # 3. parse the manufacturer
+            parsed_manufacturer = self.parse_manufacturer(entry)
+            defaults = {
+                field: parsed_manufacturer[field]
+                for field in [
+                    "location",
+                    "logo_url",
+                    "twitter_handle",
+                    "url",
+                ]
+                if parsed_manufacturer[field]
+            }
+            manufacturer = snapshot.add_manufacturer(
+                parsed_manufacturer["name"], **defaults
+            )
+            # 4. assign the beer to the tap
+            beer = snapshot.add_beer(
                 name,
                 manufacturer,
                 pricing=self.parse_pricing(entry),
-                venue=venue,
                 **parsed_beer,
             )
-            # 4. assign the beer to the tap
-            tap.beer = beer
-            tap.save()
-        for tap_number, tap in taps.items():
-            if tap_number not in tap_numbers_seen:
-                tap.delete()
-        return self.update_date
+            snapshot.add_tap(tap_info["tap_number"], beer, **tap)
+        return snapshot
 
     def parse_beer(self, entry):
         """Parse beer info from JSON entry."""
@@ -317,9 +301,9 @@ class DigitalPourParser(BaseTapListProvider):
             pricing.append(p)
         return pricing
 
-    def fetch(self):
+    def fetch(self, url=None):
         """Fetch the most recent taplist"""
-        response = requests.get(self.url)
+        response = self.http.get(url or self.url)
         response.raise_for_status()
         data = response.json()
         return data
@@ -8,7 +8,6 @@ import os
 import zoneinfo
 
 from bs4 import BeautifulSoup
-import requests
 import configurations
 from dateutil.parser import parse
 from django.db.models import Q
@@ -23,8 +22,8 @@ except (ImproperlyConfigured, AppRegistryNotReady):
     configurations.setup()
     from ..base import BaseTapListProvider
 
-from beers.models import Manufacturer, Beer, ServingSize, BeerPrice
-from taps.models import Tap
+from beers import reference_data
+from beers.models import Manufacturer, Beer
 
 
 CENTRAL_TIME = zoneinfo.ZoneInfo("America/Chicago")
@@ -42,7 +41,11 @@ class StemAndSteinParser(BaseTapListProvider):
     def __init__(self):
         self.parser = None
         self.serving_sizes = {
-            i.volume_oz: i for i in ServingSize.objects.filter(volume_oz__in=[10, 16])
+            volume_oz: serving_size
+            for volume_oz, serving_size in (
+                reference_data.serving_sizes_by_volume().items()
+            )
+            if volume_oz in (10, 16)
         }
         if not self.serving_sizes or len(self.serving_sizes) != 2:
             raise ValueError("No serving sizes defined. Import fixtures!")
@@ -50,7 +53,7 @@ class StemAndSteinParser(BaseTapListProvider):
         super().__init__()
 
     def fetch_root_html(self):
-        response = requests.get(self.__class__.ROOT_URL).text
+        response = self.http.get(self.__class__.ROOT_URL).text
         self.parser = BeautifulSoup(response, "html.parser")
 
     def dump_html(self):
@@ -133,7 +136,7 @@ class StemAndSteinParser(BaseTapListProvider):
 
     def fill_in_beer_details(self, beer):
         """Update color, serving size, and price for a beer"""
-        beer_html = requests.get(
+        beer_html = self.http.get(
             self.__class__.BEER_URL.format(beer.stem_and_stein_pk),
         ).text
         beer_parser = BeautifulSoup(beer_html, "html.parser")
@@ -191,12 +194,7 @@ class StemAndSteinParser(BaseTapListProvider):
             beer.color_html = color
             beer.save()
         serving_size = self.serving_sizes[volume_oz]
-        BeerPrice.objects.update_or_create(
-            venue=self.venue,
-            serving_size=serving_size,
-            beer=beer,
-            defaults={"price": price},
-        )
+        self.stage_prices(self.venue, beer, {serving_size: price})
         time_tapped = None
         for row in tap_body.find_all("tr"):
             cells = list(row.find_all("td"))
@@ -208,30 +206,13 @@ class StemAndSteinParser(BaseTapListProvider):
         self.venue = venue
         self.fetch_root_html()
         beers_found = self.parse_root_html()
-        taps = self.parse_beers(beers_found)
-        existing_taps = {i.tap_number: i for i in venue.taps.all()}
-        LOG.debug("existing taps %s", existing_taps)
-        taps_hit = []
+        beers = self.parse_beers(beers_found)
+        taps: dict[int, dict] = {}
         latest_time = datetime.datetime(1970, 1, 1, 0, tzinfo=CENTRAL_TIME)
-        for tap_number, beer in taps.items():
+        for tap_number, beer in beers.items():
             time_tapped = self.fill_in_beer_details(beer)
             if time_tapped > latest_time:
                 latest_time = time_tapped
-            try:
-                tap = existing_taps[tap_number]
-            except KeyError:
-                tap = Tap(
-                    venue=self.venue,
-                    tap_number=tap_number,
-                )
-            tap.beer = beer
-            tap.time_added = time_tapped
-            tap.save()
-            taps_hit.append(tap.tap_number)
-        LOG.debug("Deleting all taps except %s", taps_hit)
-        Tap.objects.filter(
-            venue=venue,
-        ).exclude(
-            tap_number__in=taps_hit,
-        ).delete()
+            taps[tap_number] = {"beer": beer, "time_added": time_tapped}
+        self.reconcile_taps(venue, taps)
         return latest_time
@@ -7,7 +7,6 @@ import os
 import json
 
 import configurations
-import requests
 from dateutil.parser import parse
 from django.core.exceptions import ImproperlyConfigured, AppRegistryNotReady
 
@@ -21,6 +20,7 @@ except (ImproperlyConfigured, AppRegistryNotReady):
     from ..base import BaseTapListProvider
 
 from taps.models import Tap
+from ..snapshot import TapListSnapshot
 
 
 UTC = datetime.timezone.utc
@@ -41,18 +41,21 @@ class TaphunterParser(BaseTapListProvider):
             self.url = self.URL.format(location)
         super().__init__()
 
-    def handle_venue(self, venue):
+    def fetch_venue_data(self, venue):
         location = venue.api_configuration.taphunter_location
+        return self.conditional_get(venue, self.URL.format(location)).json()
+
+    def parse_venue_data(self, venue, data) -> TapListSnapshot:
         excluded_lists = venue.api_configuration.taphunter_excluded_lists
-        self.url = self.URL.format(location)
-        data = self.fetch()
-        taps = {tap.tap_number: tap for tap in venue.taps.all()}
-        manufacturers = {}
+        # TapHunter has never cleared out taps missing from the list
+        snapshot = TapListSnapshot(
+            updated=datetime.datetime(1970, 1, 1, 12, tzinfo=UTC),
+            delete_stale=False,
+        )
 
         use_sequential_taps = any(
             tap_info["serving_info"]["tap_number"] == "" for tap_info in data["taps"]
         )
-        latest_timestamp = datetime.datetime(1970, 1, 1, 12, tzinfo=UTC)
         for index, entry in enumerate(data["taps"]):
             # 1. parse the tap
             tap_info = self.parse_tap(entry)
@@ -71,66 +74,47 @@ class TaphunterParser(BaseTapListProvider):
                 tap_number = index + 1
             else:
                 tap_number = tap_info["tap_number"]
-            try:
-                tap = taps[tap_number]
-            except KeyError:
-                tap = Tap(venue=venue, tap_number=tap_number)
-            tap.time_added = tap_info["added"]
-            tap.time_updated = tap_info["updated"]
             parsed_time = parse(tap_info["updated"])
-            if parsed_time > latest_timestamp:
-                latest_timestamp = parsed_time
-            if "percent_full" in tap_info:
-                tap.estimated_percent_remaining = tap_info["percent_full"]
-            else:
-                tap.estimated_percent_remaining = None
-
+            tap = {
+                "time_added": parse(tap_info["added"]),
+                "time_updated": parsed_time,
+                "estimated_percent_remaining": tap_info.get("percent_full"),
+                "gas_type": "",
+            }
+            if parsed_time > snapshot.updated:
+                snapshot.updated = parsed_time
             if "gas_type" in tap_info and tap_info["gas_type"] in [
                 i[0] for i in Tap.GAS_CHOICES
             ]:
-                tap.gas_type = tap_info["gas_type"]
-            else:
-                tap.gas_type = ""
-            # 2. parse the manufacturer, creating if needed
+                tap["gas_type"] = tap_info["gas_type"]
+            # 2. parse the manufacturer
             parsed_manufacturer = self.parse_manufacturer(entry)
-            try:
-                manufacturer = manufacturers[parsed_manufacturer["name"]]
-            except KeyError:
-                kwargs = {
-                    key: val
-                    for key, val in parsed_manufacturer.items()
-                    if key != "name" and val
-                }
-                manufacturer = self.get_manufacturer(
-                    name=parsed_manufacturer["name"],
-                    **kwargs,
-                )
-                manufacturers[manufacturer.name] = manufacturer
-            # 3. get the beer, creating if necessary
+            kwargs = {
+                key: val
+                for key, val in parsed_manufacturer.items()
+                if key != "name" and val
+            }
+            manufacturer = snapshot.add_manufacturer(
+                parsed_manufacturer["name"], **kwargs
+            )
+            # 3. parse the beer
             parsed_beer = self.parse_beer(entry)
-            name = parsed_beer["name"]
+            name = parsed_beer.pop("name")
             style = parsed_beer.pop("style", {})
             if style:
                 parsed_beer["style"] = f"{style['category']} - {style['name']}"
             color_srm = parsed_beer.pop("srm", 0)
             if color_srm:
                 parsed_beer["color_srm"] = color_srm
-            LOG.debug(
-                "looking up beer: name %s, mfg %s, other data %s",
+            beer = snapshot.add_beer(
                 name,
                 manufacturer,
-                parsed_beer,
-            )
-            beer = self.get_beer(
-                manufacturer=manufacturer,
                 pricing=self.parse_pricing(entry),
-                venue=venue,
                 **parsed_beer,
             )
             # 4. assign the beer to the tap
-            tap.beer = beer
-            tap.save()
-        return latest_timestamp
+            snapshot.add_tap(tap_number, beer, **tap)
+        return snapshot
 
     def parse_beer(self, tap):
         beer = {
@@ -207,7 +191,7 @@ class TaphunterParser(BaseTapListProvider):
         return pricing
 
     def fetch(self):
-        data = requests.get(self.url).json()
+        data = self.http.get(self.url).json()
         self.json = data
         return data
 
@@ -16,7 +16,7 @@ except (ImproperlyConfigured, AppRegistryNotReady):
     configurations.setup()
     from ..base import BaseTapListProvider
 
-from taps.models import Tap
+from ..snapshot import TapListSnapshot
 
 
 class TaplistDotIOParser(BaseTapListProvider):
@@ -34,45 +34,59 @@ class TaplistDotIOParser(BaseTapListProvider):
         self._data = None
 
     def fetch_data(self):
-        response = requests.get(
-            self.URL.format(self.display_id),
-            cookies={"taplist_access_code": self.taplist_access_code},
-            headers={
-                "taplist-agent": "TaplistClient/6",
-                "user-agent": "Python Requests - Alexa",
-                "referer": "https://taplist.io/display",
+        self._data = self.fetch_display(self.display_id, self.taplist_access_code)
+
+    REQUEST_HEADERS = {
+        "taplist-agent": "TaplistClient/6",
+        "user-agent": "Python Requests - Alexa",
+        "referer": "https://taplist.io/display",
+    }
+
+    def fetch_display(self, display_id, taplist_access_code):
+        response = self.http.get(
+            self.URL.format(display_id),
+            cookies={"taplist_access_code": taplist_access_code},
+            headers=self.REQUEST_HEADERS,
+        )
+        return response.json()
+
+    def fetch_venue_data(self, venue):
+        response = self.conditional_get(
+            venue,
+            self.URL.format(venue.api_configuration.taplist_io_display_id),
+            cookies={
+                "taplist_access_code": venue.api_configuration.taplist_io_access_code
             },
+            headers=self.REQUEST_HEADERS,
         )
-        self._data = response.json()
+        return response.json()
+
+    def normalize_payload(self, data):
+        # last_seen is when the display last checked in, not when it changed
+        return {key: value for key, value in data.items() if key != "last_seen"}
 
     def update(self):
         self.fetch_data()
         self.parse()
 
-    def handle_venue(self, venue):
-        self.display_id = venue.api_configuration.taplist_io_display_id
-        self.taplist_access_code = venue.api_configuration.taplist_io_access_code
-        self.fetch_data()
-        taps = {i.tap_number: i for i in venue.taps.all()}
-        timestamp = parse(self._data["last_seen"])
-        for index, tap in enumerate(self._data["menu"]["sections"][0]["items"]):
+    def parse_venue_data(self, venue, data) -> TapListSnapshot:
+        snapshot = TapListSnapshot(updated=parse(data["last_seen"]), delete_stale=False)
+        for index, tap in enumerate(data["menu"]["sections"][0]["items"]):
             tap_dict = self.parse_tap(tap["tap"])
             tap_number = tap_dict.pop("tap_number", index + 1)
-            current_tap = taps.get(tap_number, Tap(tap_number=tap_number, venue=venue))
             if not tap_dict:
-                current_tap.beer = None
-                current_tap.time_updated = timestamp
-                current_tap.save()
+                snapshot.add_tap(tap_number, None, time_updated=snapshot.updated)
                 continue
-            current_tap.time_added = tap_dict.pop("time_added")
+            time_added = tap_dict.pop("time_added")
             mfg_dict = tap_dict.pop("manufacturer")
-            manufacturer = self.get_manufacturer(**mfg_dict)
-            beer = self.get_beer(manufacturer=manufacturer, venue=venue, **tap_dict)
-            current_tap.beer = beer
-            if current_tap.time_updated != timestamp:
-                current_tap.time_updated = timestamp
-                current_tap.save()
-        return timestamp
+            manufacturer = snapshot.add_manufacturer(**mfg_dict)
+            beer = snapshot.add_beer(
+                tap_dict.pop("name"), manufacturer=manufacturer, **tap_dict
+            )
+            tap = snapshot.add_tap(tap_number, beer, time_updated=snapshot.updated)
+            if time_added:
+                tap.fields["time_added"] = time_added
+        return snapshot
 
     def parse_tap(self, tap_dict):
         if tap_dict["current_keg"] is None:
@@ -9,9 +9,8 @@ import os
 import re
 
 import dateutil.parser
+from lxml.html import tostring
 from dateutil.relativedelta import relativedelta
-import requests
-from bs4 import BeautifulSoup
 import configurations
 from django.utils.timezone import now
 from django.core.exceptions import ImproperlyConfigured, AppRegistryNotReady
@@ -27,7 +26,8 @@ except (ImproperlyConfigured, AppRegistryNotReady):
     from ..base import BaseTapListProvider
 
 from beers.models import Style
-from taps.models import Tap
+from ..markup import first, has_class, parse_html, text, xpath
+from ..snapshot import TapListSnapshot
 
 
 UTC = datetime.timezone.utc
@@ -36,6 +36,39 @@ ABV_REGEX = re.compile(r"\d{1,2}(\.\d{1,3})?")
 IBU_REGEX = re.compile(r"\d{1,3}(\.\d{1,3})?")
 # we want to match 6 pack, 12-pack, 24-Pack, 6 Pack, etc
 X_PACK_REGEX = re.compile(r"\d*(\s|-)*(P|p)ack")
+# what the JS escapes in the HTML it writes into the page; escaped newlines
+# are dropped altogether
+ESCAPE_REGEX = re.compile(r"\\([n\"/'])")
+UNESCAPED = {"n": "", '"': '"', "/": "/", "'": "'"}
+
+SECTIONS = xpath(f"//div[{has_class('section')}]")
+SECTION_NAME = xpath(f".//div[{has_class('section-name')}]")
+SECTION_HEADING = xpath(f".//div[{has_class('section-heading')}]")
+MENU_ITEMS = xpath(f".//div[{has_class('menu-item')}]")
+MENU_INFO = xpath(f"//div[{has_class('menu-info')}]")
+TIME = xpath(".//time")
+PRICES = xpath(f".//div[{has_class('with-price')}]")
+PRICE_ROWS = xpath(f".//div[{has_class('container-row')}]")
+PRICE_TYPE = xpath(f".//span[{has_class('type')}]")
+PRICE = xpath(f".//span[{has_class('price')}]")
+BEER_NAME = xpath(f".//p[{has_class('beer-name')}]")
+TAP_NUMBER = xpath(f".//span[{has_class('tap-number-hideable')}]")
+ITEM_TAP_NUMBER = xpath(f".//span[{has_class('item-tap-number')}]")
+BEER_LABEL = xpath(
+    ".//div[normalize-space(@class)='label-image-hideable beer-label pull-left']"
+)
+ITEM_LABEL = xpath(
+    ".//div[normalize-space(@class)='label-image-hideable item-label pull-left']"
+)
+LINK = xpath(".//a")
+IMAGE = xpath(".//img")
+BEER_STYLE = xpath(f".//span[{has_class('beer-style')}]")
+ITEM_TITLE = xpath(f".//a[{has_class('item-title-color')}]")
+ITEM_STYLE = xpath(f".//span[{has_class('item-style')}]")
+BREWERY = xpath(f".//span[{has_class('brewery')}]")
+LOCATION = xpath(f".//span[{has_class('location')}]")
+ABV = xpath(f".//span[{has_class('abv')}]")
+IBU = xpath(f".//span[{has_class('ibu')}]")
 
 
 class UntappdParser(BaseTapListProvider):
@@ -54,27 +87,28 @@ class UntappdParser(BaseTapListProvider):
         self.venue_name = ""
         super().__init__()
 
-    def fetch_data(self):
-        if not self.location_url:
+    def fetch_data(self, location_url=None):
+        location_url = location_url or self.location_url
+        if not location_url:
             raise ValueError("You must configure the location URL")
-        data = requests.get(self.location_url).text
+        data = self.http.get(location_url).text
         return data
 
-    def handle_venue(self, venue):
+    def fetch_venue_data(self, venue):
+        location_url = self.URL.format(
+            venue.api_configuration.untappd_location,
+            venue.api_configuration.untappd_theme,
+        )
+        return self.conditional_get(venue, location_url).text
+
+    def parse_venue_data(self, venue, data) -> TapListSnapshot:
         self.categories = [
             i.casefold() for i in venue.api_configuration.untappd_categories
         ]
         LOG.debug("Categories: %s", self.categories)
         self.venue_name = venue.name
-        self.location_url = self.URL.format(
-            venue.api_configuration.untappd_location,
-            venue.api_configuration.untappd_theme,
-        )
-        data = self.fetch_data()
         self.parse_html_and_js(data)
 
-        taps = {tap.tap_number: tap for tap in venue.taps.all()}
-        manufacturers = {}
         tap_list = self.taps()
         use_sequential_taps = any(
             tap_info["tap_number"] is None for tap_info in tap_list
@@ -89,30 +123,7 @@ class UntappdParser(BaseTapListProvider):
             use_sequential_taps = True
 
         LOG.debug("use sequential taps? %s", use_sequential_taps)
-        if not use_sequential_taps:
-            populated_taps: list[int] = [
-                tap_info["tap_number"] for tap_info in tap_list
-            ]
-        else:
-            populated_taps = list(range(1, len(tap_list) + 1))
-
-        LOG.debug("populated taps: %s", populated_taps)
-        cleared = (
-            Tap.objects.filter(
-                venue=venue,
-            )
-            .exclude(
-                tap_number__in=populated_taps,
-            )
-            .delete()[1]
-            .get("taps.Tap", 0)
-        )
-        if cleared:
-            LOG.info(
-                "Cleared %s now unused taps (not in %s)",
-                cleared,
-                sorted(populated_taps),
-            )
+        snapshot = TapListSnapshot()
         latest_timestamp = datetime.datetime(1970, 1, 1, 12, tzinfo=UTC)
         for index, tap_info in enumerate(tap_list):
             # 1. get the tap
@@ -122,56 +133,51 @@ class UntappdParser(BaseTapListProvider):
                 tap_number = index + 1
             else:
                 tap_number = tap_info["tap_number"]
-            try:
-                tap = taps[tap_number]
-            except KeyError:
-                tap = Tap(venue=venue, tap_number=tap_number)
+            tap = {}
             if tap_info["added"]:
-                tap.time_added = dateutil.parser.parse(tap_info["added"])
-                if tap.time_added > latest_timestamp:
+                tap["time_added"] = dateutil.parser.parse(tap_info["added"])
+                if tap["time_added"] > latest_timestamp:
                     LOG.debug(
                         "latest timestamp updated to %s (added)",
-                        tap.time_updated,
+                        tap["time_added"],
                     )
-                    latest_timestamp = tap.time_added
+                    latest_timestamp = tap["time_added"]
             if tap_info["updated"]:
-                tap.time_updated = dateutil.parser.parse(tap_info["updated"])
-                if tap.time_updated > latest_timestamp:
+                tap["time_updated"] = dateutil.parser.parse(tap_info["updated"])
+                if tap["time_updated"] > latest_timestamp:
                     LOG.debug(
                         "latest timestamp updated to %s (updated)",
-                        tap.time_updated,
+                        tap["time_updated"],
                     )
-                    latest_timestamp = tap.time_updated
+                    latest_timestamp = tap["time_updated"]
             # 2. parse the manufacturer
-            try:
-                manufacturer = manufacturers[tap_info["manufacturer"]["name"]]
-            except KeyError:
-                location = tap_info["manufacturer"]["location"]
-                defaults = {
-                    "untappd_url": tap_info["manufacturer"]["untappd_url"],
-                }
-                if location:
-                    defaults["location"] = location
-                manufacturer = self.get_manufacturer(
-                    tap_info["manufacturer"]["name"],
-                    **defaults,
-                )
-                manufacturers[manufacturer.name] = manufacturer
-            # 3. get the beer, creating if necessary
+            location = tap_info["manufacturer"]["location"]
+            defaults = {
+                "untappd_url": tap_info["manufacturer"]["untappd_url"],
+            }
+            if location:
+                defaults["location"] = location
+            manufacturer = snapshot.add_manufacturer(
+                tap_info["manufacturer"]["name"],
+                **defaults,
+            )
+            # 3. parse the beer
             beer_name = tap_info["beer"].pop("name")
-            beer = self.get_beer(
+            beer = snapshot.add_beer(
                 beer_name,
                 manufacturer,
-                venue=venue,
                 pricing=tap_info["pricing"],
                 **tap_info["beer"],
             )
             # 4. assign the beer to the tap
-            tap.beer = beer
-            tap.save()
-        if latest_timestamp == datetime.datetime(1970, 1, 1, 12, tzinfo=UTC):
-            return None
-        return latest_timestamp
+            snapshot.add_tap(tap_number, beer, **tap)
+        if latest_timestamp != datetime.datetime(1970, 1, 1, 12, tzinfo=UTC):
+            snapshot.updated = latest_timestamp
+        return snapshot
+
+    def lookup_style(self, name):
+        # Untappd styles are "Category - Name"
+        return self.parse_style(name)
 
     def parse_html_and_js(self, data):
         # Pull the relevant HTML from the JS.
@@ -179,28 +185,23 @@ class UntappdParser(BaseTapListProvider):
         end_idx = data.find(";\n\n")
         html = data[(start_idx + len(self.SEARCH)) : end_idx]
 
-        # Unescape the HTML
-        html = html.replace("\\n", "")
-        html = html.replace('\\"', '"')
-        html = html.replace("\\/", "/")
-        html = html.replace("\\'", "'")
-
-        self.soup = BeautifulSoup(html, "lxml")
-
-        info_elements = self.soup.find_all("div", {"class": "section"})
+        html = ESCAPE_REGEX.sub(lambda match: UNESCAPED[match[1]], html)
+        self.soup = parse_html(html)
 
         self.taplists = []
+        if self.soup is None:
+            return
 
-        for element in info_elements:
-            header = element.find("div", {"class": "section-name"})
+        for element in SECTIONS(self.soup):
+            header = first(element, SECTION_NAME)
             if header is None:
-                header = element.find("div", {"class": "section-heading"})
-            text = header.text
-            if text.casefold().strip() in self.categories:
-                LOG.debug("Adding tap list %s", text)
+                header = first(element, SECTION_HEADING)
+            header_text = text(header)
+            if header_text.casefold().strip() in self.categories:
+                LOG.debug("Adding tap list %s", header_text)
                 self.taplists.append(element)
             else:
-                LOG.debug("Ignoring tap list %s", text)
+                LOG.debug("Ignoring tap list %s", header_text)
 
     def parse_style(self, style):
         if "-" in style:
@@ -302,12 +303,12 @@ class UntappdParser(BaseTapListProvider):
     def parse_pricing(self, entry):
         pricing = []
 
-        price_div = entry.find("div", {"class": "with-price"})
-        if price_div:
-            for row in price_div.find_all("div", {"class": "container-row"}):
+        price_div = first(entry, PRICES)
+        if price_div is not None:
+            for row in PRICE_ROWS(price_div):
                 try:
-                    size = row.find("span", {"class": "type"}).text
-                    price = row.find("span", {"class": "price"}).text
+                    size = text(first(row, PRICE_TYPE))
+                    price = text(first(row, PRICE))
                 except AttributeError:
                     LOG.debug("No price entry found for row %s", row)
                     continue
@@ -325,34 +326,28 @@ class UntappdParser(BaseTapListProvider):
         return pricing
 
     def parse_tap(self, entry):
-        beer_name_p = entry.find("p", {"class": "beer-name"})
+        beer_name_p = first(entry, BEER_NAME)
         if beer_name_p is None:
             return self.parse_item_tap(entry)
-        beer_info = beer_name_p.text
+        beer_info = text(beer_name_p)
         LOG.debug("parsing beer %s", beer_info)
-        tap_num = entry.find(
-            "span",
-            {"class": "tap-number-hideable"},
-        ).text.strip()
-        beer_link = entry.find(
-            "div",
-            {"class": "label-image-hideable beer-label pull-left"},
-        )
-        beer_link_tag = beer_link.find("a")
-        beer_image = beer_link.find("img").attrs["src"]
-        if beer_link_tag:
-            url = beer_link_tag.attrs["href"]
+        tap_num = text(first(entry, TAP_NUMBER)).strip()
+        beer_link = first(entry, BEER_LABEL)
+        beer_link_tag = first(beer_link, LINK)
+        beer_image = first(beer_link, IMAGE).attrib["src"]
+        if beer_link_tag is not None:
+            url = beer_link_tag.attrib["href"]
         else:
             url = None
 
-        beer_style = entry.find("span", {"class": "beer-style"}).text.strip()
-        brewery_span = entry.find("span", {"class": "brewery"})
-        brewery = brewery_span.text.strip()
-        brewery_url = brewery_span.find("a").attrs["href"]
+        beer_style = text(first(entry, BEER_STYLE)).strip()
+        brewery_span = first(entry, BREWERY)
+        brewery = text(brewery_span).strip()
+        brewery_url = first(brewery_span, LINK).attrib["href"]
 
-        location_span = entry.find("span", {"class": "location"})
-        if location_span:
-            loc = location_span.text
+        location_span = first(entry, LOCATION)
+        if location_span is not None:
+            loc = text(location_span)
         else:
             loc = ""
 
@@ -366,7 +361,7 @@ class UntappdParser(BaseTapListProvider):
             "beer": {
                 "name": beer_info,
                 "untappd_url": url,
-                "style": self.parse_style(beer_style),
+                "style": beer_style,
                 "logo_url": beer_image,
             },
             "manufacturer": {
@@ -380,9 +375,9 @@ class UntappdParser(BaseTapListProvider):
             "tap_number": int(tap_num.replace(".", "")) if tap_num else None,
         }
 
-        abv_span = entry.find("span", {"class": "abv"})
-        if abv_span:
-            abv = abv_span.text
+        abv_span = first(entry, ABV)
+        if abv_span is not None:
+            abv = text(abv_span)
             abv = abv.replace("ABV", "")
             abv = float(abv.replace("%", ""))
         else:
@@ -390,59 +385,50 @@ class UntappdParser(BaseTapListProvider):
 
         tap_dict["beer"]["abv"] = abv
 
-        ibu = entry.find("span", {"class": "ibu"})
-        if ibu:
-            ibu = ibu.text.replace("IBU", "")
+        ibu = first(entry, IBU)
+        if ibu is not None:
+            ibu = text(ibu).replace("IBU", "")
             ibu = float(ibu)
             tap_dict["beer"]["ibu"] = ibu
 
         return tap_dict
 
     def parse_item_tap(self, entry):
-        beer_name_span = entry.find("a", {"class": "item-title-color"})
-        beer_info = beer_name_span.text
+        beer_name_span = first(entry, ITEM_TITLE)
+        beer_info = text(beer_name_span)
         LOG.debug("parsing beer %s", beer_info)
-        if tap_span := (
-            entry.find("span", {"class": "tap-number-hideable"})
-            or entry.find("span", {"class": "item-tap-number"})
-        ):
-            tap_num: str = tap_span.text.strip()
+        tap_span = first(entry, TAP_NUMBER)
+        if tap_span is None:
+            tap_span = first(entry, ITEM_TAP_NUMBER)
+        if tap_span is not None:
+            tap_num: str = text(tap_span).strip()
         else:
             tap_num = ""
-        beer_link = entry.find(
-            "div",
-            {"class": "label-image-hideable item-label pull-left"},
-        )
+        beer_link = first(entry, ITEM_LABEL)
         url = None
         beer_image = None
-        if beer_link:
-            beer_link_tag = beer_link.find("a")
-            beer_image = beer_link.find("img").attrs["src"]
-            if beer_link_tag:
-                url = beer_link_tag.attrs["href"]
+        if beer_link is not None:
+            beer_link_tag = first(beer_link, LINK)
+            beer_image = first(beer_link, IMAGE).attrib["src"]
+            if beer_link_tag is not None:
+                url = beer_link_tag.attrib["href"]
 
         beer_style = (
-            entry.find(
-                "span",
-                {"class": "item-style"},
-            )
-            .text.replace("•", "")
-            .replace("\xa0", "")
-            .strip()
+            text(first(entry, ITEM_STYLE)).replace("•", "").replace("\xa0", "").strip()
         )
-        if brewery_span := entry.find("span", {"class": "brewery"}):
-            brewery = brewery_span.text.strip()
+        if (brewery_span := first(entry, BREWERY)) is not None:
+            brewery = text(brewery_span).strip()
 
             brewery_url = None
-            if brewery_url_a := brewery_span.find("a"):
-                brewery_url = brewery_url_a.attrs["href"]
+            if (brewery_url_a := first(brewery_span, LINK)) is not None:
+                brewery_url = brewery_url_a.attrib["href"]
         else:
             brewery = self.venue_name
             brewery_url = ""
 
-        location_span = entry.find("span", {"class": "location"})
-        if location_span:
-            loc = location_span.text
+        location_span = first(entry, LOCATION)
+        if location_span is not None:
+            loc = text(location_span)
         else:
             loc = ""
 
@@ -456,7 +442,7 @@ class UntappdParser(BaseTapListProvider):
             "beer": {
                 "name": beer_info,
                 "untappd_url": url,
-                "style": self.parse_style(beer_style),
+                "style": beer_style,
                 "logo_url": beer_image,
             },
             "manufacturer": {
@@ -470,27 +456,28 @@ class UntappdParser(BaseTapListProvider):
             "tap_number": int(tap_num.replace(".", "")) if tap_num else None,
         }
 
-        abv_span = entry.find("span", {"class": "abv"})
-        if abv_span:
-            abv = abv_span.text
+        abv_span = first(entry, ABV)
+        if abv_span is not None:
+            abv = text(abv_span)
             match = ABV_REGEX.search(abv)
             try:
                 abv = float(match[0])
             except (TypeError, IndexError):
-                LOG.warning("Unable to parse ABV %r", abv_span.text)
+                LOG.warning("Unable to parse ABV %r", abv)
                 abv = None
         else:
             abv = None
 
         t["beer"]["abv"] = abv
 
-        ibu = entry.find("span", {"class": "ibu"})
-        if ibu:
-            match = IBU_REGEX.search(ibu.text)
+        ibu = first(entry, IBU)
+        if ibu is not None:
+            ibu = text(ibu)
+            match = IBU_REGEX.search(ibu)
             try:
                 ibu = float(match[0])
             except (TypeError, IndexError):
-                LOG.warning("Unable to parse IBU %r", ibu.text)
+                LOG.warning("Unable to parse IBU %r", ibu)
                 ibu = None
 
             t["beer"]["ibu"] = ibu
@@ -501,13 +488,13 @@ class UntappdParser(BaseTapListProvider):
         ret = []
         for taplist in self.taplists:
             LOG.debug("Opening tap list")
-            entries = taplist.find_all("div", {"class": "menu-item"})
+            entries = MENU_ITEMS(taplist)
             LOG.debug("Found %s entries", len(entries))
             updated = None
-            menus = self.soup.find_all("div", {"class": "menu-info"})
+            menus = MENU_INFO(self.soup)
             for menu in menus:
-                if time_element := menu.find("time"):
-                    updated_str: str = time_element.text.strip()
+                if (time_element := first(menu, TIME)) is not None:
+                    updated_str: str = text(time_element).strip()
                     LOG.debug("updated time: %s", updated_str)
                     if updated_str.endswith("ST") or updated_str.endswith("DT"):
                         # it isn't in UTC. Grr.
@@ -589,7 +576,7 @@ def main():
     untappd_parser.parse_html_and_js(data)
 
     if args.dump:
-        print(untappd_parser.soup.prettify())
+        print(tostring(untappd_parser.soup, encoding="unicode", pretty_print=True))
 
     for tap in untappd_parser.taps():
         PrettyPrinter(indent=4).pprint(tap)
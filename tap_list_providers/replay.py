@@ -0,0 +1,314 @@
+"""Replaying the captured tap lists in example_data through the parsers
+
+Each scenario sets up a venue the way the parser's tests do, then polls it
+twice with handle_venues(), the way parse_provider does, except that every
+request is answered from example_data instead of going out over the
+network. The first poll starts from an empty tap list (cold); the second
+sees the exact same payload again (warm), with unchanged tap lists still
+parsed rather than skipped, so both measure the whole ingestion path.
+
+For each poll, it records how long it took, how many queries it ran and how
+long they took, how many rows it inserted, updated, and deleted, and (on a
+separate pass, since tracing slows everything down) the peak memory Python
+allocated. Every scenario is rolled back when it's done, and caching goes to
+a local memory cache for the duration, whatever CACHES says.
+"""
+from datetime import timedelta
+import json
+from pathlib import Path
+import time
+import tracemalloc
+from typing import NamedTuple
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import override_settings
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from beers.models import Manufacturer, ServingSize
+from hsv_dot_beer.benchmarks import LOCAL_CACHES
+from venues.models import Venue, VenueAPIConfiguration
+from .parsers.arryved_menu import ArryvedMenuParser
+from .parsers.arryved_pos import ArryvedPOSParser
+from .parsers.beermenus import BeerMenusParser
+from .parsers.digitalpour import DigitalPourParser
+from .parsers.stemandstein import StemAndSteinParser
+from .parsers.taphunter import TaphunterParser
+from .parsers.taplist_io import TaplistDotIOParser
+from .parsers.untappd import UntappdParser
+
+EXAMPLE_DATA = Path(__file__).parent / "example_data"
+WRITE_STATEMENTS = {"INSERT": "inserted", "UPDATE": "updated", "DELETE": "deleted"}
+
+
+class ReplayAdapter(BaseAdapter):
+    """Answers requests from a dict of (method, URL) -> body
+
+    A URL without a query string matches any query string. Anything else
+    gets a 404.
+    """
+
+    def __init__(self, payloads: dict[tuple[str, str], bytes]):
+        super().__init__()
+        self.payloads = payloads
+
+    def send(self, request, **kwargs):
+        url = request.url
+        body = self.payloads.get((request.method, url))
+        if body is None:
+            body = self.payloads.get((request.method, url.split("?")[0]))
+        response = requests.Response()
+        response.status_code = 404 if body is None else 200
+        response._content = body or b""  # pylint: disable=protected-access
+        response.headers = CaseInsensitiveDict()
+        response.encoding = "utf-8"
+        response.url = url
+        response.request = request
+        response.elapsed = timedelta(0)
+        return response
+
+    def close(self):
+        pass
+
+
+class Scenario(NamedTuple):
+    name: str
+    parser: type
+    # VenueAPIConfiguration fields
+    config: dict
+    # (method, URL) -> file name in example_data, or the body itself
+    payloads: dict
+    # manufacturers the venue's configuration expects to exist
+    manufacturers: tuple = ()
+
+    def load_payloads(self) -> dict[tuple[str, str], bytes]:
+        return {
+            key: (
+                payload
+                if isinstance(payload, bytes)
+                else (EXAMPLE_DATA / payload).read_bytes()
+            )
+            for key, payload in self.payloads.items()
+        }
+
+
+def beermenus_payloads(slug: str) -> dict:
+    payloads = {}
+    for path in (EXAMPLE_DATA / "beermenus").iterdir():
+        # pages are saved as <slug>.html, with any query string as __<query>
+        page = path.name.split(".")[0].replace("__", "?")
+        if path.name.startswith(slug):
+            url = BeerMenusParser.URL.format(page)
+        else:
+            url = f"https://www.beermenus.com/beers/{page}"
+        payloads["GET", url] = f"beermenus/{path.name}"
+    return payloads
+
+
+def stem_and_stein_payloads() -> dict:
+    payloads = {("GET", f"{StemAndSteinParser.ROOT_URL}/"): "stem_and_stein_main.html"}
+    for path in EXAMPLE_DATA.glob("*.html"):
+        if path.stem.isdigit():
+            url = StemAndSteinParser.BEER_URL.format(path.stem)
+            payloads["GET", url] = path.name
+    return payloads
+
+
+SCENARIOS = (
+    Scenario(
+        "digitalpour",
+        DigitalPourParser,
+        {
+            "url": "https://localhost:8000",
+            "digital_pour_venue_id": "12345",
+            "digital_pour_location_number": 1,
+        },
+        {
+            (
+                "GET",
+                DigitalPourParser.URL.format(12345, 1, DigitalPourParser.APIKEY),
+            ): "rocket_city_craft_beer.json",
+        },
+    ),
+    Scenario(
+        "untappd",
+        UntappdParser,
+        {
+            "url": "https://localhost:8000",
+            "untappd_location": 12345,
+            "untappd_theme": 55242,
+            "untappd_categories": ["YEAR-ROUND", "SEASONALS", "Beer"],
+        },
+        {("GET", UntappdParser.URL.format(12345, 55242)): "yellowhammer.js"},
+    ),
+    Scenario(
+        "taphunter",
+        TaphunterParser,
+        {"url": "https://localhost:8000", "taphunter_location": "12345"},
+        {("GET", TaphunterParser.URL.format(12345)): "liquor_express.json"},
+    ),
+    Scenario(
+        "taplist.io",
+        TaplistDotIOParser,
+        {
+            "url": "https://localhost:8000",
+            "taplist_io_access_code": "123456",
+            "taplist_io_display_id": "abcdef-abcdef",
+        },
+        {("GET", TaplistDotIOParser.URL.format("abcdef-abcdef")): "taplist_io_v6.json"},
+    ),
+    Scenario(
+        "beermenus",
+        BeerMenusParser,
+        {
+            "beermenus_slug": "64594-bad-daddy-s-burger-bar-huntsville",
+            "beermenus_categories": ["on_tap", "featured"],
+        },
+        beermenus_payloads("64594-bad-daddy-s-burger-bar-huntsville"),
+    ),
+    Scenario(
+        "arryved_menu",
+        ArryvedMenuParser,
+        {
+            "arryved_location_id": "abc123",
+            "arryved_menu_id": "def456",
+            "arryved_manufacturer_name": "Replay Brewing",
+            "arryved_serving_sizes": ["TAS", "32O", "64O", "13O", "PIN"],
+        },
+        {("POST", ArryvedMenuParser.URL): "arryved_menu.json"},
+        manufacturers=("Replay Brewing",),
+    ),
+    Scenario(
+        "arryved_pos",
+        ArryvedPOSParser,
+        {
+            "arryved_location_id": "abc123",
+            "arryved_pos_menu_names": ["Growlers and Crowlers"],
+            "arryved_manufacturer_name": "Replay Brewing",
+            "arryved_serving_sizes": ["32O", "64o"],
+        },
+        {
+            ("POST", ArryvedPOSParser.URL): "arryved_pos.json",
+            ("POST", ArryvedPOSParser.PREAUTH_URL): json.dumps(
+                {"preauth": {"token": "abc123"}}
+            ).encode(),
+            ("POST", ArryvedPOSParser.AUTH_URL): json.dumps(
+                {"anonymous": {"token": "def456"}}
+            ).encode(),
+        },
+        manufacturers=("Replay Brewing",),
+    ),
+    Scenario(
+        "stemandstein",
+        StemAndSteinParser,
+        {
+            "url": "https://localhost:8000",
+            "digital_pour_venue_id": "12345",
+            "digital_pour_location_number": 1,
+        },
+        stem_and_stein_payloads(),
+    ),
+)
+
+
+class QueryCounter:
+    """Database execute wrapper counting queries and the rows they wrote"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = dict.fromkeys(WRITE_STATEMENTS.values(), 0)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+            kind = WRITE_STATEMENTS.get(sql.lstrip()[:6].upper())
+            if kind is not None:
+                self.rows[kind] += max(context["cursor"].rowcount, 0)
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def mount(session, adapter: ReplayAdapter):
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def poll(scenario: Scenario, venue: Venue, payloads: dict) -> dict:
+    adapter = ReplayAdapter(payloads)
+    provider = scenario.parser()
+    # every session the provider makes uses it
+    provider.http_adapter = adapter
+    counter = QueryCounter()
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        venues = provider.get_venues().filter(id=venue.id)
+        provider.handle_venues(venues, skip_unchanged=False)
+    elapsed = time.perf_counter() - started
+    return {
+        "ms": round(elapsed * 1000, 3),
+        "queries": counter.queries,
+        "db_ms": round(counter.db_time * 1000, 3),
+        "rows": counter.rows,
+    }
+
+
+def replay(scenario: Scenario, trace_memory: bool = False) -> list[dict]:
+    """Poll the scenario's venue twice, returning what each poll cost"""
+    payloads = scenario.load_payloads()
+    with transaction.atomic():
+        if not ServingSize.objects.exists():
+            # the parsers that price things need to know the serving sizes
+            call_command("loaddata", "serving_sizes", verbosity=0)
+        for name in scenario.manufacturers:
+            Manufacturer.objects.create(name=name)
+        venue = Venue.objects.create(
+            name=f"Replay ({scenario.name})",
+            slug=f"replay-{scenario.name.replace('.', '-')}",
+            tap_list_provider=scenario.parser.provider_name,
+        )
+        VenueAPIConfiguration.objects.create(venue=venue, **scenario.config)
+        results = []
+        for _ in range(2):
+            if trace_memory:
+                tracemalloc.start()
+            try:
+                result = poll(scenario, venue, payloads)
+                if trace_memory:
+                    result["peak_kib"] = round(
+                        tracemalloc.get_traced_memory()[1] / 1024
+                    )
+            finally:
+                if trace_memory:
+                    tracemalloc.stop()
+            results.append(result)
+        if not results[0]["rows"]["inserted"]:
+            raise BenchmarkError(f"{scenario.name} didn't add any taps")
+        transaction.set_rollback(True)
+    return results
+
+
+def run(scenarios=SCENARIOS, trace_memory: bool = True, log=None) -> dict:
+    """Replay each scenario, cold then warm"""
+    results = {}
+    with override_settings(CACHES=LOCAL_CACHES):
+        for scenario in scenarios:
+            if log is not None:
+                log(scenario.name)
+            cold, warm = replay(scenario)
+            if trace_memory:
+                traced = replay(scenario, trace_memory=True)
+                cold["peak_kib"], warm["peak_kib"] = (
+                    poll["peak_kib"] for poll in traced
+                )
+            results[scenario.name] = {"cold": cold, "warm": warm}
+    return results
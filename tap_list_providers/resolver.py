@@ -0,0 +1,259 @@
+"""In-memory lookups of beers and manufacturers for a provider run
+
+Parsing a provider resolves the same beers and manufacturers over and over,
+once per tap. Instead of asking the database every time, load each table once
+and keep hash indexes on the fields that get_beer() and get_manufacturer()
+match on. Rows created or changed during the run are added back in as they're
+saved, so the indexes stay current.
+
+Guessing a beer's style from its name gets the same treatment: the style names
+are compiled into a single matcher instead of being scanned one by one.
+"""
+from collections import defaultdict
+import logging
+import re
+
+from beers.models import Beer, Manufacturer
+
+LOG = logging.getLogger(__name__)
+
+BEER_UNIQUE_FIELDS = (
+    "manufacturer_url",
+    "untappd_url",
+    "beer_advocate_url",
+    "taphunter_url",
+    "taplist_io_pk",
+    "beermenus_slug",
+    "rate_beer_url",
+)
+
+MANUFACTURER_UNIQUE_FIELDS = (
+    "untappd_url",
+    "taphunter_url",
+    "taplist_io_pk",
+    "beermenus_slug",
+)
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a name the same way citext comparisons do"""
+    return name.lower()
+
+
+def strip_style_name(name: str, style) -> str:
+    """Remove the style name from the end of a beer name"""
+    return re.sub(
+        rf"\s{style.name}$",
+        "",
+        name,
+        flags=re.IGNORECASE,
+    ).strip()
+
+
+class EntityIndex:
+    """Hash indexes for one model, keyed on its unique fields, names, and aliases
+
+    The rows aren't loaded until the first lookup.
+    """
+
+    def __init__(self, model, unique_fields, scope_field=None):
+        self.model = model
+        self.unique_fields = unique_fields
+        # names are only unique within this field (e.g. beer manufacturer)
+        self.scope_field = scope_field
+        self.objects = None
+        self.by_field = {}
+        self.by_name = defaultdict(set)
+        self.by_alias = defaultdict(set)
+        self.keys = {}
+
+    def name_key(self, name, scope=None):
+        return (scope, normalize_name(name))
+
+    def load(self):
+        self.objects = {}
+        self.by_field = {field: {} for field in self.unique_fields}
+        self.by_name.clear()
+        self.by_alias.clear()
+        self.keys = {}
+        for obj in self.model.objects.only(*self.loaded_fields()):
+            self.add(obj)
+        LOG.debug("Loaded %s %s objects", len(self.objects), self.model.__name__)
+
+    def loaded_fields(self) -> list[str]:
+        """What get_beer() and get_manufacturer() can look at or change
+
+        That's every field they can be given (and so every field that's
+        indexed), which leaves out the ones other code maintains, like the
+        search and tap summary columns.
+        """
+        return [
+            field.name for field in self.model._meta.concrete_fields if field.editable
+        ]
+
+    def ensure_loaded(self):
+        if self.objects is None:
+            self.load()
+
+    def add(self, obj):
+        """Index obj, replacing whatever was indexed for it before"""
+        self.ensure_loaded()
+        self.discard(obj)
+        scope = getattr(obj, self.scope_field) if self.scope_field else None
+        field_keys = []
+        for field in self.unique_fields:
+            value = getattr(obj, field)
+            if value:
+                self.by_field[field][value] = obj.pk
+                field_keys.append((field, value))
+        name_key = self.name_key(obj.name, scope)
+        alias_keys = {self.name_key(alias, scope) for alias in obj.alternate_names}
+        self.by_name[name_key].add(obj.pk)
+        for key in alias_keys:
+            self.by_alias[key].add(obj.pk)
+        self.objects[obj.pk] = obj
+        self.keys[obj.pk] = (field_keys, name_key, alias_keys)
+
+    def discard(self, obj):
+        try:
+            field_keys, name_key, alias_keys = self.keys.pop(obj.pk)
+        except KeyError:
+            return
+        for field, value in field_keys:
+            if self.by_field[field].get(value) == obj.pk:
+                del self.by_field[field][value]
+        self.by_name[name_key].discard(obj.pk)
+        for key in alias_keys:
+            self.by_alias[key].discard(obj.pk)
+        del self.objects[obj.pk]
+
+    def get(self, pk):
+        """Get an indexed object by primary key, or None"""
+        self.ensure_loaded()
+        return self.objects.get(pk)
+
+    def filter_by_fields(self, values, name=None, scope=None):
+        """Find everything matching any of the field values (or the exact name)
+
+        Equivalent to filtering with an OR of Q objects.
+        """
+        self.ensure_loaded()
+        pks = {
+            self.by_field[field][value]
+            for field, value in values.items()
+            if value in self.by_field[field]
+        }
+        if name is not None:
+            pks.update(self.by_name.get(self.name_key(name, scope), ()))
+        return [self.objects[pk] for pk in sorted(pks)]
+
+    def filter_by_name(self, name, scope=None):
+        """Find everything whose name or one of its aliases is name"""
+        self.ensure_loaded()
+        key = self.name_key(name, scope)
+        pks = self.by_name.get(key, set()) | self.by_alias.get(key, set())
+        return [self.objects[pk] for pk in sorted(pks)]
+
+    def conflicts(self, obj, field, value):
+        """Would setting field to value on obj collide with another row?"""
+        self.ensure_loaded()
+        other_pk = self.by_field.get(field, {}).get(value)
+        return other_pk is not None and other_pk != obj.pk
+
+
+class StyleMatcher:
+    """Find the longest style name (or alternate name) inside a beer name
+
+    All of the names are compiled into one regex, longest first, wrapped in a
+    lookahead so that every position in the beer name is checked in a single
+    pass. Alternate names are only considered if no name matches. Ties go to
+    whichever style came first.
+    """
+
+    def __init__(self, styles):
+        """styles maps casefolded names to Style objects"""
+        self.names = self.build(styles.items())
+        self.alternate_names = self.build(
+            (alt_name.casefold(), style)
+            for style in styles.values()
+            for alt_name in style.alternate_names
+        )
+
+    @staticmethod
+    def build(items):
+        ranked = {}
+        for name, style in sorted(items, key=lambda k: len(k[0]), reverse=True):
+            # keep the first style that claims the name
+            ranked.setdefault(name, (len(ranked), style))
+        if not ranked:
+            return None, ranked
+        pattern = "|".join(re.escape(name) for name in ranked)
+        return re.compile(f"(?=({pattern}))"), ranked
+
+    @staticmethod
+    def search(matcher, ci_name):
+        regex, ranked = matcher
+        if regex is None:
+            return None
+        # at each position the regex picks the longest name, so the best
+        # match overall is the one ranked highest
+        found = {match.group(1) for match in regex.finditer(ci_name)}
+        if not found:
+            return None
+        return min(ranked[name] for name in found)[1]
+
+    def match(self, beer_name):
+        """Returns (style, whether it was an alternate name) or (None, False)"""
+        ci_name = beer_name.casefold()
+        style = self.search(self.names, ci_name)
+        if style:
+            return style, False
+        return self.search(self.alternate_names, ci_name), True
+
+
+class EntityResolver:
+    """Beer and manufacturer indexes for a single provider run"""
+
+    def __init__(self):
+        self.beers = EntityIndex(Beer, BEER_UNIQUE_FIELDS, "manufacturer_id")
+        self.manufacturers = EntityIndex(Manufacturer, MANUFACTURER_UNIQUE_FIELDS)
+        # (normalized name, unique field values) -> manufacturer PK, so the
+        # same brewery at another venue skips the lookup entirely
+        self.manufacturer_memo = {}
+
+    def find_beer(self, name, manufacturer, unique_fields_present, style=None):
+        """Find a beer the same way get_beer() would query for it
+
+        Returns None if there's no match in memory.
+        """
+        beer = None
+        if unique_fields_present:
+            options = self.beers.filter_by_fields(unique_fields_present)
+            if len(options) > 1:
+                # pick the one which has the preferred field set based on order
+                for field in unique_fields_present:
+                    for option in options:
+                        if getattr(option, field):
+                            beer = option
+                            break
+            elif options:
+                beer = options[0]
+        if beer:
+            return beer
+        options = self.beers.filter_by_name(name, manufacturer.id)
+        if len(options) > 1:
+            LOG.error(
+                "Found duplicate results for name %s from mfg %s!",
+                name,
+                manufacturer,
+            )
+        if options:
+            return options[0]
+        if style and style.name.casefold() in name.casefold():
+            options = self.beers.filter_by_name(
+                strip_style_name(name, style), manufacturer.id
+            )
+            if len(options) == 1:
+                LOG.debug("Successfully replaced %s with %s", name, options[0])
+                return options[0]
+        return None
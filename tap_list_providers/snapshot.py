@@ -0,0 +1,86 @@
+"""What a provider parsed out of one venue's tap list
+
+Parsers that implement parse_venue_data() turn the raw tap list into a
+TapListSnapshot without touching the database, and
+BaseTapListProvider.apply_snapshot() then does all of the resolving and
+writing. (Not to be confused with venues.snapshots, which caches what the
+API serves.)
+
+Beers refer to their manufacturer, and taps and prices to their beer, by
+index into the snapshot's lists, so a snapshot is plain data that can be
+built anywhere and pickled.
+"""
+from dataclasses import dataclass, field
+import datetime
+from decimal import Decimal
+
+
+@dataclass(slots=True)
+class ParsedManufacturer:
+    name: str
+    # anything else get_manufacturer() takes
+    fields: dict = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class ParsedBeer:
+    name: str
+    # index into TapListSnapshot.manufacturers
+    manufacturer: int
+    # anything else get_beer() takes; style can be a name
+    fields: dict = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class ParsedPrice:
+    # index into TapListSnapshot.beers
+    beer: int
+    volume_oz: Decimal
+    price: Decimal
+    # the name for the serving size, if it has to be created
+    serving_size_name: str = ""
+
+
+@dataclass(slots=True)
+class ParsedTap:
+    tap_number: int
+    # index into TapListSnapshot.beers, or None for an empty tap
+    beer: int | None
+    # other Tap fields; the ones that aren't given are left alone
+    fields: dict = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class TapListSnapshot:
+    # when the venue last updated its tap list, if the upstream says
+    updated: datetime.datetime | None = None
+    manufacturers: list[ParsedManufacturer] = field(default_factory=list)
+    beers: list[ParsedBeer] = field(default_factory=list)
+    prices: list[ParsedPrice] = field(default_factory=list)
+    taps: list[ParsedTap] = field(default_factory=list)
+    # whether taps missing from the list should be deleted
+    delete_stale: bool = True
+
+    def add_manufacturer(self, name: str, **fields) -> int:
+        self.manufacturers.append(ParsedManufacturer(name, fields))
+        return len(self.manufacturers) - 1
+
+    def add_beer(self, name: str, manufacturer: int, pricing=(), **fields) -> int:
+        """Add a beer, along with its prices in get_beer()'s format"""
+        self.beers.append(ParsedBeer(name, manufacturer, fields))
+        beer = len(self.beers) - 1
+        for price in pricing:
+            self.prices.append(
+                ParsedPrice(
+                    beer,
+                    price["volume_oz"],
+                    price["price"],
+                    price.get("name", ""),
+                )
+            )
+        return beer
+
+    def add_tap(self, tap_number: int, beer: int | None, **fields) -> ParsedTap:
+        tap = ParsedTap(tap_number, beer, fields)
+        self.taps.append(tap)
+        return tap
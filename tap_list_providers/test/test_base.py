@@ -1,13 +1,25 @@
 import datetime
+from decimal import Decimal
 
+import json
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import now
+from requests.exceptions import RequestException
+import responses
 from unittest import TestCase as UnittestTestCase
 
 from tap_list_providers.base import fix_urls, BaseTapListProvider
+from tap_list_providers.parsers.digitalpour import DigitalPourParser
+from tap_list_providers.replay import EXAMPLE_DATA
+from tap_list_providers.snapshot import TapListSnapshot
+from venues.models import Venue, VenueAPIConfiguration
 from venues.test.factories import VenueFactory
-from beers.test.factories import ManufacturerFactory, StyleFactory
-from beers.models import Manufacturer
+from beers.test.factories import BeerFactory, ManufacturerFactory, StyleFactory
+from beers.models import Beer, BeerPrice, Manufacturer, ServingSize
+from taps.models import Tap
 
 
 class URLFixTestCase(UnittestTestCase):
@@ -51,6 +63,125 @@ class ManufacturerTestCase(TestCase):
         self.assertEqual(looked_up, mfg)
 
 
+class ResolverTestCase(TestCase):
+    def setUp(self):
+        self.manufacturer = ManufacturerFactory(name="Stone")
+        self.beer = BeerFactory(
+            name="Enjoy By IPA",
+            manufacturer=self.manufacturer,
+            manufacturer_url="https://stonebrewing.com/beer/enjoy-by",
+            alternate_names=["Enjoy By"],
+            logo_url="https://example.com/enjoy-by.png",
+        )
+        self.provider = BaseTapListProvider()
+
+    def entity_queries(self, context):
+        return [
+            query["sql"]
+            for query in context.captured_queries
+            if "beers_beer" in query["sql"] or "beers_manufacturer" in query["sql"]
+        ]
+
+    def test_only_loads_what_it_compares(self):
+        beer = self.provider.resolver.beers.get(self.beer.id)
+        self.assertTrue(
+            {"search_text", "search_vector", "taps_count"}.issubset(
+                beer.get_deferred_fields()
+            )
+        )
+        with CaptureQueriesContext(connection) as context:
+            self.provider.get_beer("Enjoy By IPA", self.manufacturer, abv="9.4", ibu=90)
+        # just the update
+        (query,) = self.entity_queries(context)
+        self.assertTrue(query.startswith("UPDATE"))
+
+    def test_repeat_lookups_are_in_memory(self):
+        self.provider.get_manufacturer("Stone")
+        self.provider.get_beer("Enjoy By IPA", self.manufacturer)
+        with CaptureQueriesContext(connection) as context:
+            manufacturer = self.provider.get_manufacturer("Stone Brewing")
+            by_url = self.provider.get_beer(
+                "Something Else",
+                manufacturer,
+                manufacturer_url="https://stonebrewing.com/beer/enjoy-by",
+            )
+            by_alias = self.provider.get_beer("enjoy by", manufacturer)
+        self.assertEqual(manufacturer, self.manufacturer)
+        self.assertEqual(by_url, self.beer)
+        self.assertEqual(by_alias, self.beer)
+        self.assertEqual(self.entity_queries(context), [])
+
+    def test_manufacturer_memoized(self):
+        self.provider.get_manufacturer(
+            "Stone Brewing Co.",
+            untappd_url="https://untappd.com/StoneBrewingCo",
+            location="Escondido, CA",
+        )
+        with CaptureQueriesContext(connection) as context:
+            manufacturer = self.provider.get_manufacturer(
+                "Stone Brewing Co.",
+                untappd_url="https://untappd.com/StoneBrewingCo",
+                location="Escondido, CA",
+            )
+        self.assertEqual(manufacturer, self.manufacturer)
+        self.assertEqual(context.captured_queries, [])
+        with CaptureQueriesContext(connection) as context:
+            self.provider.get_manufacturer(
+                "Stone Brewing Co.",
+                untappd_url="https://untappd.com/StoneBrewingCo",
+                location="Richmond, VA",
+            )
+        # only the changed field gets written
+        (query,) = context.captured_queries
+        self.assertIn('SET "location"', query["sql"])
+        self.assertNotIn('"untappd_url"', query["sql"].split("WHERE")[0])
+
+    def test_created_during_run(self):
+        beer = self.provider.get_beer("Xocoveza", self.manufacturer)
+        with CaptureQueriesContext(connection) as context:
+            looked_up = self.provider.get_beer("Xocoveza", self.manufacturer)
+        self.assertEqual(looked_up, beer)
+        self.assertEqual(self.entity_queries(context), [])
+
+    def test_created_elsewhere(self):
+        self.provider.get_beer("Enjoy By IPA", self.manufacturer)
+        other = BeerFactory(name="Arrogant Bastard", manufacturer=self.manufacturer)
+        looked_up = self.provider.get_beer("Arrogant Bastard", self.manufacturer)
+        self.assertEqual(looked_up, other)
+        self.assertEqual(Beer.objects.count(), 2)
+
+    def test_url_conflict(self):
+        other = BeerFactory(
+            name="Ruination",
+            manufacturer=self.manufacturer,
+            untappd_url="https://untappd.com/b/stone-ruination/1",
+        )
+        looked_up = self.provider.get_beer(
+            "Ruination",
+            self.manufacturer,
+            untappd_url="https://untappd.com/b/stone-ruination/1",
+            manufacturer_url="https://stonebrewing.com/beer/enjoy-by",
+        )
+        self.assertIn(looked_up, [self.beer, other])
+        # neither URL moved because it would conflict
+        other.refresh_from_db()
+        self.beer.refresh_from_db()
+        self.assertIsNone(other.manufacturer_url)
+        self.assertIsNone(self.beer.untappd_url)
+
+    def test_update_keeps_tap_summaries(self):
+        self.provider.get_beer("Enjoy By IPA", self.manufacturer)
+        # a tap elsewhere in the run refreshes the summary behind the index
+        tap = Tap.objects.create(venue=VenueFactory(), tap_number=1, beer=self.beer)
+        Tap.refresh_beer_summaries(tap)
+        beer = self.provider.get_beer("Enjoy By IPA", self.manufacturer, abv="9.4")
+        self.assertEqual(beer, self.beer)
+        self.beer.refresh_from_db()
+        self.assertEqual(self.beer.abv, Decimal("9.4"))
+        self.assertEqual(self.beer.taps_count, 1)
+        self.assertTrue(self.beer.is_on_tap)
+
+
 class TwitterHandleTestCase(TestCase):
     def test_twitter_handle(self):
         mfg = ManufacturerFactory(twitter_handle="abc123")
@@ -71,6 +202,32 @@ class StyleTestCase(TestCase):
         self.assertEqual(looked_up, style)
 
 
+class GuessStyleTestCase(TestCase):
+    def setUp(self):
+        self.ipa = StyleFactory(name="IPA", alternate_names=["India Pale Ale"])
+        self.dipa = StyleFactory(name="Double IPA", alternate_names=["DIPA"])
+        self.stout = StyleFactory(name="Stout", alternate_names=["Porter"])
+        self.provider = BaseTapListProvider()
+        self.provider.fetch_styles()
+
+    def test_longest_match_wins(self):
+        self.assertEqual(self.provider.guess_style("Big Double IPA"), self.dipa)
+        self.assertEqual(self.provider.guess_style("Hazy ipa"), self.ipa)
+
+    def test_alternate_names(self):
+        self.assertEqual(self.provider.guess_style("Baltic Porter"), self.stout)
+        # a real name beats a longer alternate name
+        self.assertEqual(self.provider.guess_style("India Pale Ale Stout"), self.stout)
+
+    def test_no_match(self):
+        self.assertIsNone(self.provider.guess_style("Pilsner"))
+
+    def test_new_style(self):
+        self.assertIsNone(self.provider.guess_style("Smoked Lager"))
+        lager = self.provider.get_style("Lager")
+        self.assertEqual(self.provider.guess_style("Smoked Lager"), lager)
+
+
 class FixBeerNameTestCase(TestCase):
     """Test reformatting beer names"""
 
@@ -123,3 +280,341 @@ class TimestampTestCase(TestCase):
         self.assertEqual(
             self.venue.tap_list_last_check_time, self.provider.check_timestamp
         )
+
+
+class ConcurrentFetchProvider(BaseTapListProvider):
+    """Dummy provider for checking handle_venues()"""
+
+    provider_name = "test-concurrent"
+
+    def fetch_venue_data(self, venue):
+        if venue.name == "unreachable":
+            raise RequestException("upstream is down")
+        return [1, 2, 3]
+
+    def handle_venue(self, venue):
+        for tap_number in self.get_venue_data(venue):
+            Tap.objects.create(venue=venue, tap_number=tap_number)
+        if venue.name == "broken":
+            raise ValueError("bad data")
+        return now()
+
+
+class HandleVenuesTestCase(TestCase):
+    def setUp(self):
+        self.provider = ConcurrentFetchProvider()
+
+    def test_all_venues(self):
+        venues = [VenueFactory() for _ in range(5)]
+        self.provider.handle_venues(venues)
+        for venue in venues:
+            venue.refresh_from_db()
+            self.assertEqual(
+                sorted(venue.taps.values_list("tap_number", flat=True)), [1, 2, 3]
+            )
+            self.assertEqual(
+                venue.tap_list_last_check_time, self.provider.check_timestamp
+            )
+            self.assertIsNotNone(venue.tap_list_last_update_time)
+        self.assertFalse(self.provider.prefetched_data)
+
+    def test_errors_isolated(self):
+        good = VenueFactory()
+        unreachable = VenueFactory(name="unreachable")
+        broken = VenueFactory(name="broken")
+        with self.assertRaises(RequestException):
+            self.provider.handle_venues([unreachable, broken, good])
+        self.assertEqual(good.taps.count(), 3)
+        # the broken venue's partial work was rolled back
+        self.assertFalse(broken.taps.exists())
+        self.assertFalse(unreachable.taps.exists())
+        good.refresh_from_db()
+        self.assertIsNotNone(good.tap_list_last_check_time)
+        unreachable.refresh_from_db()
+        self.assertIsNone(unreachable.tap_list_last_check_time)
+
+
+class ReconcileTapsTestCase(TestCase):
+    def setUp(self):
+        self.venue = VenueFactory()
+        manufacturer = ManufacturerFactory()
+        self.beers = [BeerFactory(manufacturer=manufacturer) for _ in range(3)]
+        self.taps = [
+            Tap.objects.create(venue=self.venue, tap_number=i + 1, beer=beer)
+            for i, beer in enumerate(self.beers)
+        ]
+        Tap.refresh_beer_summaries(*self.taps)
+        self.provider = BaseTapListProvider()
+
+    def test_reconcile(self):
+        new_beer = BeerFactory()
+        self.provider.reconcile_taps(
+            self.venue,
+            {
+                1: {"beer": self.beers[0]},
+                2: {"beer": new_beer, "gas_type": "nitro"},
+                4: {"beer": self.beers[2]},
+            },
+        )
+        taps = {tap.tap_number: tap for tap in self.venue.taps.all()}
+        self.assertEqual(sorted(taps), [1, 2, 4])
+        self.assertEqual(taps[1], self.taps[0])
+        self.assertEqual(taps[2].beer, new_beer)
+        self.assertEqual(taps[2].gas_type, "nitro")
+        self.assertEqual(taps[4].beer, self.beers[2])
+
+    def test_tap_summaries(self):
+        new_beer = BeerFactory()
+        self.provider.reconcile_taps(
+            self.venue,
+            {
+                1: {"beer": new_beer},
+                2: {"beer": new_beer},
+                3: {"beer": self.beers[2]},
+            },
+        )
+        new_beer.refresh_from_db()
+        self.assertEqual(new_beer.taps_count, 2)
+        self.assertEqual(new_beer.venues_count, 1)
+        self.assertTrue(new_beer.is_on_tap)
+        self.assertEqual(new_beer.most_recently_added, self.taps[1].time_added)
+        self.beers[0].refresh_from_db()
+        self.assertEqual(self.beers[0].taps_count, 0)
+        self.assertFalse(self.beers[0].is_on_tap)
+        self.assertIsNone(self.beers[0].most_recently_added)
+        self.beers[2].refresh_from_db()
+        self.assertEqual(self.beers[2].taps_count, 1)
+
+    def test_no_changes(self):
+        with CaptureQueriesContext(connection) as context:
+            self.provider.reconcile_taps(
+                self.venue,
+                {i + 1: {"beer": beer} for i, beer in enumerate(self.beers)},
+            )
+        # just the one to read the existing taps
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_keep_stale(self):
+        self.provider.reconcile_taps(
+            self.venue, {1: {"beer": None}}, delete_stale=False
+        )
+        self.assertEqual(self.venue.taps.count(), 3)
+        self.assertIsNone(self.venue.taps.get(tap_number=1).beer)
+
+
+class CountingFetchProvider(ConcurrentFetchProvider):
+    """Dummy provider that keeps track of which venues it parsed"""
+
+    provider_name = "test-counting"
+
+    def __init__(self):
+        super().__init__()
+        self.handled = []
+
+    def fetch_venue_data(self, venue):
+        return self.conditional_get(venue, "https://example.com/taps").json()
+
+    def handle_venue(self, venue):
+        self.handled.append(venue)
+        self.reconcile_taps(
+            venue, {tap_number: {} for tap_number in self.get_venue_data(venue)}
+        )
+        return now()
+
+
+class SkipUnchangedTestCase(TestCase):
+    def setUp(self):
+        self.venue = VenueFactory()
+        self.config = VenueAPIConfiguration.objects.create(venue=self.venue)
+
+    def run_provider(self, **kwargs):
+        provider = CountingFetchProvider()
+        venue = Venue.objects.select_related("api_configuration").get(id=self.venue.id)
+        provider.handle_venues([venue], **kwargs)
+        return provider
+
+    @responses.activate
+    def test_unchanged_payload(self):
+        responses.add(responses.GET, "https://example.com/taps", json=[1, 2])
+        self.assertEqual(len(self.run_provider().handled), 1)
+        self.config.refresh_from_db()
+        self.assertEqual(len(self.config.payload_fingerprint), 64)
+        self.venue.refresh_from_db()
+        first_update = self.venue.tap_list_last_update_time
+        provider = self.run_provider()
+        self.assertEqual(provider.handled, [])
+        self.assertFalse(provider.prefetched_data)
+        self.venue.refresh_from_db()
+        self.assertEqual(self.venue.tap_list_last_check_time, provider.check_timestamp)
+        self.assertEqual(self.venue.tap_list_last_update_time, first_update)
+        # unless we're told to parse anyway
+        self.assertEqual(len(self.run_provider(skip_unchanged=False).handled), 1)
+
+    @responses.activate
+    def test_changed_payload(self):
+        responses.add(responses.GET, "https://example.com/taps", json=[1, 2])
+        responses.add(responses.GET, "https://example.com/taps", json=[1, 2, 3])
+        self.run_provider()
+        self.assertEqual(len(self.run_provider().handled), 1)
+        self.assertEqual(self.venue.taps.count(), 3)
+
+    @responses.activate
+    def test_changed_configuration(self):
+        responses.add(responses.GET, "https://example.com/taps", json=[1, 2])
+        self.run_provider()
+        self.config.untappd_theme = 5
+        self.config.save()
+        self.assertEqual(len(self.run_provider().handled), 1)
+
+    @responses.activate
+    def test_not_modified(self):
+        responses.add(
+            responses.GET,
+            "https://example.com/taps",
+            json=[1, 2],
+            headers={"ETag": '"abc"', "Last-Modified": "Wed, 01 Jan 2020 00:00:00 GMT"},
+        )
+        responses.add(responses.GET, "https://example.com/taps", status=304)
+        self.run_provider()
+        self.config.refresh_from_db()
+        self.assertEqual(self.config.payload_etag, '"abc"')
+        provider = self.run_provider()
+        self.assertEqual(provider.handled, [])
+        request = responses.calls[1].request
+        self.assertEqual(request.headers["If-None-Match"], '"abc"')
+        self.assertEqual(
+            request.headers["If-Modified-Since"], "Wed, 01 Jan 2020 00:00:00 GMT"
+        )
+
+    @responses.activate
+    def test_validators_dropped_without_fingerprint(self):
+        headers = {"ETag": '"abc"'}
+        responses.add(
+            responses.GET, "https://example.com/taps", body="oops", headers=headers
+        )
+        responses.add(
+            responses.GET, "https://example.com/taps", json=[1], headers=headers
+        )
+        provider = CountingFetchProvider()
+        venue = Venue.objects.select_related("api_configuration").get(id=self.venue.id)
+        # the fetch fails after the response came back
+        with self.assertRaises(ValueError):
+            provider.handle_venues([venue])
+        self.assertFalse(provider.payload_validators)
+        # and nothing's fingerprinted when parsing regardless
+        provider.handle_venues([venue], skip_unchanged=False)
+        self.assertEqual(len(provider.handled), 1)
+        self.assertFalse(provider.payload_validators)
+        self.config.refresh_from_db()
+        self.assertEqual(self.config.payload_etag, "")
+
+
+class ReconcilePricesTestCase(TestCase):
+    def setUp(self):
+        self.venue = VenueFactory()
+        self.manufacturer = ManufacturerFactory()
+        self.pint = ServingSize.objects.create(name="Pint", volume_oz=16)
+        self.tulip = ServingSize.objects.create(name="Tulip", volume_oz=10)
+
+    def parse(self, pricing):
+        provider = BaseTapListProvider()
+        beer = provider.get_beer(
+            "Pale Ale", self.manufacturer, pricing=pricing, venue=self.venue
+        )
+        with CaptureQueriesContext(connection) as context:
+            provider.reconcile_taps(self.venue, {1: {"beer": beer}})
+        return beer, [
+            query["sql"]
+            for query in context.captured_queries
+            if "beers_beerprice" in query["sql"]
+        ]
+
+    def prices(self, beer):
+        return {
+            price.serving_size.volume_oz: price.price
+            for price in beer.prices.filter(venue=self.venue)
+        }
+
+    def test_sync(self):
+        pricing = [
+            {"volume_oz": 16, "price": 6, "name": "Pint"},
+            {"volume_oz": 10, "price": 4.5, "name": "Tulip"},
+        ]
+        beer, _ = self.parse(pricing)
+        self.assertEqual(self.prices(beer), {16: 6, 10: Decimal("4.5")})
+        untouched = beer.prices.get(serving_size=self.pint)
+        # nothing changed, so just the one query to look at what's there
+        _, queries = self.parse(pricing)
+        self.assertEqual(len(queries), 1)
+        _, queries = self.parse([{"volume_oz": 10, "price": 5, "name": "Tulip"}])
+        self.assertEqual(self.prices(beer), {10: 5})
+        self.assertFalse(BeerPrice.objects.filter(id=untouched.id).exists())
+        # read, delete, update
+        self.assertEqual(len(queries), 3)
+
+    def test_other_beers_untouched(self):
+        other = BeerFactory(manufacturer=self.manufacturer)
+        BeerPrice.objects.create(
+            beer=other, venue=self.venue, serving_size=self.pint, price=7
+        )
+        self.parse([{"volume_oz": 16, "price": 6, "name": "Pint"}])
+        self.assertEqual(self.prices(other), {16: 7})
+
+
+class SnapshotProvider(BaseTapListProvider):
+    """Dummy provider that only parses"""
+
+    provider_name = "test-snapshot"
+
+    def fetch_venue_data(self, venue):
+        return {"Pale Ale": 6, "Stout": 7}
+
+    def parse_venue_data(self, venue, data):
+        self.parsed_in_savepoints = len(connection.savepoint_ids)
+        snapshot = TapListSnapshot(updated=now())
+        manufacturer = snapshot.add_manufacturer("Snapshot Brewing", location="Here")
+        for tap_number, (name, price) in enumerate(data.items(), 1):
+            beer = snapshot.add_beer(
+                name,
+                manufacturer,
+                pricing=[{"volume_oz": 16, "price": price, "name": "Pint"}],
+                abv="5.5%",
+            )
+            snapshot.add_tap(tap_number, beer, gas_type="nitro")
+        snapshot.add_tap(3, None)
+        return snapshot
+
+
+class SnapshotTestCase(TestCase):
+    def setUp(self):
+        self.venue = VenueFactory()
+        ServingSize.objects.create(name="Pint", volume_oz=16)
+
+    def test_apply(self):
+        Tap.objects.create(venue=self.venue, tap_number=4)
+        provider = SnapshotProvider()
+        provider.handle_venues([self.venue])
+        # parsed outside of the venue's transaction
+        self.assertEqual(provider.parsed_in_savepoints, len(connection.savepoint_ids))
+        manufacturer = Manufacturer.objects.get(name="Snapshot")
+        self.assertEqual(manufacturer.location, "Here")
+        taps = {tap.tap_number: tap for tap in self.venue.taps.all()}
+        self.assertEqual(sorted(taps), [1, 2, 3])
+        self.assertEqual(taps[1].beer.name, "Pale Ale")
+        self.assertEqual(taps[1].beer.abv, Decimal("5.5"))
+        self.assertEqual(taps[2].gas_type, "nitro")
+        self.assertIsNone(taps[3].beer)
+        self.assertEqual(taps[2].beer.prices.get().price, 7)
+        self.venue.refresh_from_db()
+        self.assertIsNotNone(self.venue.tap_list_last_update_time)
+
+    def test_parse_without_database(self):
+        with open(EXAMPLE_DATA / "rocket_city_craft_beer.json") as json_file:
+            data = json.load(json_file)
+        with self.assertNumQueries(0):
+            snapshot = DigitalPourParser().parse_venue_data(self.venue, data)
+        self.assertTrue(snapshot.taps)
+        for tap in snapshot.taps:
+            if tap.beer is not None:
+                beer = snapshot.beers[tap.beer]
+                self.assertTrue(snapshot.manufacturers[beer.manufacturer].name)
@@ -1,6 +1,5 @@
 """Test the parsing of untappd data"""
 import os
-from unittest import mock
 
 from django.core.management import call_command
 from django.test import TestCase
@@ -40,8 +39,7 @@ class GoatIslandTestCase(TestCase):
             cls.js_data = js_file.read()
 
     @responses.activate
-    @mock.patch("tap_list_providers.base.look_up_beer")
-    def test_import_untappd_data(self, _):
+    def test_import_untappd_data(self):
         """Test parsing the HTML data"""
         responses.add(
             responses.GET,
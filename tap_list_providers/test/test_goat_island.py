@@ -1,6 +1,5 @@
 """Test the parsing of untappd data"""
 import os
-from unittest import mock
 
 from django.core.management import call_command
 from django.test import TestCase
@@ -38,8 +37,7 @@ class CommandsTestCase(TestCase):
             cls.js_data = js_file.read()
 
     @responses.activate
-    @mock.patch("tap_list_providers.base.look_up_beer")
-    def test_import_untappd_data(self, _):
+    def test_import_untappd_data(self):
         """Test parsing the HTML data"""
         responses.add(
             responses.GET,
@@ -67,8 +65,7 @@ class CommandsTestCase(TestCase):
             self.assertFalse(beer.prices.exists())
 
     @responses.activate
-    @mock.patch("tap_list_providers.base.look_up_beer")
-    def test_clearing_unpopulated_taps(self, _):
+    def test_clearing_unpopulated_taps(self):
         """Test that we wipe out unpopulated taps"""
         responses.add(
             responses.GET,
@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import SimpleTestCase, override_settings
+import responses
+
+from tap_list_providers.base import BaseTapListProvider
+from tap_list_providers.http import JitteredRetry, build_session
+from venues.models import Venue
+
+
+class FetchingProvider(BaseTapListProvider):
+    provider_name = "test-fetching"
+
+    def fetch_venue_data(self, venue):
+        return self.http.get(HTTPClientTestCase.URL).json()
+
+
+@override_settings(TAP_LIST_HTTP_BACKOFF=0)
+class HTTPClientTestCase(SimpleTestCase):
+    URL = "https://example.com/taps.json"
+
+    @responses.activate
+    def test_default_timeout(self):
+        responses.add(responses.GET, self.URL, json=[])
+        session = build_session()
+        session.get(self.URL)
+        self.assertEqual(responses.calls[0].request.req_kwargs["timeout"], (5, 30))
+        self.assertIn("gzip", responses.calls[0].request.headers["Accept-Encoding"])
+
+    @responses.activate
+    def test_retries(self):
+        responses.add(responses.GET, self.URL, status=503)
+        responses.add(responses.GET, self.URL, json=[1])
+        response = build_session().get(self.URL)
+        self.assertEqual(response.json(), [1])
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_gives_up(self):
+        responses.add(responses.GET, self.URL, status=503)
+        response = build_session().get(self.URL)
+        # the caller gets the last response to deal with
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(responses.calls), 4)
+
+    @responses.activate
+    def test_latency_recorded(self):
+        responses.add(responses.GET, self.URL, json=[])
+        provider = BaseTapListProvider()
+        provider.http.get(self.URL)
+        provider.http.get(self.URL)
+        self.assertEqual(len(provider.request_latencies["example.com"]), 2)
+
+    def test_session_per_thread(self):
+        provider = BaseTapListProvider()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            other = executor.submit(lambda: provider.http).result()
+        self.assertIs(provider.http, provider.http)
+        self.assertIsNot(other, provider.http)
+        # but the connection pools are shared
+        self.assertIs(other.get_adapter(self.URL), provider.http.get_adapter(self.URL))
+
+    @responses.activate
+    def test_worker_latencies_recorded(self):
+        responses.add(responses.GET, self.URL, json=[1])
+        provider = FetchingProvider()
+        venues = [Venue(id=i) for i in range(1, 4)]
+        fetched = list(provider.fetch_venues_concurrently(venues))
+        self.assertEqual(fetched, [(venue, None) for venue in venues])
+        self.assertEqual(provider.prefetched_data, {1: [1], 2: [1], 3: [1]})
+        self.assertEqual(len(provider.request_latencies["example.com"]), 3)
+
+    def test_jitter(self):
+        retry = JitteredRetry(total=5, backoff_factor=1)
+        self.assertEqual(retry.get_backoff_time(), 0)
+        retry = retry.increment(method="GET", url=self.URL)
+        retry = retry.increment(method="GET", url=self.URL)
+        for _ in range(20):
+            self.assertTrue(2 <= retry.get_backoff_time() <= 3)
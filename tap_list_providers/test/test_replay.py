@@ -0,0 +1,40 @@
+from io import StringIO
+import json
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from beers.models import Beer
+from venues.models import Venue
+from tap_list_providers import replay
+
+
+class ReplayTestCase(TestCase):
+    def test_every_scenario_adds_taps(self):
+        results = replay.run(trace_memory=False)
+        self.assertEqual(set(results), {scenario.name for scenario in replay.SCENARIOS})
+        for name, result in results.items():
+            with self.subTest(name):
+                self.assertTrue(result["cold"]["rows"]["inserted"])
+                self.assertTrue(result["warm"]["queries"])
+        # everything's rolled back afterwards
+        self.assertFalse(Venue.objects.exists())
+        self.assertFalse(Beer.objects.exists())
+
+    def test_command(self):
+        output = StringIO()
+        call_command(
+            "replaytaplists",
+            scenario=["digitalpour"],
+            output=output,
+            stderr=StringIO(),
+        )
+        results = json.loads(output.getvalue())
+        self.assertEqual(list(results), ["digitalpour"])
+        self.assertIn("peak_kib", results["digitalpour"]["warm"])
+
+    def test_unknown_url(self):
+        adapter = replay.ReplayAdapter({("GET", "https://example.com/a"): b"{}"})
+        session = replay.mount(replay.requests.Session(), adapter)
+        self.assertEqual(session.get("https://example.com/a?b=c").status_code, 200)
+        self.assertEqual(session.get("https://example.com/b").status_code, 404)
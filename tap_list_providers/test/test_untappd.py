@@ -2,7 +2,6 @@
 import os
 import datetime
 from decimal import Decimal
-from unittest import mock
 import zoneinfo
 
 from django.core.management import call_command
@@ -10,7 +9,7 @@ from django.test import TestCase
 from django.utils.timezone import now
 import responses
 
-from beers.models import Beer, Manufacturer
+from beers.models import Beer, Manufacturer, PendingUntappdLookup
 from beers.test.factories import StyleFactory
 from venues.test.factories import VenueFactory
 from venues.models import Venue, VenueAPIConfiguration
@@ -43,8 +42,7 @@ class CommandsTestCase(TestCase):
             cls.js_data = js_file.read()
 
     @responses.activate
-    @mock.patch("tap_list_providers.base.look_up_beer")
-    def test_import_untappd_data(self, mock_beer_lookup):
+    def test_import_untappd_data(self):
         """Test parsing the HTML data"""
         timestamp = now()
         responses.add(
@@ -120,7 +118,7 @@ class CommandsTestCase(TestCase):
                     price_instance.price,
                     price_instance,
                 )
-            mock_beer_lookup.delay.assert_called_with(tap.beer.id)
+            self.assertTrue(PendingUntappdLookup.objects.filter(beer=tap.beer).exists())
         self.venue.refresh_from_db()
         self.assertIsNotNone(self.venue.tap_list_last_check_time)
         self.assertGreater(self.venue.tap_list_last_check_time, timestamp)
@@ -164,3 +162,17 @@ class StyleParsingTestCase(TestCase):
         style = self.parser.parse_style("Zwickelbier- German style Lager")
         # assert that we fix the name to add the missing space if nothing else
         self.assertEqual(style.name, "Zwickelbier - German style Lager")
+
+    def test_get_style_cached(self):
+        parser = UntappdParser()
+        parser.fetch_styles()
+        # Untappd's noise is stripped before the style table is checked
+        self.assertIsNone(parser.get_style("-"))
+        with self.assertNumQueries(0):
+            style = parser.get_style("None - English Cider")
+        self.assertEqual(style.id, self.english_cider.id)
+        # misses still go through parse_style, but only once
+        style = parser.get_style("IPA - Belgian")
+        self.assertEqual(style.id, self.belgian_ipa.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(parser.get_style("IPA - Belgian"), style)
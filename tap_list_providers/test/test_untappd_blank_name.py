@@ -1,9 +1,9 @@
 """Test Reissdorf Kölsch to make sure the name isn't empty"""
 
-from bs4 import BeautifulSoup
 from django.test import TestCase
 
 
+from tap_list_providers.markup import parse_html
 from tap_list_providers.parsers.untappd import UntappdParser
 
 
@@ -91,7 +91,7 @@ class UntappdBlankNameTestCase(TestCase):
                   </div>
                  </div>
         """  # noqa
-        self.tap = BeautifulSoup(html, "lxml")
+        self.tap = parse_html(html)
 
     def test_reissdorf_kolsch(self):
         parser = UntappdParser()
@@ -1,13 +1,12 @@
 """Test the parsing of untappd data"""
 import os
 from decimal import Decimal
-from unittest import mock
 
 from django.core.management import call_command
 from django.test import TestCase
 import responses
 
-from beers.models import Beer, Manufacturer
+from beers.models import Beer, Manufacturer, PendingUntappdLookup
 from venues.test.factories import VenueFactory
 from venues.models import Venue, VenueAPIConfiguration
 from taps.models import Tap
@@ -39,8 +38,7 @@ class CommandsTestCase(TestCase):
             cls.js_data = js_file.read()
 
     @responses.activate
-    @mock.patch("tap_list_providers.base.look_up_beer")
-    def test_import_untappd_data(self, mock_beer_lookup):
+    def test_import_untappd_data(self):
         """Test parsing the JSON data"""
         responses.add(
             responses.GET,
@@ -101,4 +99,4 @@ class CommandsTestCase(TestCase):
                     price_instance.price,
                     price_instance,
                 )
-            mock_beer_lookup.delay.assert_called()
+            self.assertTrue(PendingUntappdLookup.objects.filter(beer=tap.beer).exists())
@@ -9,5 +9,18 @@ class TapAdmin(admin.ModelAdmin):
     list_select_related = ("venue", "beer")
     search_fields = ("beer__name", "venue__name", "beer__manufacturer__name")
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        models.Tap.refresh_beer_summaries(obj)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        models.Tap.refresh_beer_summaries(obj)
+
+    def delete_queryset(self, request, queryset):
+        taps = list(queryset)
+        super().delete_queryset(request, queryset)
+        models.Tap.refresh_beer_summaries(*taps)
+
 
 admin.site.register(models.Tap, TapAdmin)
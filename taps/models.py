@@ -1,3 +1,4 @@
+from django.apps import apps
 from django.db import models
 from django.utils import timezone
 
@@ -36,3 +37,21 @@ class Tap(models.Model):
                 fields=["venue", "tap_number"], name="venue_tapnumber"
             ),
         ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # whichever beer the row had when loaded, so its summary gets
+        # refreshed too
+        self._loaded_beer_id = self.__dict__.get("beer_id")
+
+    @classmethod
+    def refresh_beer_summaries(cls, *taps: "Tap") -> int:
+        """Update the tap summaries of the beers the taps had and have
+
+        Call this once after saving or deleting taps, rather than per tap.
+        """
+        beer_ids = set()
+        for tap in taps:
+            beer_ids.update((tap._loaded_beer_id, tap.beer_id))
+            tap._loaded_beer_id = tap.beer_id
+        return apps.get_model("beers", "Beer").refresh_tap_summaries(beer_ids)
@@ -4,12 +4,17 @@ from rest_framework.validators import UniqueTogetherValidator
 from django.utils import timezone
 
 from venues.models import Venue
-from venues.serializers import VenueSerializer
+from hsv_dot_beer.sparse_fields import SparseFieldsMixin
+from venues.serializers import CompactVenueSerializer, VenueSerializer
 
 from . import models
 
 
-class TapSerializer(serializers.ModelSerializer):
+class TapSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    compact_fields = {
+        "venue": lambda: CompactVenueSerializer(read_only=True),
+    }
+
     venue_id = serializers.PrimaryKeyRelatedField(
         write_only=True,
         allow_null=False,
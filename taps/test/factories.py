@@ -15,3 +15,9 @@ class TapFactory(factory.django.DjangoModelFactory):
     tap_number = factory.Sequence(lambda n: n)
     gas_type = factory.fuzzy.FuzzyChoice(GAS_CHOICES)
     estimated_percent_remaining = factory.fuzzy.FuzzyFloat(0, 100)
+
+    @factory.post_generation
+    def beer_summaries(obj, create, extracted, **kwargs):
+        # like the views do after saving a tap
+        if create:
+            Tap.refresh_beer_summaries(obj)
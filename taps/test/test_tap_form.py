@@ -325,7 +325,7 @@ class SaveTapFormTestCase(TestCase):
             "estimated_percent_remaining": 90,
             "gas_type": "co2",
         }
-        with self.assertNumQueries(12):
+        with self.assertNumQueries(17):
             response = self.client.post(self.edit_url, data=form_data)
         self.assertEqual(response.status_code, 302)
         self.assertEqual(
@@ -346,7 +346,7 @@ class SaveTapFormTestCase(TestCase):
             "estimated_percent_remaining": 90,
             "gas_type": "co2",
         }
-        with self.assertNumQueries(11):
+        with self.assertNumQueries(17):
             response = self.client.post(self.create_url, data=form_data)
         self.assertEqual(response.status_code, 302)
         self.assertEqual(
@@ -367,7 +367,7 @@ class SaveTapFormTestCase(TestCase):
             "estimated_percent_remaining": 0.9,
             "gas_type": "co2",
         }
-        with self.assertNumQueries(11):
+        with self.assertNumQueries(17):
             response = self.client.post(self.create_url, data=form_data)
         self.assertEqual(response.status_code, 302)
         self.assertEqual(
@@ -390,7 +390,7 @@ class SaveTapFormTestCase(TestCase):
             "estimated_percent_remaining": 0.9,
             "gas_type": "co2",
         }
-        with self.assertNumQueries(10):
+        with self.assertNumQueries(13):
             response = self.client.post(self.edit_url, data=form_data)
         self.assertEqual(response.status_code, 302)
         self.assertEqual(
@@ -409,7 +409,7 @@ class SaveTapFormTestCase(TestCase):
             "estimated_percent_remaining": 90,
             "gas_type": "co2",
         }
-        with self.assertNumQueries(11):
+        with self.assertNumQueries(16):
             response = self.client.post(self.edit_url, data=form_data)
         self.assertEqual(response.status_code, 302)
         self.assertEqual(
@@ -429,7 +429,7 @@ class SaveTapFormTestCase(TestCase):
             "estimated_percent_remaining": 90,
             "gas_type": "co2",
         }
-        with self.assertNumQueries(10):
+        with self.assertNumQueries(16):
             response = self.client.post(self.create_url, data=form_data)
         self.assertEqual(response.status_code, 302)
         self.assertEqual(
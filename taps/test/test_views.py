@@ -3,6 +3,7 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from faker import Faker
 
+from beers.test.factories import BeerFactory
 from hsv_dot_beer.users.test.factories import UserFactory
 from venues.test.factories import VenueFactory
 from .factories import TapFactory
@@ -31,3 +32,13 @@ class TestTapDetailTestCase(APITestCase):
         self.assertEqual(
             response.status_code, status.HTTP_400_BAD_REQUEST, response.data
         )
+
+    def test_patch_refreshes_beer_summaries(self):
+        beer = BeerFactory()
+        response = self.client.patch(self.url, {"beer": beer.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        beer.refresh_from_db()
+        self.assertTrue(beer.is_on_tap)
+        self.client.delete(self.url)
+        beer.refresh_from_db()
+        self.assertFalse(beer.is_on_tap)
@@ -13,15 +13,40 @@ from django.utils.http import urlencode
 from django.utils.timezone import now
 
 from beers.forms import ManufacturerSelectForm
+from beers.views import CachedListMixin
+from hsv_dot_beer import api_cache
+from hsv_dot_beer.sparse_fields import get_shape
+from venues import snapshots
 from venues.models import Venue, VenueTapManager
 from . import serializers
 from . import models
 from . import forms
 
 
-class TapViewSet(ModelViewSet):
+class TapViewSet(CachedListMixin, ModelViewSet):
+    cache_resources = ("taps",)
     serializer_class = serializers.TapSerializer
     queryset = models.Tap.objects.select_related("venue").order_by("id")
+    cursor_ordering = ("id",)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        shape = get_shape(self.request)
+        if shape is not None and not shape.wants("venue"):
+            queryset = queryset.select_related(None)
+        return queryset
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        models.Tap.refresh_beer_summaries(serializer.instance)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        models.Tap.refresh_beer_summaries(serializer.instance)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        models.Tap.refresh_beer_summaries(instance)
 
 
 @login_required
@@ -142,9 +167,14 @@ def save_tap_form(request, venue_id: int, tap_number: int):
                 tap.time_added = timestamp
             tap.time_updated = timestamp
             tap = form.save()
-            tap.venue.tap_list_last_update_time = timestamp
-            tap.venue.tap_list_last_check_time = timestamp
-            tap.venue.save()
+            models.Tap.refresh_beer_summaries(tap)
+            venue.tap_list_last_update_time = timestamp
+            venue.tap_list_last_check_time = timestamp
+            venue.save(
+                update_fields=["tap_list_last_update_time", "tap_list_last_check_time"]
+            )
+            snapshots.venue_changed(venue)
+            api_cache.schedule_warming([venue.id])
         else:
             return render(
                 request,
@@ -176,7 +206,7 @@ def save_tap_form(request, venue_id: int, tap_number: int):
 @login_required
 def clear_tap(request, tap_id: int):
     """Clear the beer assigned to a tap"""
-    queryset = models.Tap.objects.select_related("beer")
+    queryset = models.Tap.objects.select_related("beer", "venue")
     if not request.user.is_superuser:
         queryset = queryset.filter(venue__managers=request.user)
     tap = get_object_or_404(queryset, id=tap_id)
@@ -204,7 +234,11 @@ def clear_tap(request, tap_id: int):
         if query_args:
             undo_url = f"{undo_url}?{urlencode(query_args)}"
         tap.beer = None
-        tap.save()
+        with transaction.atomic():
+            tap.save()
+            models.Tap.refresh_beer_summaries(tap)
+            snapshots.venue_changed(tap.venue)
+        api_cache.schedule_warming([tap.venue_id])
         button_css = (
             "inline-block text-sm px-4 py-2 leading-none border rounded text-white"
             "border-blue-600 bg-blue-600 hover:border-blue-600 hover:text-black "
@@ -228,7 +262,7 @@ def clear_tap(request, tap_id: int):
 @login_required
 def undo_clear(request, tap_id: int, beer_id: int):
     """Quickly undo clearing a beer"""
-    queryset = models.Tap.objects.select_related("beer").filter(beer=None)
+    queryset = models.Tap.objects.select_related("beer", "venue").filter(beer=None)
     if not request.user.is_superuser:
         queryset = queryset.filter(venue__managers=request.user)
     tap = get_object_or_404(queryset, id=tap_id)
@@ -241,7 +275,11 @@ def undo_clear(request, tap_id: int, beer_id: int):
         tap.time_added = datetime.datetime.fromisoformat(time_added)
     if time_updated := request.GET.get("time_updated"):
         tap.time_updated = datetime.datetime.fromisoformat(time_updated)
-    tap.save()
+    with transaction.atomic():
+        tap.save()
+        models.Tap.refresh_beer_summaries(tap)
+        snapshots.venue_changed(tap.venue)
+    api_cache.schedule_warming([tap.venue_id])
     messages.add_message(
         request,
         messages.SUCCESS,
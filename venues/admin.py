@@ -10,6 +10,11 @@ class VenueAdmin(admin.ModelAdmin):
 class VenueAPIConfigurationAdmin(admin.ModelAdmin):
     list_display = ("id", "venue")
     list_select_related = ("venue",)
+    readonly_fields = (
+        "payload_fingerprint",
+        "payload_etag",
+        "payload_last_modified",
+    )
 
 
 class VenueTapManagerAdmin(admin.ModelAdmin):
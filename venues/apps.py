@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class VenuesConfig(AppConfig):
     name = "venues"
+
+    def ready(self):
+        # connects the signals that mark the tap list snapshots stale
+        from . import snapshots  # noqa
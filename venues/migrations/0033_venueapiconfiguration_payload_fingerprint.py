@@ -0,0 +1,39 @@
+# Generated by Django 4.2.6 on 2026-10-17 08:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("venues", "0032_merge_20201124_1755"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="venueapiconfiguration",
+            name="payload_etag",
+            field=models.CharField(
+                blank=True,
+                help_text="ETag sent with the tap list the last time it was parsed",
+                max_length=250,
+            ),
+        ),
+        migrations.AddField(
+            model_name="venueapiconfiguration",
+            name="payload_fingerprint",
+            field=models.CharField(
+                blank=True,
+                help_text="Hash of the tap list as of the last time it was parsed",
+                max_length=64,
+            ),
+        ),
+        migrations.AddField(
+            model_name="venueapiconfiguration",
+            name="payload_last_modified",
+            field=models.CharField(
+                blank=True,
+                help_text="Last-Modified sent with the tap list the last time it was parsed",
+                max_length=50,
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.6 on 2026-10-17 09:05
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("venues", "0033_venueapiconfiguration_payload_fingerprint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VenueTapListSnapshot",
+            fields=[
+                (
+                    "venue",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="tap_list_snapshot",
+                        serialize=False,
+                        to="venues.venue",
+                    ),
+                ),
+                ("version", models.PositiveIntegerField(default=1)),
+                ("cache_version", models.BigIntegerField()),
+                ("generated_at", models.DateTimeField()),
+                (
+                    "beers",
+                    models.JSONField(
+                        default=list,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -1,5 +1,7 @@
 """Models related to Venues"""
 
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.conf import settings
 from django.shortcuts import reverse
@@ -84,6 +86,13 @@ class Venue(models.Model):
     def get_absolute_url(self) -> str:
         return reverse("venue_table", args=[self.id])
 
+    def delete(self, *args, **kwargs):
+        # the taps get cascaded without Tap.delete() being called
+        beer_ids = set(self.taps.values_list("beer_id", flat=True))
+        result = super().delete(*args, **kwargs)
+        apps.get_model("beers", "Beer").refresh_tap_summaries(beer_ids)
+        return result
+
     def __str__(self):
         return self.name
 
@@ -150,6 +159,21 @@ class VenueAPIConfiguration(models.Model):
         null=True,
         help_text=_("Individual menus to process from the Arryved POS"),
     )
+    payload_fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text=_("Hash of the tap list as of the last time it was parsed"),
+    )
+    payload_etag = models.CharField(
+        max_length=250,
+        blank=True,
+        help_text=_("ETag sent with the tap list the last time it was parsed"),
+    )
+    payload_last_modified = models.CharField(
+        max_length=50,
+        blank=True,
+        help_text=_("Last-Modified sent with the tap list the last time it was parsed"),
+    )
 
 
 class VenueTapManager(models.Model):
@@ -173,3 +197,26 @@ class VenueTapManager(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["user", "venue"], name="user-venue-unique"),
         ]
+
+
+class VenueTapListSnapshot(models.Model):
+    """The rendered beers on tap at a venue, as VenueViewSet.beers shows them
+
+    Rebuilt whenever the venue's tap list is updated, so the unfiltered
+    endpoint doesn't have to query for it. See venues.snapshots.
+    """
+
+    venue = models.OneToOneField(
+        Venue,
+        models.CASCADE,
+        primary_key=True,
+        related_name="tap_list_snapshot",
+    )
+    # bumped on every rebuild
+    version = models.PositiveIntegerField(default=1)
+    # the API cache's global version at the time, so API writes and merges
+    # (which bump it) make the snapshot stale; snapshots.STALE once
+    # something it shows has changed
+    cache_version = models.BigIntegerField()
+    generated_at = models.DateTimeField()
+    beers = models.JSONField(default=list, encoder=DjangoJSONEncoder)
@@ -4,11 +4,20 @@
 from rest_framework import serializers
 from django_countries.serializers import CountryFieldMixin
 
+from hsv_dot_beer.sparse_fields import SparseFieldsMixin
 from .fields import TimeZoneField
 from . import models
 
 
-class VenueSerializer(CountryFieldMixin, serializers.ModelSerializer):
+class CompactVenueSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.Venue
+        fields = ("id", "name", "slug")
+
+
+class VenueSerializer(
+    SparseFieldsMixin, CountryFieldMixin, serializers.ModelSerializer
+):
     time_zone = TimeZoneField(
         required=False,
         allow_blank=False,
@@ -61,3 +70,8 @@ class VenueAPIConfigurationSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.VenueAPIConfiguration
         fields = "__all__"
+        read_only_fields = (
+            "payload_fingerprint",
+            "payload_etag",
+            "payload_last_modified",
+        )
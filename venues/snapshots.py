@@ -0,0 +1,217 @@
+"""Precomputed tap lists for VenueViewSet.beers
+
+Finding a venue's beers takes several joins and a DISTINCT, but the answer
+only changes when the venue's tap list does. venue_changed() renders the
+whole list when that happens (at the end of handle_venue and after manual
+tap edits, in the same transaction), and the unfiltered endpoint pages
+through the stored copy instead.
+
+A snapshot also shows things that can change without the venue's tap list
+changing, and those mark it stale (it's rebuilt the next time it's needed)
+along with the venue's cached API responses:
+
+- Saving a beer, its manufacturer, style, or Untappd metadata marks every
+  venue that has the beer on tap.
+- Saving a venue marks every venue whose list shows it (each beer lists the
+  venues that have it on tap), except for the check times the providers
+  update on every run.
+- Saving or deleting a tap or price anywhere else (the admin, the API)
+  rebuilds the venue's snapshot once the change commits, unless the write
+  path already did.
+- The beers that look different after venue_changed() (they went on or off
+  tap there, or their prices changed) are on other venues' lists too, so
+  those venues get marked.
+- API writes and merges bump the API cache's global version, which every
+  snapshot records.
+
+TAP_LIST_SNAPSHOT_MAX_AGE is a backstop for anything that slips past those.
+"""
+import datetime
+from functools import partial
+from itertools import chain
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_delete, post_save
+from django.utils.timezone import now
+
+from beers.fast_serializers import get_fast_beer_serializer
+from beers.views import BeerViewSet
+from hsv_dot_beer import api_cache
+from .models import Venue, VenueTapListSnapshot
+
+# query parameters that don't change what the endpoint returns
+UNFILTERED_PARAMS = frozenset(("page", "format"))
+# a cache_version no API cache version ever matches
+STALE = 0
+# for each model shown in the snapshots: how to find the venues with one of
+# its rows on tap, and whether a brand new row can already be on tap
+SHOWN_IN_SNAPSHOTS = {
+    "beers.Beer": ("taps__beer", "pk", False),
+    "beers.Manufacturer": ("taps__beer__manufacturer", "pk", False),
+    "beers.Style": ("taps__beer__style", "pk", False),
+    "beers.UntappdMetadata": ("taps__beer", "beer_id", True),
+}
+# the rows a venue's tap list is made of
+TAP_LIST_MODELS = ("taps.Tap", "beers.BeerPrice")
+# what the providers update on every check; the ones whose tap lists changed
+# get venue_changed() anyway
+CHECK_TIME_FIELDS = frozenset(("tap_list_last_check_time", "tap_list_last_update_time"))
+
+
+def refresh_snapshot(venue: Venue, exists: bool = True) -> list[dict]:
+    """Render venue's beers and store them, returning the beers"""
+    fast_serializer = get_fast_beer_serializer()
+    queryset = BeerViewSet.queryset.filter(taps__venue=venue).distinct()
+    beers = fast_serializer.render(
+        fast_serializer.values(queryset),
+        # nobody's looking at them yet
+        queue_lookups=False,
+    )
+    fields = {
+        "cache_version": get_cache_version(),
+        "generated_at": now(),
+        "beers": beers,
+    }
+    snapshots = VenueTapListSnapshot.objects.filter(venue=venue)
+    if not exists or not snapshots.update(version=F("version") + 1, **fields):
+        VenueTapListSnapshot.objects.create(venue=venue, **fields)
+    return beers
+
+
+def venue_changed(venue: Venue) -> None:
+    """Rebuild venue's snapshot and invalidate its cached API responses
+
+    Other venues with a beer that looks different now are marked stale once
+    the change commits.
+    """
+    old_beers = (
+        VenueTapListSnapshot.objects.filter(venue=venue)
+        .values_list("beers", flat=True)
+        .first()
+    )
+    beers = refresh_snapshot(venue, exists=old_beers is not None)
+    beer_ids = changed_beer_ids(old_beers or [], beers)
+    if beer_ids:
+        transaction.on_commit(
+            partial(
+                invalidate_venues,
+                Venue.objects.filter(taps__beer__in=beer_ids).exclude(id=venue.id),
+            )
+        )
+    api_cache.venue_changed(venue)
+
+
+def changed_beer_ids(old_beers: list[dict], new_beers: list[dict]) -> set[int]:
+    """The beers that aren't the same in both renderings"""
+    # the same round trip the stored ones went through
+    new_beers = json.loads(json.dumps(new_beers, cls=DjangoJSONEncoder))
+    old = {beer["id"]: beer for beer in old_beers}
+    new = {beer["id"]: beer for beer in new_beers}
+    return {
+        beer_id
+        for beer_id in old.keys() | new.keys()
+        if old.get(beer_id) != new.get(beer_id)
+    }
+
+
+def invalidate_venues(venues) -> None:
+    """Mark the venues' snapshots stale and invalidate their cached responses"""
+    venues = list(venues.only("id", "slug").distinct())
+    if not venues:
+        return
+    VenueTapListSnapshot.objects.filter(venue__in=venues).update(cache_version=STALE)
+    api_cache.bump(
+        *chain.from_iterable(api_cache.venue_scopes(venue) for venue in venues)
+    )
+
+
+def beer_data_changed(sender, instance, created=False, **kwargs) -> None:
+    lookup, attribute, new_rows_shown = SHOWN_IN_SNAPSHOTS[sender._meta.label]
+    if created and not new_rows_shown:
+        # can't be on tap anywhere yet
+        return
+    venues = Venue.objects.filter(**{lookup: getattr(instance, attribute)})
+    transaction.on_commit(partial(invalidate_venues, venues))
+
+
+def venue_data_changed(sender, instance, update_fields=None, **kwargs) -> None:
+    if update_fields and CHECK_TIME_FIELDS.issuperset(update_fields):
+        return
+    venues = Venue.objects.filter(
+        Q(id=instance.id) | Q(taps__beer__taps__venue=instance)
+    )
+    transaction.on_commit(partial(invalidate_venues, venues))
+    api_cache.venue_changed(instance)
+
+
+def tap_list_edited(sender, instance, **kwargs) -> None:
+    if instance.venue_id is None:
+        return
+    transaction.on_commit(
+        partial(rebuild_after_edit, instance.venue_id, instance.beer_id, now())
+    )
+
+
+def rebuild_after_edit(venue_id: int, beer_id: int | None, edited_at) -> None:
+    """Rebuild the venue's snapshot unless it's been rebuilt since edited_at"""
+    venue = Venue.objects.filter(id=venue_id).first()
+    if venue is None:
+        # deleted along with the venue
+        if beer_id is not None:
+            invalidate_venues(Venue.objects.filter(taps__beer=beer_id))
+        api_cache.bump("beers", "taps", "venues")
+        return
+    if VenueTapListSnapshot.objects.filter(
+        venue=venue, generated_at__gte=edited_at
+    ).exists():
+        return
+    with transaction.atomic():
+        venue_changed(venue)
+
+
+for label in SHOWN_IN_SNAPSHOTS:
+    post_save.connect(beer_data_changed, sender=label)
+    post_delete.connect(beer_data_changed, sender=label)
+post_save.connect(venue_data_changed, sender=Venue)
+post_delete.connect(venue_data_changed, sender=Venue)
+for label in TAP_LIST_MODELS:
+    post_save.connect(tap_list_edited, sender=label)
+    post_delete.connect(tap_list_edited, sender=label)
+
+
+def get_snapshot(pk=None, slug=None) -> list[dict] | None:
+    """The beers on tap at the venue, rebuilding the snapshot if it's stale
+
+    Returns None if there isn't exactly one venue by that pk or slug.
+    """
+    if pk is not None:
+        lookup = {"id": pk}
+    else:
+        lookup = {"slug": slug}
+    snapshots = list(
+        VenueTapListSnapshot.objects.filter(
+            **{f"venue__{key}": value for key, value in lookup.items()}
+        )[:2]
+    )
+    if len(snapshots) == 1 and is_current(snapshots[0]):
+        return snapshots[0].beers
+    venues = list(Venue.objects.filter(**lookup)[:2])
+    if len(venues) != 1:
+        return None
+    return refresh_snapshot(venues[0], exists=bool(snapshots))
+
+
+def is_current(snapshot: VenueTapListSnapshot) -> bool:
+    max_age = datetime.timedelta(seconds=settings.TAP_LIST_SNAPSHOT_MAX_AGE)
+    return (
+        snapshot.cache_version == get_cache_version()
+        and snapshot.generated_at > now() - max_age
+    )
+
+
+def get_cache_version() -> int:
+    return api_cache.get_versions([api_cache.GLOBAL])[0]
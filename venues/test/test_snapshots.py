@@ -0,0 +1,208 @@
+import json
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from beers.models import Beer, PendingUntappdLookup
+from beers.serializers import BeerSerializer
+from beers.test.factories import BeerFactory
+from beers.views import BeerViewSet
+from hsv_dot_beer import api_cache
+from hsv_dot_beer.users.test.factories import UserFactory
+from taps.models import Tap
+from taps.test.factories import TapFactory
+from venues import snapshots
+from venues.models import VenueTapListSnapshot
+from .factories import VenueFactory
+
+
+# keep the API cache out of the way so every request reaches the view
+@override_settings(API_CACHE_TIMEOUT=0)
+class TapListSnapshotTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.venue = VenueFactory()
+        self.beers = [BeerFactory() for _ in range(12)]
+        self.taps = [TapFactory(venue=self.venue, beer=beer) for beer in self.beers]
+        Beer.refresh_tap_summaries(beer.id for beer in self.beers)
+        self.url = f"/api/v1/venues/{self.venue.id}/beers/"
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def get_names(self, url):
+        names = set()
+        while url:
+            page = self.get(url)
+            names.update(beer["name"] for beer in page["results"])
+            url = page["next"]
+        return names
+
+    def test_served_from_snapshot(self):
+        snapshots.venue_changed(self.venue)
+        expected = json.loads(
+            json.dumps(
+                BeerSerializer(
+                    BeerViewSet.queryset.filter(taps__venue=self.venue).distinct(),
+                    many=True,
+                ).data,
+                default=str,
+            )
+        )
+        with self.assertNumQueries(1):
+            first_page = self.get(self.url)
+        self.assertEqual(first_page["count"], 12)
+        self.assertEqual(first_page["results"], expected[:10])
+        with self.assertNumQueries(1):
+            second_page = self.get(first_page["next"])
+        self.assertEqual(second_page["results"], expected[10:])
+        with self.assertNumQueries(1):
+            by_slug = self.get(f"/api/v1/venues/byslug/{self.venue.slug}/beers/")
+        self.assertEqual(by_slug["results"], first_page["results"])
+
+    def test_built_when_missing(self):
+        self.assertFalse(VenueTapListSnapshot.objects.exists())
+        self.get(self.url)
+        snapshot = VenueTapListSnapshot.objects.get()
+        self.assertEqual(snapshot.version, 1)
+        self.assertEqual(len(snapshot.beers), 12)
+        snapshots.venue_changed(self.venue)
+        snapshot.refresh_from_db()
+        self.assertEqual(snapshot.version, 2)
+
+    def test_stale_after_api_write(self):
+        snapshots.venue_changed(self.venue)
+        new_beer = TapFactory(venue=self.venue, beer=BeerFactory()).beer
+        self.assertNotIn(new_beer.name, self.get_names(self.url))
+        api_cache.bump_all()
+        self.assertIn(new_beer.name, self.get_names(self.url))
+
+    @override_settings(TAP_LIST_SNAPSHOT_MAX_AGE=0)
+    def test_stale_after_max_age(self):
+        snapshots.venue_changed(self.venue)
+        new_beer = TapFactory(venue=self.venue, beer=BeerFactory()).beer
+        self.assertIn(new_beer.name, self.get_names(self.url))
+
+    def test_filtered_requests_skip_snapshot(self):
+        snapshots.venue_changed(self.venue)
+        new_beer = TapFactory(venue=self.venue, beer=BeerFactory()).beer
+        self.assertEqual(
+            self.get_names(f"{self.url}?name={new_beer.name}"), {new_beer.name}
+        )
+
+    def test_unknown_venue(self):
+        response = self.client.get(f"/api/v1/venues/{self.venue.id + 1}/beers/")
+        self.assertEqual(response.json()["results"], [])
+        self.assertFalse(VenueTapListSnapshot.objects.exists())
+
+    def test_queues_lookups(self):
+        # on the first page
+        beer = Beer.objects.order_by("manufacturer__name", "name").first()
+        beer.untappd_url = "https://untappd.com/b/whatever/1"
+        beer.save()
+        snapshots.venue_changed(self.venue)
+        self.assertFalse(PendingUntappdLookup.objects.exists())
+        self.get(f"{self.url}?page=2")
+        self.assertFalse(PendingUntappdLookup.objects.exists())
+        self.get(self.url)
+        self.assertTrue(PendingUntappdLookup.objects.filter(beer=beer).exists())
+
+    def test_clear_tap(self):
+        self.client.force_login(UserFactory(is_superuser=True))
+        self.client.post(f"/taps/{self.taps[0].id}/clear/")
+        self.client.logout()
+        names = {beer["name"] for beer in VenueTapListSnapshot.objects.get().beers}
+        self.assertNotIn(self.beers[0].name, names)
+        self.assertEqual(len(names), 11)
+
+    def test_stale_after_beer_edit(self):
+        snapshots.venue_changed(self.venue)
+        beer = self.beers[0]
+        beer.name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            beer.save()
+        snapshot = VenueTapListSnapshot.objects.get()
+        self.assertEqual(snapshot.cache_version, snapshots.STALE)
+        self.assertIn("Renamed", self.get_names(self.url))
+
+    def test_stale_after_other_venue_changed(self):
+        other_venue = VenueFactory()
+        TapFactory(venue=other_venue, beer=self.beers[0])
+        snapshots.venue_changed(self.venue)
+        snapshots.venue_changed(other_venue)
+        self.taps[0].delete()
+        Tap.refresh_beer_summaries(self.taps[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            snapshots.venue_changed(self.venue)
+        other_snapshot = VenueTapListSnapshot.objects.get(venue=other_venue)
+        self.assertEqual(other_snapshot.cache_version, snapshots.STALE)
+        (beer,) = self.get(f"/api/v1/venues/{other_venue.id}/beers/")["results"]
+        self.assertEqual([venue["id"] for venue in beer["venues"]], [other_venue.id])
+
+    def test_unchanged_beers_leave_other_venues_alone(self):
+        other_venue = VenueFactory()
+        TapFactory(venue=other_venue, beer=self.beers[0])
+        snapshots.venue_changed(self.venue)
+        snapshots.venue_changed(other_venue)
+        with self.captureOnCommitCallbacks() as callbacks:
+            snapshots.venue_changed(self.venue)
+        # just the API cache bump
+        self.assertEqual(len(callbacks), 1)
+
+    def test_rebuilt_after_admin_edit(self):
+        snapshots.venue_changed(self.venue)
+        tap = self.taps[0]
+        versions = api_cache.get_versions(api_cache.venue_scopes(self.venue))
+        self.client.force_login(UserFactory(is_superuser=True, is_staff=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("admin:taps_tap_delete", args=[tap.id]), {"post": "yes"}
+            )
+        self.assertEqual(response.status_code, 302)
+        snapshot = VenueTapListSnapshot.objects.get()
+        self.assertEqual(snapshot.version, 2)
+        names = {beer["name"] for beer in snapshot.beers}
+        self.assertNotIn(self.beers[0].name, names)
+        self.assertEqual(len(names), 11)
+        self.assertTrue(
+            all(
+                new > old
+                for old, new in zip(
+                    versions, api_cache.get_versions(api_cache.venue_scopes(self.venue))
+                )
+            )
+        )
+
+    @patch("hsv_dot_beer.tasks.warm_api_cache.delay")
+    def test_not_rebuilt_twice(self, warm):
+        self.client.force_login(UserFactory(is_superuser=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/taps/{self.taps[0].id}/clear/")
+        # clear_tap rebuilt it before committing
+        self.assertEqual(VenueTapListSnapshot.objects.get().version, 1)
+
+    def test_stale_after_venue_edit(self):
+        other_venue = VenueFactory()
+        TapFactory(venue=other_venue, beer=self.beers[0])
+        snapshots.venue_changed(self.venue)
+        snapshots.venue_changed(other_venue)
+        self.venue.name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.venue.save()
+        self.assertEqual(
+            set(VenueTapListSnapshot.objects.values_list("cache_version", flat=True)),
+            {snapshots.STALE},
+        )
+        (beer,) = self.get(f"/api/v1/venues/{other_venue.id}/beers/")["results"]
+        self.assertIn("Renamed", [venue["name"] for venue in beer["venues"]])
+
+    def test_check_times_leave_snapshots_alone(self):
+        snapshots.venue_changed(self.venue)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.venue.save(update_fields=["tap_list_last_check_time"])
+        self.assertFalse(callbacks)
@@ -1,6 +1,4 @@
 from django.contrib.auth.decorators import login_required
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from django.db.models import Prefetch
 from django.shortcuts import render, get_object_or_404
 from rest_framework.exceptions import NotFound
@@ -9,21 +7,42 @@ from rest_framework.permissions import IsAdminUser
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from hsv_dot_beer.api_cache import cache_response
+from hsv_dot_beer.sparse_fields import get_shape
 from taps.models import Tap
 from venues.models import Venue
-from beers.views import CachedListMixin, BeerViewSet
+from beers.views import (
+    CachedListMixin,
+    BeerViewSet,
+    fast_beer_response,
+    shape_beer_queryset,
+)
+from beers.fast_serializers import queue_untappd_lookups
 from beers.filters import BeerFilterSet
 from . import serializers
+from . import snapshots
 from . import models
 from . import filters
 
 
 class VenueViewSet(CachedListMixin, ModelViewSet):
+    cache_resources = ("venues",)
     serializer_class = serializers.VenueSerializer
     queryset = models.Venue.objects.order_by("name")
     filterset_class = filters.VenueFilterSet
 
-    @method_decorator(cache_page(60 * 5))
+    @property
+    def cursor_ordering(self):
+        if self.action == "beers":
+            return BeerViewSet.cursor_ordering
+        return None
+
+    @cache_response(venue_lookup=True)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    # only the venue's own tap changes matter here, not everyone else's
+    @cache_response(resources=(), venue_lookup=True)
     @action(detail=True, methods=["GET"])
     def beers(self, request, pk=None, slug=None):
         filter_cond = {}
@@ -49,16 +68,32 @@ class VenueViewSet(CachedListMixin, ModelViewSet):
                     ]
                 }
             )
-        queryset = BeerViewSet.queryset.filter(**filter_cond).distinct()
+        shape = get_shape(request)
+        if shape is None and set(request.query_params) <= snapshots.UNFILTERED_PARAMS:
+            beers = snapshots.get_snapshot(pk=pk, slug=slug)
+            if beers is not None:
+                page = self.paginate_queryset(beers)
+                if page is not None:
+                    queue_untappd_lookups(page)
+                    return self.get_paginated_response(page)
+                queue_untappd_lookups(beers)
+                return Response(beers)
+        queryset = shape_beer_queryset(
+            BeerViewSet.queryset.filter(**filter_cond).distinct(),
+            shape,
+        )
 
         # let the user use all the beer filters just for kicks
         queryset = BeerFilterSet(request.query_params, queryset=queryset).qs
+        if shape is None:
+            return fast_beer_response(self, queryset)
 
         page = self.paginate_queryset(queryset)
+        context = self.get_serializer_context()
         if page is not None:
-            serializer = BeerViewSet.serializer_class(page, many=True)
+            serializer = BeerViewSet.serializer_class(page, many=True, context=context)
             return self.get_paginated_response(serializer.data)
-        serializer = BeerViewSet.serializer_class(queryset, many=True)
+        serializer = BeerViewSet.serializer_class(queryset, many=True, context=context)
         return Response(serializer.data)
 
 
@@ -71,6 +106,7 @@ class VenueBySlugViewSet(VenueViewSet):
 
 
 class VenueAPIConfigurationViewSet(CachedListMixin, ModelViewSet):
+    cache_resources = ("venues",)
     serializer_class = serializers.VenueAPIConfigurationSerializer
     queryset = models.VenueAPIConfiguration.objects.all()
     permission_classes = (IsAdminUser,)